@@ -1,5 +1,7 @@
 from django.db import models
-from django.db.models import Max
+
+from utils.geo import coords
+from .utils.ids import next_id
 
 class Candidate(models.Model):
     candidate_id  = models.PositiveIntegerField(primary_key=True)
@@ -14,6 +16,8 @@ class Candidate(models.Model):
     joined_time   = models.DateTimeField(auto_now_add=True)
     ip_address    = models.GenericIPAddressField(null=True, blank=True, protocol='both', unpack_ipv4=False)
     location      = models.JSONField(null=True, blank=True)  
+    lat           = models.FloatField(null=True, blank=True, editable=False)   # from location, on save
+    lng           = models.FloatField(null=True, blank=True, editable=False)
     profile_picture   = models.ImageField(
         upload_to='profile_pictures/',
         blank=True,
@@ -22,8 +26,8 @@ class Candidate(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.candidate_id:
-            last = self.__class__.objects.aggregate(max_id=Max('candidate_id'))['max_id'] or 999
-            self.candidate_id = last + 1
+            self.candidate_id = next_id(self.__class__)
+        self.lat, self.lng = coords(self.location)
         super().save(*args, **kwargs)
 
     class Meta:
@@ -56,8 +60,7 @@ class Employer(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.employer_id:
-            last = self.__class__.objects.aggregate(max_id=Max('employer_id'))['max_id'] or 999
-            self.employer_id = last + 1
+            self.employer_id = next_id(self.__class__)
         super().save(*args, **kwargs)
 
     class Meta:
@@ -67,3 +70,12 @@ class Employer(models.Model):
 
     def __str__(self):
         return f"{self.company_name} ({self.representative_name}) <{self.email}>"
+
+
+class IdSequence(models.Model):
+    """Next unreserved primary key per model, handed out in blocks (utils/ids.py)."""
+    name    = models.CharField(max_length=100, primary_key=True)   # model label, e.g. 'authentication.candidate'
+    next_id = models.PositiveBigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.next_id}"
@@ -1,3 +1,77 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import OperationalError, close_old_connections
+from django.test import TestCase, TransactionTestCase
+
+from utils.sqlite import is_locked
+
+from .models import Candidate, Employer, IdSequence
+from .utils import ids
+
+
+def make_candidate(n, **fields):
+    return Candidate(first_name='C', last_name=str(n), email=f'c{n}@example.com', password='x', **fields)
+
+
+class IdAllocatorTests(TestCase):
+
+    def test_numbering_starts_at_1000_and_continues_existing_rows(self):
+        self.assertEqual(Candidate.objects.create(first_name='A', last_name='B', email='a@example.com').pk, 1000)
+        Employer.objects.bulk_create([Employer(employer_id=1500, company_name='Old', email='old@example.com')])
+        self.assertEqual(Employer.objects.create(company_name='New', email='new@example.com').pk, 1501)
+
+    def test_saves_use_the_sequence_not_max(self):
+        make_candidate(0).save()
+        with self.assertNumQueries(5):   # savepoint, UPDATE + SELECT the sequence, release, INSERT
+            make_candidate(1).save(force_insert=True)
+        self.assertEqual(IdSequence.objects.get(name='authentication.candidate').next_id, 1002)
+
+    def test_bulk_create_with_assigned_ids(self):
+        people = ids.assign_ids(Candidate, [make_candidate(n) for n in range(5)])
+        with self.assertNumQueries(1):   # ids are already assigned
+            Candidate.objects.bulk_create(people)
+        self.assertEqual(sorted(Candidate.objects.values_list('pk', flat=True)), list(range(1000, 1005)))
+        later = make_candidate(5)
+        later.save()
+        self.assertEqual(later.pk, 1005)
+
+
+class IdBlockTests(TransactionTestCase):
+
+    def setUp(self):
+        ids._blocks.clear()
+
+    def test_outside_transactions_ids_come_from_a_reserved_block(self):
+        make_candidate(0).save()
+        with self.assertNumQueries(1):    # just the INSERT
+            make_candidate(1).save(force_insert=True)
+        self.assertEqual(IdSequence.objects.get().next_id, 1000 + ids.BLOCK_SIZE)
+
+    def test_concurrent_signups_get_distinct_ids(self):
+        errors = []
+
+        def signup(worker):
+            try:
+                for n in range(20):
+                    while True:
+                        try:
+                            make_candidate(f'{worker}-{n}').save()
+                            break
+                        except OperationalError as exc:
+                            # the in-memory test database reports table locks
+                            # at once instead of waiting out busy_timeout
+                            if not is_locked(exc):
+                                raise
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=signup, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Candidate.objects.count(), 80)
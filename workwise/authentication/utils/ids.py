@@ -0,0 +1,71 @@
+# authentication/utils/ids.py
+
+import os
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max
+
+FIRST_ID   = 1000   # public ids (candidate/employer/job numbers) start here
+BLOCK_SIZE = 50     # ids a process reserves per trip to the sequence table
+
+_blocks = {}        # model label -> [next free id, end of reserved block)
+_lock   = threading.Lock()
+
+# forked workers must not share the parent's block
+os.register_at_fork(after_in_child=_blocks.clear)
+
+
+def _reserve(model, count):
+    """
+    Claim `count` consecutive ids for `model` from authentication.IdSequence
+    and return the first. The UPDATE comes first so concurrent reservations
+    queue on the row lock instead of reading the same value. The first
+    reservation seeds the sequence from the table's current maximum.
+    """
+    from authentication.models import IdSequence
+
+    name = model._meta.label_lower
+    with transaction.atomic():
+        if IdSequence.objects.filter(name=name).update(next_id=F('next_id') + count):
+            return IdSequence.objects.get(name=name).next_id - count
+
+        pk    = model._meta.pk.name
+        first = (model.objects.aggregate(max_id=Max(pk))['max_id'] or FIRST_ID - 1) + 1
+        try:
+            with transaction.atomic():
+                IdSequence.objects.create(name=name, next_id=first + count)
+        except IntegrityError:
+            # another process seeded it first
+            return _reserve(model, count)
+        return first
+
+
+def next_id(model):
+    """Next primary key for a new `model` row, from this process's reserved block."""
+    name = model._meta.label_lower
+    with _lock:
+        block = _blocks.get(name)
+        if block and block[0] < block[1]:
+            block[0] += 1
+            return block[0] - 1
+
+    if connection.in_atomic_block:
+        # a rollback would return the block to the table while we kept using it
+        return _reserve(model, 1)
+
+    first = _reserve(model, BLOCK_SIZE)
+    with _lock:
+        _blocks[name] = [first + 1, first + BLOCK_SIZE]
+    return first
+
+
+def assign_ids(model, objs):
+    """Give every unsaved obj in `objs` an id with one reservation, e.g. before bulk_create()."""
+    pk      = model._meta.pk.attname
+    missing = [obj for obj in objs if getattr(obj, pk) is None]
+    if missing:
+        first = _reserve(model, len(missing))
+        for offset, obj in enumerate(missing):
+            setattr(obj, pk, first + offset)
+    return objs
@@ -3,7 +3,7 @@ import random
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.utils import timezone
-from django.core.mail import send_mail
+from taskqueue.mail import queue_mail
 from django.contrib.auth.hashers import make_password, check_password
 from django.http import HttpResponse
 from django.conf import settings
@@ -80,12 +80,11 @@ def signup_candidate(request):
             "If you did not request this, please ignore this email.\n\n"
             "Thank you,\nThe WorkWise Team"
         )
-        send_mail(
+        queue_mail(
             subject,
             message,
             settings.EMAIL_HOST_USER,
             [form_data['email']],
-            fail_silently=False,
         )
 
         return redirect('auth:verify_email_candidate')
@@ -135,12 +134,11 @@ def verify_email_candidate(request):
             data['otp'] = otp
             data['otp_sent_time'] = now_ts
             request.session['candidate_signup_data'] = data
-            send_mail(
+            queue_mail(
                 "Your WorkWise Verification Code",
                 f"Hello {data['first_name']},\nYour new code is {otp}\nExpires in 15 minutes.",
                 settings.EMAIL_HOST_USER,
                 [new_email],
-                fail_silently=False,
             )
             return redirect('auth:verify_email_candidate')
 
@@ -198,12 +196,11 @@ def resend_code_candidate(request):
     request.session['candidate_signup_data'] = data
 
     # Send the email
-    send_mail(
+    queue_mail(
         "Your WorkWise Verification Code",
         f"Hello {data['first_name']},\nYour new code is {otp}\nExpires in 15 minutes.",
         settings.EMAIL_HOST_USER,
         [data['email']],
-        fail_silently=False,
     )
 
     return redirect('auth:verify_email_candidate')
@@ -277,12 +274,11 @@ def signup_employer(request):
         }
 
         # Send OTP email
-        send_mail(
+        queue_mail(
             "Your WorkWise Employer Verification Code",
             f"Hello {form_data['representative_name']},\nYour code is {otp}\nExpires in 15 min.",
             settings.EMAIL_HOST_USER,
             [form_data['email']],
-            fail_silently=False,
         )
         request.session['show_loc_prompt'] = True
         return redirect('auth:verify_email_employer')
@@ -322,12 +318,11 @@ def verify_email_employer(request):
             request.session['employer_signup_data'] = data
 
             # re-send email
-            send_mail(
+            queue_mail(
                 "Your WorkWise Employer Verification Code",
                 f"Hello {data['representative_name']},\nYour new code is {otp}\nIt expires in 15 minutes.",
                 settings.EMAIL_HOST_USER,
                 [new_email],
-                fail_silently=False
             )
             return redirect('auth:verify_email_employer')
 
@@ -394,12 +389,11 @@ def resend_code_employer(request):
     request.session['employer_signup_data'] = data
 
     # send the new code
-    send_mail(
+    queue_mail(
         "Your WorkWise Employer Verification Code",
         f"Hello {data['representative_name']},\n\nYour new verification code is: {otp}\n\nIt will expire in 15 minutes.",
         settings.EMAIL_HOST_USER,
         [data['email']],
-        fail_silently=False,
     )
 
     return redirect('auth:verify_email_employer')
@@ -489,12 +483,11 @@ def reset_password(request):
             }
             
             # Send OTP
-            send_mail(
+            queue_mail(
                 "Your WorkWise Password Reset Code",
                 f"Your code is: {otp}\nIt expires in 15 minutes.",
                 settings.EMAIL_HOST_USER,
                 [email],
-                fail_silently=False,
             )
             return redirect('auth:reset_password_verify')
 
@@ -5,3 +5,5 @@ class CandidateProfileConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'candidate_profile'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from candidate_profile.models import CandidateCV
+from candidate_profile.utils.features import refresh_features
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CandidateFeatures row for every saved CV."
+
+    def handle(self, *args, **options):
+        count = 0
+        for cv in CandidateCV.objects.filter(parsed_data__isnull=False).iterator():
+            refresh_features(cv)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Built features for {count} CV(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from candidate_profile.utils.recommendations import premium_candidates, refresh_candidate
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored job recommendations of every premium candidate."
+
+    def handle(self, *args, **options):
+        count = 0
+        for candidate_id in premium_candidates().values_list('pk', flat=True).iterator():
+            refresh_candidate(candidate_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Built recommendations for {count} candidate(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from candidate_profile.utils.cv_parsing import parse_pending
+
+
+class Command(BaseCommand):
+    help = "Parse uploaded CVs still waiting in the background queue (e.g. after a restart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help="Parse at most this many CVs.")
+
+    def handle(self, *args, **options):
+        count = parse_pending(limit=options.get('limit'))
+        self.stdout.write(self.style.SUCCESS(f"Parsed {count} CV(s)."))
@@ -13,6 +13,9 @@ class SavedJob(models.Model):
     class Meta:
         unique_together = ('candidate', 'job')
         ordering = ['-saved_at']
+        indexes = [
+            models.Index(fields=['candidate', 'saved_at'], name='saved_cand_recent_idx'),
+        ]
 
 
 
@@ -37,10 +40,23 @@ class JobApplication(models.Model):
     )
     meeting_message = models.TextField(null=True, blank=True)
     meeting_link    = models.URLField(null=True, blank=True)
+    # cached hybrid ranking (employer_profile.utils.ranking)
+    rank_score      = models.FloatField(null=True, blank=True)
+    rank_components = models.JSONField(null=True, blank=True)
+    ranked_at       = models.DateTimeField(null=True, blank=True)
+    rank_model      = models.CharField(max_length=32, blank=True, default='')   # stamp of the text model
 
     class Meta:
         unique_together = ('candidate', 'job')
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['job', '-rank_score', '-applied_at', '-id'], name='app_job_rank_idx'),
+            models.Index(fields=['job', 'applied_at', 'id'], name='app_job_recent_idx'),
+            models.Index(fields=['job', 'status', 'applied_at'], name='app_job_status_idx'),
+            models.Index(fields=['candidate', 'applied_at'], name='app_cand_recent_idx'),
+            models.Index(fields=['candidate', 'status', 'interview_at'], name='app_cand_interview_idx'),
+            models.Index(fields=['status', 'interview_at'], name='app_interview_idx'),
+        ]
 
 
 
@@ -57,10 +73,93 @@ class CandidateCV(models.Model):
     parsed_data  = models.JSONField(null=True, blank=True)
     parsed_at    = models.DateTimeField(auto_now_add=True)
 
+    # background parse of the last uploaded file, awaiting review
+    PARSE_STATUS_CHOICES = [
+        ('idle',       'Idle'),
+        ('pending',    'Pending'),
+        ('processing', 'Processing'),
+        ('done',       'Done'),
+        ('failed',     'Failed'),
+    ]
+    parse_status     = models.CharField(max_length=10, choices=PARSE_STATUS_CHOICES, default='idle')
+    parse_result     = models.JSONField(null=True, blank=True)
+    parse_error      = models.TextField(blank=True, default='')
+    parse_started_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"CV for {self.candidate.email}"
 
 
+class CandidateFeatures(models.Model):
+    """
+    Ready-to-score view of a CV's parsed_data, rebuilt whenever the
+    candidate saves their reviewed CV.
+    """
+    cv               = models.OneToOneField(
+        CandidateCV,
+        on_delete=models.CASCADE,
+        related_name='features'
+    )
+    skills           = models.JSONField(default=list, blank=True)
+    certifications   = models.JSONField(default=list, blank=True)
+    languages        = models.JSONField(default=list, blank=True)
+    education        = models.JSONField(default=list, blank=True)
+    education_level  = models.PositiveSmallIntegerField(default=0)
+    experience_years = models.FloatField(null=True, blank=True)
+    lat              = models.FloatField(null=True, blank=True)
+    lng              = models.FloatField(null=True, blank=True)
+    projects         = models.JSONField(default=list, blank=True)
+    current_title    = models.CharField(max_length=200, blank=True)
+    industry         = models.CharField(max_length=100, blank=True)
+    department       = models.CharField(max_length=100, blank=True)
+    rank_text        = models.TextField(blank=True)
+    rec_text         = models.TextField(blank=True)
+    updated_at       = models.DateTimeField(auto_now=True, db_index=True)
+
+    def as_ranking(self):
+        """Features in the shape employer_profile.utils.ranking scores."""
+        return {
+            'skills':    self.skills,
+            'req_pool':  self.skills + self.education + self.certifications,
+            'certs':     self.certifications,
+            'langs':     self.languages,
+            'edu_level': self.education_level,
+            'exp_years': self.experience_years,
+            'lat':       self.lat,
+            'lng':       self.lng,
+            'projects':  self.projects,
+            'text':      self.rank_text,
+        }
+
+    def __str__(self):
+        return f"Features for CV {self.cv_id}"
+
+
+class ResumeCache(models.Model):
+    """
+    Content-addressed results of text extraction and resume parsing, so a
+    re-uploaded file (or one with identical text) skips both.
+    """
+    KIND_CHOICES = [
+        ('file_text',  'File -> extracted text'),
+        ('file_parse', 'File -> parsed resume'),
+        ('text_parse', 'Text -> parsed resume'),
+    ]
+    kind       = models.CharField(max_length=10, choices=KIND_CHOICES)
+    digest     = models.CharField(max_length=64)          # SHA-256 hex
+    text       = models.TextField(blank=True)
+    data       = models.JSONField(null=True, blank=True)
+    size       = models.PositiveIntegerField(default=0)   # bytes, for eviction
+    created_at = models.DateTimeField(auto_now_add=True)
+    used_at    = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        unique_together = ('kind', 'digest')
+
+    def __str__(self):
+        return f"{self.kind} {self.digest[:12]}"
+
+
 class CandidatePremium(models.Model):
     candidate            = models.OneToOneField(
         Candidate,
@@ -75,4 +174,29 @@ class CandidatePremium(models.Model):
     def __str__(self):
         return f"{self.candidate.email} Premium: {'Active' if self.is_subscribed else 'Inactive'}"
     
-    
\ No newline at end of file
+    
+
+class JobRecommendation(models.Model):
+    """
+    One of a premium candidate's top recommended jobs, kept up to date by
+    candidate_profile.utils.recommendations as jobs and CVs change.
+    """
+    candidate      = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='recommendations')
+    job            = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='recommendations')
+    score          = models.FloatField()
+    matched_skills = models.JSONField(default=list, blank=True)
+    distance_km    = models.FloatField(null=True, blank=True)
+    scored_at      = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('candidate', 'job')
+        indexes = [
+            models.Index(fields=['candidate', '-score'], name='rec_cand_score_idx'),
+        ]
+
+    @property
+    def match_count(self):
+        return len(self.matched_skills)
+
+    def __str__(self):
+        return f"Job {self.job_id} for candidate {self.candidate_id}: {self.score:.3f}"
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from employer_profile.models import JobPost
+from employer_profile.utils import lsa_index
+from taskqueue.queue import enqueue
+from .models import CandidateCV, CandidateFeatures, CandidatePremium
+
+
+def _rescore(candidate_id):
+    enqueue('employer_profile.rescore_candidate', candidate_id, key=f'rescore_candidate:{candidate_id}')
+
+
+def _recommend(candidate_id):
+    enqueue('candidate_profile.recommend_for_candidate', candidate_id, key=f'recommend_for:{candidate_id}')
+
+
+@receiver(post_save, sender=CandidateFeatures)
+def refresh_scores_on_features(sender, instance, **kwargs):
+    _rescore(instance.cv.candidate_id)
+    _recommend(instance.cv.candidate_id)
+    lsa_index.cv_changed()
+
+
+@receiver(pre_delete, sender=CandidateCV)
+def refresh_scores_on_cv_delete(sender, instance, **kwargs):
+    _rescore(instance.candidate_id)
+    _recommend(instance.candidate_id)
+
+
+@receiver(post_save, sender=CandidatePremium)
+def refresh_recommendations_on_subscribe(sender, instance, **kwargs):
+    if instance.is_subscribed and instance.payment_ok:
+        _recommend(instance.candidate_id)
+
+
+@receiver(post_save, sender=JobPost)
+def refresh_job_recommendations(sender, instance, **kwargs):
+    # created, edited or deactivated: rescore just this job
+    enqueue('candidate_profile.recommend_job', instance.pk, key=f'recommend_job:{instance.pk}')
@@ -0,0 +1,19 @@
+from taskqueue.queue import task
+
+from .utils import recommendations
+from .utils.cv_parsing import STALE_AFTER, parse_cv as _parse_cv
+
+
+@task(max_attempts=3, timeout=int(STALE_AFTER.total_seconds()))
+def parse_cv(cv_id):
+    _parse_cv(cv_id)
+
+
+@task(timeout=900)
+def recommend_for_candidate(candidate_id):
+    recommendations.refresh_candidate(candidate_id)
+
+
+@task(timeout=900)
+def recommend_job(job_id):
+    recommendations.refresh_job(job_id)
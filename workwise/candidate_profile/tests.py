@@ -1,3 +1,400 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from employer_profile.models import JobPost
+from employer_profile.utils.lsa_index import LsaIndex, build_lsa_index
+from index.rollups import rebuild_rollups
+from taskqueue.models import Task
+from utils import text_extractor
+from utils.testing import drop_queued_tasks, isolate_models_dir, make_candidate, make_employer, make_job
+from .models import CandidateCV, CandidatePremium, JobApplication, ResumeCache, SavedJob
+from .utils import cv_parsing, recommendations, resume_cache
+from .utils.dashboard_stats import candidate_stats, compute_candidate_stats
+from .utils.features import refresh_features
+
+
+def make_pdf(pages):
+    """Minimal PDF with one line of Helvetica text per page."""
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+            "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objs)} 0 R >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = b"%PDF-1.4\n", []
+    for i, body in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+class AsyncCvParsingTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_root = override_settings(MEDIA_ROOT=media)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.candidate = make_candidate()
+        session = self.client.session
+        session['candidate_id'] = self.candidate.candidate_id
+        session.save()
+
+    def upload(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            resp = self.client.post(reverse('candidate:upload_cv'), {
+                'cv_file': SimpleUploadedFile('cv.docx', b'not really a docx'),
+            })
+        return resp, callbacks
+
+    def status(self):
+        return self.client.get(reverse('candidate:cv_parse_status')).json()['status']
+
+    def test_upload_returns_before_parsing(self):
+        resp, _ = self.upload()
+        self.assertRedirects(resp, reverse('candidate:upload_cv'))
+        self.assertEqual(self.status(), 'pending')
+
+        cv = CandidateCV.objects.get(candidate=self.candidate)
+        task = Task.objects.get(name='candidate_profile.parse_cv')
+        self.assertEqual((task.args, task.status), ([cv.pk], 'queued'))
+
+    @mock.patch.object(resume_cache, 'extract_text_from_file', return_value='resume text')
+    @mock.patch.object(resume_cache, 'parse_resume', return_value={'name': 'C V', 'skills': ['Python']})
+    def test_worker_result_is_shown_for_review(self, parse, extract):
+        self.upload()
+        cv = CandidateCV.objects.get(candidate=self.candidate)
+        self.assertEqual(cv_parsing.parse_cv(cv.pk), 'done')
+        self.assertIsNone(cv_parsing.parse_cv(cv.pk))   # already claimed
+        parse.assert_called_once_with('resume text')
+
+        self.assertEqual(self.status(), 'done')
+        resp = self.client.get(reverse('candidate:upload_cv'))
+        self.assertEqual(resp.context['parsed'], {'name': 'C V', 'skills': ['Python']})
+
+        self.client.post(reverse('candidate:upload_cv'), {'action': 'save', 'skills': 'Python'})
+        cv.refresh_from_db()
+        self.assertEqual(cv.parse_status, 'idle')
+        self.assertEqual(cv.parsed_data['skills'], ['Python'])
+
+    @mock.patch.object(resume_cache, 'extract_text_from_file', return_value='resume text')
+    def test_result_of_a_replaced_upload_is_dropped(self, extract):
+        self.upload()
+        cv = CandidateCV.objects.get(candidate=self.candidate)
+
+        def reupload(text):
+            # the candidate uploads again while the first file is being parsed
+            CandidateCV.objects.filter(pk=cv.pk).update(parse_status='pending')
+            return {'name': 'Old CV'}
+
+        with mock.patch.object(resume_cache, 'parse_resume', side_effect=reupload), \
+                self.assertLogs('candidate_profile.utils.cv_parsing', 'INFO') as logs:
+            self.assertEqual(cv_parsing.parse_cv(cv.pk), 'superseded')
+        self.assertIn(f'CV {cv.pk} changed', logs.output[0])
+        cv.refresh_from_db()
+        self.assertEqual((cv.parse_status, cv.parse_result), ('pending', None))
+
+    @mock.patch.object(resume_cache, 'extract_text_from_file', side_effect=ValueError('bad file'))
+    def test_failed_parse_is_reported(self, extract):
+        self.upload()
+        with self.assertLogs('candidate_profile.utils.cv_parsing', 'ERROR'):
+            self.assertEqual(cv_parsing.parse_pending(), 1)
+        self.assertEqual(self.status(), 'failed')
+        resp = self.client.get(reverse('candidate:upload_cv'))
+        self.assertIn('bad file', resp.context['error'])
+
+    @override_settings(TASKS_EAGER=True)
+    @mock.patch.object(resume_cache, 'parse_resume', return_value={'name': 'C V'})
+    def test_transient_errors_are_retried(self, parse):
+        flaky = mock.Mock(side_effect=[OSError('disk busy'), 'resume text'])
+        with mock.patch.object(resume_cache, 'extract_text_from_file', flaky), \
+                self.assertLogs('taskqueue.queue', 'WARNING'):
+            self.upload()
+        self.assertEqual(self.status(), 'pending')
+        task = Task.objects.get(name='candidate_profile.parse_cv')
+        self.assertEqual((task.status, task.attempts), ('queued', 1))
+
+        with mock.patch.object(resume_cache, 'extract_text_from_file', flaky):
+            self.assertEqual(cv_parsing.parse_pending(), 1)
+        self.assertEqual(self.status(), 'done')
+
+
+class ResumeCacheTests(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.docx')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        with open(self.path, 'wb') as fh:
+            fh.write(b'same bytes')
+
+    @mock.patch.object(resume_cache, 'extract_text_from_file', return_value='resume text')
+    @mock.patch.object(resume_cache, 'parse_resume', return_value={'name': 'C V'})
+    def test_repeat_file_and_repeat_text_skip_work(self, parse, extract):
+        self.assertEqual(resume_cache.cached_parse(self.path), {'name': 'C V'})
+        self.assertEqual(resume_cache.cached_parse(self.path), {'name': 'C V'})
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(parse.call_count, 1)
+
+        # different bytes, same text: extracted again but not re-parsed
+        with open(self.path, 'wb') as fh:
+            fh.write(b'other bytes')
+        resume_cache.cached_parse(self.path)
+        self.assertEqual(extract.call_count, 2)
+        self.assertEqual(parse.call_count, 1)
+
+    def test_evicts_least_recently_used(self):
+        for i in range(5):
+            resume_cache.store('text_parse', f'{i:064d}', text='x' * 100)
+        resume_cache.lookup('text_parse', f'{0:064d}')
+
+        self.assertEqual(resume_cache.evict(max_bytes=250), 3)
+        self.assertEqual(
+            sorted(ResumeCache.objects.values_list('digest', flat=True)),
+            [f'{0:064d}', f'{4:064d}'],
+        )
+
+    def test_store_under_budget_skips_the_lru_walk(self):
+        resume_cache.store('text_parse', f'{0:064d}', text='x' * 100)
+        with self.assertNumQueries(1):
+            self.assertEqual(resume_cache.evict(), 0)
+
+
+class TextExtractionTests(TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        with open(self.path, 'wb') as fh:
+            fh.write(make_pdf([f'Resume page {i}' for i in range(20)]))
+
+    def test_pdfium_matches_pdfplumber(self):
+        self.assertEqual(
+            text_extractor.extract_pdf(self.path, backend='pdfium'),
+            text_extractor.extract_pdf(self.path, backend='pdfplumber'),
+        )
+
+    def test_page_and_char_caps(self):
+        self.assertEqual(text_extractor.extract_pdf(self.path, max_pages=2), 'Resume page 0\nResume page 1')
+        self.assertEqual(text_extractor.extract_text_from_file(self.path, max_chars=6), 'Resume')
+
+    def test_falls_back_to_pdfplumber_when_pdfium_finds_nothing(self):
+        with mock.patch.dict(text_extractor.PDF_BACKENDS, {'pdfium': lambda *a, **kw: ''}):
+            self.assertTrue(text_extractor.extract_pdf(self.path).startswith('Resume page 0'))
+
+    def test_process_pool_keeps_page_order(self):
+        self.assertEqual(
+            text_extractor.extract_pdf(self.path, workers=3),
+            text_extractor.extract_pdf(self.path, workers=0),
+        )
+
+
+class CandidateDashboardStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        isolate_models_dir(self)
+        employer       = make_employer()
+        self.candidate = make_candidate()
+        now = timezone.now()
+        statuses = ['applied', 'reviewing', 'interview', 'offered', 'rejected']
+        for i in range(20):
+            job = make_job(employer)
+            JobApplication.objects.create(
+                candidate=self.candidate, job=job, status=statuses[i % 5],
+                cover_letter='applications/cover_letters/c.pdf',
+                applied_at=now - timedelta(days=13 * i),
+            )
+            if i % 3 == 0:
+                SavedJob.objects.create(candidate=self.candidate, job=job)
+        rebuild_rollups()
+        drop_queued_tasks()
+
+    def test_matches_per_query_counts(self):
+        apps   = self.candidate.applications
+        months = [timezone.now() - relativedelta(months=i) for i in reversed(range(6))]
+        with self.assertNumQueries(2):
+            stats = compute_candidate_stats(self.candidate.candidate_id)
+
+        self.assertEqual(stats['total_apps'], apps.count())
+        self.assertEqual(stats['pending_reviews'], apps.filter(status='reviewing').count())
+        self.assertEqual(stats['saved_jobs'], self.candidate.saved_jobs.count())
+        self.assertEqual(
+            stats['status_data'],
+            [apps.filter(status=s).count() for s in ['applied', 'reviewing', 'interview', 'offered', 'rejected']],
+        )
+        self.assertEqual(
+            stats['activity_data'],
+            [apps.filter(applied_at__year=m.year, applied_at__month=m.month).count() for m in months],
+        )
+
+    @override_settings(TASKS_EAGER=True)
+    def test_cache_invalidated_by_status_change_and_saves(self):
+        cid    = self.candidate.candidate_id
+        before = candidate_stats(cid)
+        with self.assertNumQueries(0):
+            candidate_stats(cid)
+
+        app = self.candidate.applications.filter(status='applied').first()
+        app.status = 'interview'
+        with self.captureOnCommitCallbacks(execute=True):
+            app.save()
+        self.assertEqual(candidate_stats(cid)['interviews'], before['interviews'] + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SavedJob.objects.filter(candidate_id=cid).delete()
+        self.assertEqual(candidate_stats(cid)['saved_jobs'], 0)
+
+
+class RecommendationTests(TestCase):
+
+    def setUp(self):
+        isolate_models_dir(self)
+        self.employer  = make_employer()
+        self.candidate = make_candidate(location={'lat': 27.7172, 'lng': 85.3240})
+        CandidatePremium.objects.create(
+            candidate=self.candidate, is_subscribed=True, payment_ok=True,
+            subscription_end=timezone.now() + timedelta(days=30),
+        )
+        cv = CandidateCV.objects.create(candidate=self.candidate, cv_file='cvs/c.pdf', parsed_data={
+            'skills': ['Python', 'SQL', 'Django'], 'languages': ['English'],
+            'current_job_title': 'Backend Developer', 'experience_years': 3,
+            'summary': 'Python developer building django services',
+        })
+        refresh_features(cv)
+        self.jobs = [
+            make_job(self.employer, requirements=reqs, preferred_skills=[], title=title)
+            for reqs, title in [
+                (['Python'], 'Backend Developer'),
+                (['Python', 'SQL'], 'Python Engineer'),
+                (['Java', 'SQL'], 'Java Developer'),
+                (['Excel'], 'Accountant'),
+            ]
+        ]
+        drop_queued_tasks()
+
+    def stored(self):
+        return dict(self.candidate.recommendations.values_list('job_id', 'score'))
+
+    def assertMatchesFullRescore(self, places=9):
+        incremental = self.stored()
+        recommendations.refresh_candidate(self.candidate.pk)
+        full = self.stored()
+        self.assertEqual(set(incremental), set(full))
+        for job_id, score in full.items():
+            self.assertAlmostEqual(incremental[job_id], score, places=places)
+
+    def test_only_jobs_sharing_a_skill_are_stored(self):
+        self.assertEqual(recommendations.refresh_candidate(self.candidate.pk), 3)
+        self.assertNotIn(self.jobs[3].pk, self.stored())
+        rec = self.candidate.recommendations.get(job=self.jobs[1])
+        self.assertEqual((rec.matched_skills, rec.match_count), (['python', 'sql'], 2))
+        self.assertAlmostEqual(rec.distance_km, 0.0)
+
+    @mock.patch.object(recommendations, 'TOP_N', 2)
+    def test_keeps_the_best_scores_of_a_full_pass(self):
+        profile = recommendations._profile(self.candidate)
+        model   = recommendations._model()
+        jobs    = list(JobPost.objects.filter(is_active=True))
+        sims    = model.description_sims(jobs, profile['rec_text'])
+        scored  = {
+            job.pk: recommendations.score_job(profile, job, sims[i], 0.0)
+            for i, job in enumerate(jobs)
+        }
+        best = sorted((s[0], pk) for pk, s in scored.items() if s)[::-1][:2]
+
+        with mock.patch.object(JobPost, 'from_db', side_effect=AssertionError('hydrated a job')):
+            recommendations.refresh_candidate(self.candidate.pk)
+        stored = self.stored()
+        self.assertEqual(set(stored), {pk for _, pk in best})
+        for score, pk in best:
+            self.assertAlmostEqual(stored[pk], score, places=9)
+            self.assertEqual(
+                self.candidate.recommendations.get(job_id=pk).matched_skills, scored[pk][1],
+            )
+
+    @mock.patch.object(recommendations, 'TOP_N', 3)
+    def test_job_changes_update_lists_incrementally(self):
+        recommendations.refresh_candidate(self.candidate.pk)
+
+        # a strong new job evicts the weakest of a full list
+        job = make_job(self.employer, requirements=['Python', 'SQL', 'Django'], preferred_skills=[])
+        self.assertEqual(recommendations.refresh_job(job.pk), 1)
+        self.assertEqual(len(self.stored()), 3)
+        self.assertMatchesFullRescore()
+
+        # editing away the shared skills drops it
+        job.requirements = ['Excel']
+        job.save()
+        recommendations.refresh_job(job.pk)
+        self.assertNotIn(job.pk, self.stored())
+
+        # as does deactivating
+        self.jobs[1].is_active = False
+        self.jobs[1].save()
+        recommendations.refresh_job(self.jobs[1].pk)
+        self.assertNotIn(self.jobs[1].pk, self.stored())
+
+    @mock.patch.object(recommendations, 'TOP_N', 3)
+    def test_lsa_index_serves_both_directions(self):
+        build_lsa_index()
+        self.assertIsInstance(recommendations._model(), LsaIndex)
+        recommendations.refresh_candidate(self.candidate.pk)
+        for job in self.jobs[:2]:
+            recommendations.refresh_job(job.pk)
+        # float32 latent vectors: the two directions agree to ~1e-7
+        self.assertMatchesFullRescore(places=5)
+
+    def test_expired_subscription_keeps_no_rows(self):
+        recommendations.refresh_candidate(self.candidate.pk)
+        CandidatePremium.objects.update(subscription_end=timezone.now() - timedelta(days=1))
+        recommendations.refresh_job(self.jobs[0].pk)
+        self.assertNotIn(self.jobs[0].pk, self.stored())
+        recommendations.refresh_candidate(self.candidate.pk)
+        self.assertEqual(self.stored(), {})
+
+    @override_settings(TASKS_EAGER=True)
+    def test_signals_keep_the_page_current(self):
+        session = self.client.session
+        session['candidate_id'] = self.candidate.pk
+        session.save()
+        url = reverse('candidate_profile:premium_recommendations')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_features(self.candidate.cv)
+        with self.captureOnCommitCallbacks(execute=True):
+            job = make_job(self.employer, requirements=['Django'], preferred_skills=[])
+
+        with self.assertNumQueries(5):   # session, candidate, premium, count, page
+            resp = self.client.get(url)
+        self.assertEqual(
+            [r.job_id for r in resp.context['recommendations']],
+            list(self.candidate.recommendations.order_by('-score').values_list('job_id', flat=True)),
+        )
+        self.assertIn(job.pk, self.stored())
+
+        resp = self.client.get(url, {'within': 5, 'sort': 'newest'})
+        self.assertEqual(resp.context['recommendations'][0].job_id, job.pk)
+        self.assertContains(resp, 'within=5')
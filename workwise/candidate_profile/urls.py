@@ -11,6 +11,7 @@ urlpatterns = [
     path('applications/<int:application_id>/', views.application_detail, name='application_detail'),
     path('applications/interviews/', views.interview_list, name='interview_list'),
     path('upload_cv/', views.upload_and_review_cv, name='upload_cv'),
+    path('upload_cv/status/', views.cv_parse_status, name='cv_parse_status'),
     path('clear-cv/', views.clear_cv, name='clear_cv'),
     path('profile/', views.profile_manage, name='profile_manage'),
     path('toggle-notify/', views.toggle_notify, name='toggle_notify'),
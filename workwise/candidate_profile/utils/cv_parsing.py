@@ -0,0 +1,124 @@
+# candidate_profile/utils/cv_parsing.py
+
+import logging
+from datetime import timedelta
+
+import openai
+from django.db import OperationalError
+from django.db.models import Q
+from django.utils import timezone
+
+from candidate_profile.models import CandidateCV
+from candidate_profile.utils.resume_cache import cached_parse, file_digest, lookup
+from taskqueue.queue import enqueue
+from utils.sqlite import is_locked
+
+logger = logging.getLogger(__name__)
+
+# a parse stuck in 'processing' this long is assumed to have died with its worker
+STALE_AFTER = timedelta(minutes=10)
+
+
+def queue_parse(cv):
+    """
+    Mark a freshly uploaded CV as pending and queue it for the task
+    worker. A file we've parsed before is answered straight from the
+    resume cache.
+    """
+    hit = lookup('file_parse', file_digest(cv.cv_file.path))
+
+    cv.parse_status     = 'pending' if hit is None else 'done'
+    cv.parse_result     = None if hit is None else hit.data
+    cv.parse_error      = ''
+    cv.parse_started_at = None
+    cv.save(update_fields=['parse_status', 'parse_result', 'parse_error', 'parse_started_at'])
+    if hit is not None:
+        return
+
+    enqueue('candidate_profile.parse_cv', cv.pk)
+
+
+def is_transient(exc):
+    """Errors a later attempt can get past, as opposed to a CV we cannot parse."""
+    if isinstance(exc, OperationalError):
+        return is_locked(exc)
+    if isinstance(exc, FileNotFoundError):
+        return False
+    return isinstance(exc, (OSError, openai.APIConnectionError, openai.RateLimitError,
+                            openai.InternalServerError))
+
+
+def parse_cv(cv_id):
+    """
+    Extract and parse one pending CV. The pending -> processing update
+    doubles as a claim, so two workers never parse the same upload.
+    Returns 'done' or 'failed', 'superseded' if the CV was re-uploaded,
+    cleared or re-claimed before the result was stored, or None if the
+    claim was not taken. Transient errors hand the CV back to 'pending'
+    and propagate, so the task is retried.
+    """
+    now = timezone.now()
+    claimed = (
+        CandidateCV.objects
+        .filter(pk=cv_id)
+        .filter(Q(parse_status='pending') |
+                Q(parse_status='processing', parse_started_at__lt=now - STALE_AFTER))
+        .update(parse_status='processing', parse_started_at=now)
+    )
+    if not claimed:
+        return None
+
+    cv = CandidateCV.objects.get(pk=cv_id)
+    try:
+        result = cached_parse(cv.cv_file.path)
+    except Exception as e:
+        if is_transient(e):
+            CandidateCV.objects.filter(
+                pk=cv_id, parse_status='processing', parse_started_at=now,
+            ).update(parse_status='pending', parse_started_at=None)
+            raise
+        logger.exception("Parsing CV %s failed", cv_id)
+        status, result, error = 'failed', None, f"Parsing failed: {str(e)}"
+    else:
+        status, error = 'done', ''
+
+    # the candidate may have re-uploaded or cleared the CV meanwhile, or a
+    # slow parse may have gone stale and been claimed again
+    stored = (
+        CandidateCV.objects
+        .filter(pk=cv_id, parse_status='processing', parse_started_at=now)
+        .update(parse_status=status, parse_result=result, parse_error=error)
+    )
+    if not stored:
+        logger.info("CV %s changed while it was being parsed; dropped the %s result", cv_id, status)
+        return 'superseded'
+    return status
+
+
+def parse_pending(limit=None):
+    """
+    Parse every pending CV in this process, re-queueing parses that went
+    stale in 'processing'. Used by the parse_cvs command after a restart.
+    """
+    CandidateCV.objects.filter(
+        parse_status='processing',
+        parse_started_at__lt=timezone.now() - STALE_AFTER,
+    ).update(parse_status='pending')
+
+    ids = (
+        CandidateCV.objects
+        .filter(parse_status='pending')
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    if limit:
+        ids = ids[:limit]
+
+    parsed = 0
+    for cv_id in list(ids):
+        try:
+            parsed += parse_cv(cv_id) is not None
+        except Exception:
+            # transient; the CV is pending again for the next run
+            logger.warning("Parsing CV %s hit a transient error", cv_id, exc_info=True)
+    return parsed
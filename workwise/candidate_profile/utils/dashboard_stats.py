@@ -0,0 +1,64 @@
+# candidate_profile/utils/dashboard_stats.py
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from employer_profile.utils.dashboard_stats import STATUSES, STATUS_LABELS, month_starts
+from index.models import CandidateDailyStats
+from utils.cache import get_or_compute
+
+SUMMED = ['applications', 'saved_jobs', *STATUSES]
+
+CACHE_TTL = 60   # seconds; rollup refreshes invalidate sooner
+
+
+def cache_key(candidate_id):
+    return f"candidate_dashboard:{candidate_id}"
+
+
+def compute_candidate_stats(candidate_id, now=None):
+    """
+    Dashboard numbers for one candidate, summed from their daily rollup
+    rows (index.CandidateDailyStats): one aggregate for the cards and
+    status split, one month GROUP BY for the activity chart.
+    """
+    now  = now or timezone.now()
+    rows = CandidateDailyStats.objects.filter(candidate_id=candidate_id)
+
+    c = {
+        k: v or 0
+        for k, v in rows.aggregate(**{f: Sum(f) for f in SUMMED}).items()
+    }
+
+    months    = month_starts(now)
+    per_month = dict(
+        rows
+        .filter(day__gte=months[0].date())
+        .annotate(month=TruncMonth('day'))
+        .values('month')
+        .annotate(n=Sum('applications'))
+        .values_list('month', 'n')
+    )
+
+    return {
+        'total_apps':      c['applications'],
+        'pending_reviews': c['reviewing'],
+        'interviews':      c['interview'],
+        'offers':          c['offered'],
+        'saved_jobs':      c['saved_jobs'],
+        'status_labels':   STATUS_LABELS,
+        'status_data':     [c[s] for s in STATUSES],
+        'activity_labels': [m.strftime('%b %Y') for m in months],
+        'activity_data':   [per_month.get(m.date(), 0) for m in months],
+    }
+
+
+def candidate_stats(candidate_id):
+    """Cached compute_candidate_stats(); see invalidate_candidate_stats()."""
+    return get_or_compute(cache_key(candidate_id), lambda: compute_candidate_stats(candidate_id), CACHE_TTL)
+
+
+def invalidate_candidate_stats(candidate_id):
+    cache.delete(cache_key(candidate_id))
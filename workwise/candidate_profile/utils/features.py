@@ -0,0 +1,156 @@
+# candidate_profile/utils/features.py
+
+from django.db.models import F
+
+from candidate_profile.models import CandidateCV, CandidateFeatures
+
+EDU_LEVELS = {
+    'high school': 1,
+    'bachelor':    2,
+    'master':      3,
+    'phd':         4
+}
+
+
+def norm_items(items):
+    return [str(i).strip().lower() for i in (items or []) if i]
+
+
+def _to_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_coord(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def cv_text(pd):
+    """Text blob of a CV used for the ranking TF-IDF component."""
+    parts = [
+        str(pd.get('summary','') or ''),
+        " ".join([str(e) for e in (pd.get('experience') or []) if e]),
+        " ".join([str(s) for s in (pd.get('skills') or [])     if s]),
+        " ".join([str(c) for c in (pd.get('certifications') or []) if c]),
+    ]
+    return " ".join([p for p in parts if p]).lower()
+
+
+def recommendation_text(pd):
+    """Text blob of a CV compared against job descriptions in recommendations."""
+    return " ".join(filter(None, [
+        pd.get('summary',''),
+        *(pd.get('experience') or []),
+        *(pd.get('education') or []),
+        *[p.get('description','') for p in (pd.get('projects') or []) if isinstance(p, dict)]
+    ]))
+
+
+def cv_features(pd):
+    """
+    Normalise one CV's parsed_data into the plain values the batch
+    scorer works on (lowercased term lists, numbers, project texts).
+    """
+    pd = pd or {}
+    skills = norm_items(pd.get('skills'))
+    certs  = norm_items(pd.get('certifications'))
+    edu    = pd.get('education') or []
+
+    projects = []
+    for p in (pd.get('projects') or []):
+        if not isinstance(p, dict):
+            continue
+        name = str(p.get('name') or '').strip()
+        desc = str(p.get('description') or '').strip()
+        if name or desc:
+            projects.append(f"{name} {desc}".lower())
+
+    loc = pd.get('map_location') or {}
+    if not isinstance(loc, dict):
+        loc = {}
+
+    return {
+        'skills':    skills,
+        'req_pool':  skills + norm_items(edu) + certs,
+        'certs':     certs,
+        'langs':     norm_items(pd.get('languages')),
+        'edu_level': max([EDU_LEVELS.get(str(e).lower(), 0) for e in edu if e], default=0),
+        'exp_years': _to_float(pd.get('experience_years', 0)),
+        'lat':       _to_coord(loc.get('lat')),
+        'lng':       _to_coord(loc.get('lng')),
+        'projects':  projects,
+        'text':      cv_text(pd),
+    }
+
+
+def build_features(cv):
+    """Unsaved CandidateFeatures for a CandidateCV (or an empty one for None)."""
+    if cv is None:
+        return CandidateFeatures()
+    pd = cv.parsed_data or {}
+    f  = cv_features(pd)
+    return CandidateFeatures(
+        cv               = cv,
+        skills           = f['skills'],
+        certifications   = f['certs'],
+        languages        = f['langs'],
+        education        = norm_items(pd.get('education')),
+        education_level  = f['edu_level'],
+        experience_years = f['exp_years'],
+        lat              = f['lat'],
+        lng              = f['lng'],
+        projects         = f['projects'],
+        current_title    = str(pd.get('current_job_title') or '')[:200],
+        industry         = str(pd.get('industry') or '')[:100],
+        department       = str(pd.get('department') or '')[:100],
+        rank_text        = f['text'],
+        rec_text         = recommendation_text(pd),
+    )
+
+
+def refresh_features(cv):
+    """Rebuild and store the features row for a CV."""
+    feats  = build_features(cv)
+    values = {
+        f.name: getattr(feats, f.name)
+        for f in CandidateFeatures._meta.concrete_fields
+        if f.name not in ('id', 'cv', 'updated_at')
+    }
+    obj, _ = CandidateFeatures.objects.update_or_create(cv=cv, defaults=values)
+    return obj
+
+
+def features_for(cv):
+    """Stored features for a CV, built on the fly if it predates the store."""
+    if cv is None:
+        return build_features(None)
+    try:
+        return cv.features
+    except CandidateFeatures.DoesNotExist:
+        return build_features(cv)
+
+
+def load_ranking_features(candidate_ids):
+    """Map candidate_id -> ranking feature dict for every candidate with a CV."""
+    stored = (
+        CandidateFeatures.objects
+        .filter(cv__candidate_id__in=candidate_ids)
+        .annotate(candidate_id=F('cv__candidate_id'))
+    )
+    out = {f.candidate_id: f.as_ranking() for f in stored}
+
+    # CVs saved before the feature store existed
+    missing = [cid for cid in candidate_ids if cid not in out]
+    if missing:
+        rows = (
+            CandidateCV.objects
+            .filter(candidate_id__in=missing)
+            .values_list('candidate_id', 'parsed_data')
+        )
+        for cid, parsed in rows:
+            out[cid] = cv_features(parsed)
+    return out
@@ -0,0 +1,252 @@
+# candidate_profile/utils/recommendations.py
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from rapidfuzz import fuzz
+
+from authentication.models import Candidate
+from candidate_profile.models import JobRecommendation
+from employer_profile.models import JobPost
+from employer_profile.utils import job_tfidf, lsa_index, skill_matrix
+from utils.geo import haversine_many
+from utils.topk import top_k
+from .features import features_for, norm_items
+
+TOP_N    = 200     # recommendations kept per premium candidate
+DIST_MAX = 200.0   # km at which the distance component reaches 0
+
+WEIGHTS = {
+    'skill': 0.30,
+    'req':   0.20,
+    'desc':  0.15,
+    'ind':   0.10,
+    'dep':   0.05,
+    'title': 0.05,
+    'lang':  0.05,
+    'exp':   0.05,
+    'dist':  0.05,
+}
+
+# the JobPost columns scoring reads
+JOB_FIELDS = (
+    'job_id', 'title', 'description', 'requirements', 'preferred_skills', 'languages',
+    'industry', 'department', 'experience_min', 'experience_max', 'lat', 'lng',
+)
+
+
+def premium_candidates():
+    """Candidates whose premium subscription is paid and running."""
+    return Candidate.objects.filter(
+        premium__is_subscribed=True,
+        premium__payment_ok=True,
+        premium__subscription_end__gte=timezone.now(),
+    )
+
+
+def _profile(candidate):
+    """The parts of a candidate's stored CV features that scoring reads."""
+    feats = features_for(getattr(candidate, 'cv', None))
+    return {
+        'skills':     set(feats.skills),
+        'langs':      set(feats.languages),
+        'title':      feats.current_title,
+        'exp_years':  feats.experience_years or 0,
+        'industry':   feats.industry,
+        'department': feats.department,
+        'rec_text':   feats.rec_text,
+    }
+
+
+def _model():
+    """
+    Text model for the description component: the LSA index once it has
+    been built, else the shared job TF-IDF model (built now if need be).
+    """
+    return lsa_index.load_lsa_index() or job_tfidf.load_job_tfidf() or job_tfidf.build_job_tfidf()
+
+
+def _skill_matrix():
+    """The shared job skill matrix, built now if it never was."""
+    return skill_matrix.load_skill_matrix() or skill_matrix.build_skill_matrix()
+
+
+def matched_skills(profile, job):
+    """Sorted skills the candidate shares with the job's requirements and preferred skills."""
+    return sorted(profile['skills'] & set(norm_items(job.requirements) + norm_items(job.preferred_skills)))
+
+
+def score_job(profile, job, desc_score, distance):
+    """
+    (score, matched skills) of one job for a candidate `profile`, or None
+    when they share no skill. `job` is a JobPost or a named values_list()
+    row of JOB_FIELDS; `distance` is in km, or None if unknown.
+    """
+    reqs       = set(norm_items(job.requirements))
+    prefs      = set(norm_items(job.preferred_skills))
+    all_skills = reqs | prefs
+    shared     = profile['skills'] & all_skills
+    if not shared:
+        return None
+    skill_jacc = len(shared) / len(all_skills)
+    req_jacc   = (len(profile['skills'] & reqs) / len(reqs)) if reqs else 0
+    return composite_score(profile, job, skill_jacc, req_jacc, desc_score, distance), sorted(shared)
+
+
+def composite_score(profile, job, skill_jacc, req_jacc, desc_score, distance):
+    """Weighted score of a job given its skill and requirement coverage."""
+    ind_score   = 1 if profile['industry'] == job.industry else 0
+    dep_score   = 1 if profile['department'] == job.department else 0
+    title_score = fuzz.token_set_ratio(profile['title'], job.title) / 100
+
+    langs      = set(norm_items(job.languages))
+    lang_score = len(profile['langs'] & langs) / len(langs) if langs else 0
+
+    # experience fit
+    exp_yrs   = profile['exp_years']
+    exp_score = 0.5
+    min_exp, max_exp = job.experience_min, job.experience_max
+    if min_exp is not None and max_exp is not None:
+        if max_exp > min_exp:
+            if exp_yrs < min_exp:
+                exp_score = exp_yrs / min_exp
+            elif exp_yrs > max_exp:
+                exp_score = 1.0
+            else:
+                exp_score = (exp_yrs - min_exp) / (max_exp - min_exp)
+        else:
+            exp_score = 1.0 if exp_yrs >= min_exp else 0.0
+
+    pen        = 0.5 if 'intern' in job.title.lower() and exp_yrs >= 2 else 1.0
+    dist_score = max(0.0, 1 - distance / DIST_MAX) if distance is not None else 0
+
+    composite = (
+        WEIGHTS['skill'] * skill_jacc +
+        WEIGHTS['req']   * req_jacc +
+        WEIGHTS['desc']  * desc_score +
+        WEIGHTS['ind']   * ind_score +
+        WEIGHTS['dep']   * dep_score +
+        WEIGHTS['title'] * title_score +
+        WEIGHTS['lang']  * lang_score +
+        WEIGHTS['exp']   * exp_score +
+        WEIGHTS['dist']  * dist_score
+    ) * pen
+    return float(composite)
+
+
+def _distances(lat, lng, lats, lngs):
+    """km from one point to each of lats/lngs (None entries stay None)."""
+    if lat is None or lng is None or not len(lats):
+        return [None] * len(lats)
+    lats = np.array([np.nan if v is None else v for v in lats], dtype=float)
+    lngs = np.array([np.nan if v is None else v for v in lngs], dtype=float)
+    return [None if np.isnan(d) else float(d) for d in haversine_many(lat, lng, lats, lngs)]
+
+
+def refresh_candidate(candidate_id):
+    """
+    Rescore every active job for one candidate and store the best TOP_N.
+    Candidates without a running premium subscription keep no rows.
+    Returns the number stored.
+    """
+    candidate = premium_candidates().select_related('cv__features').filter(pk=candidate_id).first()
+    if candidate is None:
+        JobRecommendation.objects.filter(candidate_id=candidate_id).delete()
+        return 0
+
+    profile = _profile(candidate)
+    # plain rows, not model instances: every active job passes through here
+    jobs    = list(JobPost.objects.filter(is_active=True).values_list(*JOB_FIELDS, named=True))
+
+    model     = _model() if jobs else None
+    desc_sims = model.description_sims(jobs, profile['rec_text']) if model else np.zeros(len(jobs))
+    distances = _distances(candidate.lat, candidate.lng, [j.lat for j in jobs], [j.lng for j in jobs])
+
+    # skill overlap with every job in one sparse pass; only jobs sharing a skill get scored
+    shared, coverage, req_coverage = _skill_matrix().overlap(jobs, profile['skills'])
+    scores = np.full(len(jobs), -np.inf)
+    for i in np.flatnonzero(shared):
+        scores[i] = composite_score(
+            profile, jobs[i], coverage[i], req_coverage[i], float(desc_sims[i]), distances[i],
+        )
+    best = top_k(scores, TOP_N, ids=[j.job_id for j in jobs])
+
+    now  = timezone.now()
+    rows = [
+        JobRecommendation(
+            candidate_id=candidate_id, job_id=jobs[i].job_id, score=float(scores[i]),
+            matched_skills=matched_skills(profile, jobs[i]), distance_km=distances[i], scored_at=now,
+        )
+        for i in best
+    ]
+    with transaction.atomic():
+        JobRecommendation.objects.filter(candidate_id=candidate_id).delete()
+        JobRecommendation.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def refresh_job(job_id):
+    """
+    Rescore one job against every premium candidate and fold it into their
+    lists: it enters when it beats a list's lowest score (evicting that
+    row if the list is full) and leaves when it no longer qualifies.
+    Returns the number of lists it is now on.
+    """
+    job = JobPost.objects.filter(pk=job_id, is_active=True).only(*JOB_FIELDS).first()
+    if job is None:
+        JobRecommendation.objects.filter(job_id=job_id).delete()
+        return 0
+
+    candidates = list(premium_candidates().select_related('cv__features'))
+    profiles   = [_profile(c) for c in candidates]
+    model      = _model() if candidates else None
+    texts      = [p['rec_text'] for p in profiles]
+    if isinstance(model, lsa_index.LsaIndex):
+        # indexed CVs are looked up, not re-embedded
+        desc_sims = model.candidate_sims([c.pk for c in candidates], texts, job.description or "")
+    elif model is not None:
+        desc_sims = model.text_sims(job.description or "", texts)
+    else:
+        desc_sims = np.zeros(len(candidates))
+    distances = _distances(job.lat, job.lng, [c.lat for c in candidates], [c.lng for c in candidates])
+
+    lists = {
+        row['candidate_id']: row
+        for row in JobRecommendation.objects
+        .filter(candidate__in=[c.pk for c in candidates])
+        .values('candidate_id')
+        .annotate(n=Count('id'), floor=Min('score'))
+    }
+    listed = set(JobRecommendation.objects.filter(job_id=job_id).values_list('candidate_id', flat=True))
+
+    now, keep, full = timezone.now(), [], []
+    for candidate, profile, desc_score, d in zip(candidates, profiles, desc_sims, distances):
+        cid    = candidate.pk
+        scored = score_job(profile, job, float(desc_score), d)
+        stats  = lists.get(cid, {'n': 0, 'floor': None})
+        if scored is not None and (cid in listed or stats['n'] < TOP_N or scored[0] > stats['floor']):
+            keep.append(JobRecommendation(
+                candidate_id=cid, job_id=job_id, score=scored[0],
+                matched_skills=scored[1], distance_km=d, scored_at=now,
+            ))
+            if cid not in listed and stats['n'] >= TOP_N:
+                full.append(cid)
+
+    with transaction.atomic():
+        # lists the job no longer qualifies for
+        JobRecommendation.objects.filter(job_id=job_id).exclude(
+            candidate_id__in=[r.candidate_id for r in keep]
+        ).delete()
+        JobRecommendation.objects.bulk_create(
+            keep, batch_size=500, update_conflicts=True, unique_fields=['candidate', 'job'],
+            update_fields=['score', 'matched_skills', 'distance_km', 'scored_at'],
+        )
+        for cid in full:
+            # the new job pushed the list past TOP_N: evict its lowest row
+            extra = (
+                JobRecommendation.objects.filter(candidate_id=cid)
+                .order_by('-score', 'job_id').values_list('pk', flat=True)[TOP_N:]
+            )
+            JobRecommendation.objects.filter(pk__in=list(extra)).delete()
+    return len(keep)
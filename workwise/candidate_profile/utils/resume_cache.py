@@ -0,0 +1,99 @@
+# candidate_profile/utils/resume_cache.py
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from candidate_profile.models import ResumeCache
+from utils.resume_parser import parse_resume
+from utils.text_extractor import extract_text_from_file
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def file_digest(path, chunk=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def text_digest(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def lookup(kind, digest):
+    """Cached entry for (kind, digest), marking it recently used; None on a miss."""
+    entry = ResumeCache.objects.filter(kind=kind, digest=digest).first()
+    if entry is not None:
+        ResumeCache.objects.filter(pk=entry.pk).update(used_at=timezone.now())
+    return entry
+
+
+def store(kind, digest, text='', data=None):
+    size = len(text.encode('utf-8')) + len(json.dumps(data).encode('utf-8'))
+    try:
+        with transaction.atomic():
+            ResumeCache.objects.update_or_create(
+                kind=kind, digest=digest,
+                defaults={'text': text, 'data': data, 'size': size, 'used_at': timezone.now()},
+            )
+    except IntegrityError:
+        # another worker stored the same content first
+        pass
+    evict()
+
+
+def evict(max_bytes=None):
+    """Drop least recently used entries until the table fits its byte budget."""
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'RESUME_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+    # one aggregate per store; the LRU walk only runs once the budget is exceeded
+    excess = (ResumeCache.objects.aggregate(total=Sum('size'))['total'] or 0) - max_bytes
+    if excess <= 0:
+        return 0
+
+    doomed = []
+    for pk, size in ResumeCache.objects.order_by('used_at', 'pk').values_list('pk', 'size').iterator():
+        if excess <= 0:
+            break
+        doomed.append(pk)
+        excess -= size
+    if doomed:
+        ResumeCache.objects.filter(pk__in=doomed).delete()
+    return len(doomed)
+
+
+def cached_parse(path, digest=None):
+    """
+    parse_resume(extract_text_from_file(path)), reusing earlier results for
+    the same file bytes or, failing that, the same extracted text.
+    """
+    digest = digest or file_digest(path)
+    hit = lookup('file_parse', digest)
+    if hit is not None:
+        return hit.data
+
+    hit = lookup('file_text', digest)
+    if hit is not None:
+        text = hit.text
+    else:
+        text = extract_text_from_file(path)
+        store('file_text', digest, text=text)
+
+    tdigest = text_digest(text)
+    hit = lookup('text_parse', tdigest)
+    if hit is not None:
+        result = hit.data
+    else:
+        result = parse_resume(text)
+        store('text_parse', tdigest, data=result)
+
+    store('file_parse', digest, data=result)
+    return result
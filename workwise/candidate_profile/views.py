@@ -8,27 +8,29 @@ from employer_profile.models import JobPost
 from .models import SavedJob
 from django.http import JsonResponse, HttpResponseForbidden
 from django.core.mail import send_mail
-from .models import JobApplication
+from .models import JobApplication, JobRecommendation
 from django.core.paginator import Paginator
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from utils.pagination import KeysetPaginator
+from utils.geo import RADIUS_CHOICES, parse_radius
+from utils.sqlite import retry_on_locked
 from datetime import timedelta
 from django.utils.timezone import now
 from .models               import CandidateCV, CandidatePremium
-from utils.text_extractor  import extract_text_from_file
-from utils.resume_parser   import parse_resume
+from .utils.cv_parsing     import queue_parse
+from .utils.dashboard_stats import candidate_stats
+from .utils.features       import refresh_features
 from django.contrib.auth.hashers import check_password, make_password
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
-import math
 import openai
 import traceback
-from openai import OpenAI
+from utils.resume_parser import openai_client
 openai.api_key = settings.OPENAI_API_KEY
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise  import cosine_similarity
-from rapidfuzz import fuzz
-
 
 INDUSTRIES = [
   'information_technology','management','business','finance','healthcare','education',
@@ -82,31 +84,9 @@ def dashboard(request):
         return redirect('authentication:login')
     candidate = get_object_or_404(Candidate, candidate_id=cid)
 
-    # — Summary counts —
-    total_apps      = candidate.applications.count()
-    pending_reviews = candidate.applications.filter(status='reviewing').count()
-    interviews      = candidate.applications.filter(status='interview').count()
-    offers          = candidate.applications.filter(status='offered').count()
-    saved_jobs      = candidate.saved_jobs.count()
-
-    # — Status distribution for pie chart —
-    statuses     = ['applied','reviewing','interview','offered','rejected']
-    status_labels = ['Applied','Reviewing','Interview','Offered','Rejected']
-    status_data   = [candidate.applications.filter(status=s).count() for s in statuses]
-
-    # — Activity over last 6 months for line chart —
-    now = timezone.now()
-    activity_labels = []
-    activity_data   = []
-    for i in reversed(range(6)):
-        m = now - relativedelta(months=i)
-        label = m.strftime('%b %Y')
-        cnt = candidate.applications.filter(
-            applied_at__year=m.year,
-            applied_at__month=m.month
-        ).count()
-        activity_labels.append(label)
-        activity_data.append(cnt)
+    # — Summary counts, status distribution and 6-month activity (cached) —
+    stats = candidate_stats(candidate.candidate_id)
+    now   = timezone.now()
 
     # — Upcoming interviews (next 5) —
     upcoming = candidate.applications.filter(
@@ -139,15 +119,15 @@ def dashboard(request):
     done_count = sum(1 for seg in segments if seg['done'])
     completeness = int(done_count / len(segments) * 100)
     return render(request, 'candidate_profile/dashboard.html', {
-        'total_apps': total_apps,
-        'pending_reviews': pending_reviews,
-        'interviews': interviews,
-        'offers': offers,
-        'saved_jobs': saved_jobs,
-        'status_labels_json': json.dumps(status_labels),
-        'status_data_json':   json.dumps(status_data),
-        'activity_labels_json': json.dumps(activity_labels),
-        'activity_data_json':   json.dumps(activity_data),
+        'total_apps': stats['total_apps'],
+        'pending_reviews': stats['pending_reviews'],
+        'interviews': stats['interviews'],
+        'offers': stats['offers'],
+        'saved_jobs': stats['saved_jobs'],
+        'status_labels_json': json.dumps(stats['status_labels']),
+        'status_data_json':   json.dumps(stats['status_data']),
+        'activity_labels_json': json.dumps(stats['activity_labels']),
+        'activity_data_json':   json.dumps(stats['activity_data']),
         'upcoming_interviews': upcoming,
         'profile_segments': segments,
         'profile_completeness': completeness,
@@ -265,6 +245,7 @@ def update_location(request):
 
 
 
+@retry_on_locked
 def save_job(request):
     if request.method != 'POST':
         return HttpResponseBadRequest()
@@ -312,12 +293,12 @@ def saved_jobs(request):
 
     # Apply sort
     if sort_order == 'oldest':
-        qs = qs.order_by('saved_at')
+        ordering = ['saved_at', 'id']
     else:  # newest
-        qs = qs.order_by('-saved_at')
+        ordering = ['-saved_at', '-id']
 
     # Paginate
-    page = Paginator(qs, 20).get_page(request.GET.get('page'))
+    page = KeysetPaginator(qs, ordering, 20).get_page(request.GET.get('cursor'))
 
     return render(request, 'candidate_profile/saved_jobs.html', {
         'page_obj':    page,
@@ -350,12 +331,12 @@ def applied_jobs(request):
 
     # — Apply sort —
     if sort_order == 'oldest':
-        qs = qs.order_by('applied_at')
+        ordering = ['applied_at', 'id']
     else:  
-        qs = qs.order_by('-applied_at')
+        ordering = ['-applied_at', '-id']
 
     # — Paginate (8 per page) —
-    page = Paginator(qs, 8).get_page(request.GET.get('page'))
+    page = KeysetPaginator(qs, ordering, 8).get_page(request.GET.get('cursor'))
 
     return render(request, 'candidate_profile/applied_jobs.html', {
         'applications':   page,
@@ -400,6 +381,7 @@ def application_detail(request, application_id):
 
 
 
+@retry_on_locked
 def upload_and_review_cv(request):
     cid = request.session.get('candidate_id')
     if not cid:
@@ -442,11 +424,14 @@ def upload_and_review_cv(request):
             except Exception:
                 data['projects'] = existing.get('projects', [])
 
-            cv_obj.parsed_data = data
+            cv_obj.parsed_data  = data
+            cv_obj.parse_status = 'idle'
+            cv_obj.parse_result = None
             cv_obj.save()
+            refresh_features(cv_obj)
             return redirect('candidate:upload_cv')
 
-        # UPLOAD & PARSE
+        # UPLOAD — parsing runs in the background, the page polls cv_parse_status
         f = request.FILES.get('cv_file')
         if not f:
             error = 'Please select a file.'
@@ -457,23 +442,43 @@ def upload_and_review_cv(request):
             elif f.size > 2*1024*1024:
                 error = 'File must be under 2MB.'
             else:
-                cv_obj.cv_file.save(f.name, f)
-                cv_obj.save()
-                text = extract_text_from_file(cv_obj.cv_file.path)
-                try:
-                    parsed = parse_resume(text)
+                upload = ContentFile(f.read(), name=f.name)
 
-                except Exception as e:
-                    traceback.print_exc()
-                    error = f"Parsing failed: {str(e)}"
+                def store_and_queue():
+                    # after commit, so a retried attempt never stores the upload twice
+                    cv_obj.cv_file.save(upload.name, upload)
+                    queue_parse(cv_obj)
+                transaction.on_commit(store_and_queue)
+                return redirect('candidate:upload_cv')
+
+    if cv_obj.parse_status == 'done':
+        parsed = cv_obj.parse_result
+    elif cv_obj.parse_status == 'failed' and not error:
+        error = cv_obj.parse_error
 
     return render(request, 'candidate_profile/upload_cv.html', {
-        'cv_obj': cv_obj,
-        'parsed': parsed,
-        'error':  error,
+        'cv_obj':  cv_obj,
+        'parsed':  parsed,
+        'parsing': cv_obj.parse_status in ('pending', 'processing'),
+        'error':   error,
     })
 
 
+def cv_parse_status(request):
+    cid = request.session.get('candidate_id')
+    if not cid:
+        return JsonResponse({'error': 'Login required'}, status=401)
+    cv = (
+        CandidateCV.objects
+        .filter(candidate_id=cid)
+        .values('parse_status', 'parse_error')
+        .first()
+    )
+    if cv is None:
+        return JsonResponse({'status': 'idle', 'error': ''})
+    return JsonResponse({'status': cv['parse_status'], 'error': cv['parse_error']})
+
+
 
 def clear_cv(request):
     cid = request.session.get('candidate_id')
@@ -536,7 +541,6 @@ def interview_list(request):
 
 
 
-client = OpenAI()
 def skill_gap(request):
     cid = request.session.get('candidate_id')
     if not cid:
@@ -594,7 +598,7 @@ Output JSON:
             
             try:
                 
-                resp = client.responses.create(model="gpt-4.1", input=prompt)
+                resp = openai_client().responses.create(model="gpt-4.1", input=prompt)
             except NameError:
                 resp = openai.ChatCompletion.create(
                     model="gpt-4o-mini",
@@ -652,16 +656,6 @@ Output JSON:
 
 
 
-def haversine(lat1, lon1, lat2, lon2):
-    # returns distance in km between two lat/lon
-    R = 6371.0
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) \
-        * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    return R * c
-
 def premium_recommendations(request):
     # — 1) Auth & Premium Check —
     cid = request.session.get('candidate_id')
@@ -675,147 +669,32 @@ def premium_recommendations(request):
             and premium_obj.subscription_end and premium_obj.subscription_end >= now):
         return redirect(reverse('candidate_profile:premium'))
 
-    # — 2) Candidate Data Extraction —
-    cv     = getattr(candidate, 'cv', None)
-    parsed = cv.parsed_data if cv and cv.parsed_data else {}
-    cand_skills  = set(parsed.get('skills', []))
-    cand_langs   = set(parsed.get('languages', []))
-    cand_title   = parsed.get('current_job_title','') or ''
-    cand_exp_yrs = parsed.get('experience_years', 0) or 0
-    cand_loc     = candidate.location or {}
-    clat, clng   = cand_loc.get('lat'), cand_loc.get('lng')
-
-    # — 3) Fetch Active Jobs —
-    jobs = list(JobPost.objects.filter(is_active=True)
-                .select_related('employer__company_profile'))
-
-    # — 4) Precompute Description Vectors (TF-IDF) —
-    docs = [job.description or "" for job in jobs]
-    cv_text = " ".join(filter(None, [
-      parsed.get('summary',''),
-      *parsed.get('experience',[]),
-      *parsed.get('education',[]),
-      *[p.get('description','') for p in parsed.get('projects',[])]
-    ]))
-    vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
-    tfidf_all  = vectorizer.fit_transform(docs + [cv_text])
-    job_vecs   = tfidf_all[:-1]
-    cv_vec     = tfidf_all[-1]
-
-    # — 5) Compute Distances & find max for normalization —
-    distances = []
-    for job in jobs:
-        jl = job.map_location or {}
-        if clat and clng and jl.get('lat') and jl.get('lng'):
-            distances.append(haversine(clat, clng, jl['lat'], jl['lng']))
-        else:
-            distances.append(None)
-    max_dist = max((d for d in distances if d is not None), default=1)
-
-    # — 6) Build Recommendation List with Feature Scores —
-    recs = []
-    for idx, job in enumerate(jobs):
-        # Skip if no skill overlap
-        reqs       = set(job.requirements or [])
-        prefs      = set(job.preferred_skills or [])
-        all_skills = reqs | prefs
-        shared     = cand_skills & all_skills
-        if not shared:
-            continue
-
-        # a) Skill Jaccard
-        skill_jacc = len(shared) / len(all_skills)
-
-        # b) Requirement-only Jaccard
-        req_jacc   = (len(cand_skills & reqs) / len(reqs)) if reqs else 0
-
-        # c) Industry / Department match
-        ind_score = 1 if parsed.get('industry') == job.industry else 0
-        dep_score = 1 if parsed.get('department') == job.department else 0
-
-        # d) Title fuzzy similarity
-        title_score = fuzz.token_set_ratio(cand_title, job.title) / 100
-
-        # e) Language overlap
-        langs = set(job.languages or [])
-        lang_score = len(cand_langs & langs) / len(langs) if langs else 0
-
-        # f) Description cosine similarity
-        desc_score = cosine_similarity(job_vecs[idx], cv_vec.reshape(1,-1))[0,0]
-
-        # g) Experience fit (safe)
-        exp_score = 0.5
-        min_exp, max_exp = job.experience_min, job.experience_max
-        if min_exp is not None and max_exp is not None:
-            if max_exp > min_exp:
-                if cand_exp_yrs < min_exp:
-                    exp_score = cand_exp_yrs / min_exp
-                elif cand_exp_yrs > max_exp:
-                    exp_score = 1.0
-                else:
-                    exp_score = (cand_exp_yrs - min_exp) / (max_exp - min_exp)
-            else:
-                exp_score = 1.0 if cand_exp_yrs >= min_exp else 0.0
-
-        # h) Intern penalty
-        pen = 0.5 if 'intern' in job.title.lower() and cand_exp_yrs >= 2 else 1.0
-
-        # i) Distance normalization
-        d = distances[idx]
-        dist_score = 1 - min(d/max_dist, 1) if d is not None else 0
-
-        # j) Composite weighted score
-        weights = {
-            'skill': 0.30,
-            'req':   0.20,
-            'desc':  0.15,
-            'ind':   0.10,
-            'dep':   0.05,
-            'title': 0.05,
-            'lang':  0.05,
-            'exp':   0.05,
-            'dist':  0.05,
-        }
-        composite = (
-            weights['skill'] * skill_jacc +
-            weights['req']   * req_jacc +
-            weights['desc']  * desc_score +
-            weights['ind']   * ind_score +
-            weights['dep']   * dep_score +
-            weights['title'] * title_score +
-            weights['lang']  * lang_score +
-            weights['exp']   * exp_score +
-            weights['dist']  * dist_score
-        ) * pen
-
-        recs.append({
-            'job':            job,
-            'score':          composite,
-            'matched_skills': sorted(shared),
-            'match_count':    len(shared),
-            'distance':       d,
-            'posted_at':      job.posted_at,
-        })
+    # — 2) Precomputed Recommendations (utils/recommendations.py keeps them fresh) —
+    recs   = (JobRecommendation.objects
+              .filter(candidate=candidate)
+              .select_related('job__employer__company_profile'))
+    clat   = candidate.lat
+    radius = parse_radius(request.GET.get('within')) if clat is not None else None
+    if radius:
+        recs = recs.filter(distance_km__lte=radius)
 
-    # — 7) Sort Based on User’s Choice —
+    # — 3) Sort Based on User’s Choice —
     sort = request.GET.get('sort', 'recommended')
     if sort == 'newest':
-        recs.sort(key=lambda x: x['posted_at'], reverse=True)
+        recs = recs.order_by('-job__posted_at', '-job_id')
     elif sort == 'oldest':
-        recs.sort(key=lambda x: x['posted_at'])
-    else: 
-        recs.sort(
-        key=lambda x: (
-            -x['score'],
-            x['distance'] if x['distance'] is not None else float('inf')
-        )
-    )
+        recs = recs.order_by('job__posted_at', 'job_id')
+    else:
+        recs = recs.order_by('-score', F('distance_km').asc(nulls_last=True), 'job_id')
 
-    # — 8) Paginate & Render —
+    # — 4) Paginate & Render —
     page = Paginator(recs, 12).get_page(request.GET.get('page'))
     return render(request, 'candidate_profile/premium_recommendations.html', {
         'recommendations': page,
         'current_sort':    sort,
+        'has_origin':      clat is not None,
+        'radius':          radius,
+        'radius_choices':  RADIUS_CHOICES,
     })
 
 
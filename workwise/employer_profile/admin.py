@@ -4,10 +4,11 @@ from .models import JobPost, CompanyProfile
 from django.utils.html import format_html
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import path, reverse
-from django.core.mail import send_mail
+from taskqueue.mail import queue_mass_mail
 from authentication.models import Employer
 from .models import CompanyProfile
 from .models import EmployerPremium
+from index import fulltext
 
 @admin.register(JobPost)
 class JobPostAdmin(admin.ModelAdmin):
@@ -25,6 +26,14 @@ class JobPostAdmin(admin.ModelAdmin):
     ordering = ('-posted_at',)
     readonly_fields = ('job_id', 'posted_at')
 
+    def get_search_results(self, request, queryset, search_term):
+        # title/description/department/company go through the FTS5 index
+        if not search_term or not fulltext.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        matched  = fulltext.filter_jobs(queryset, search_term)
+        by_email = queryset.filter(contact_email__icontains=search_term)
+        return matched | by_email, False
+
 
 
 @admin.register(EmployerPremium)
@@ -179,16 +188,13 @@ class CompanyProfileAdmin(admin.ModelAdmin):
         if request.method == 'POST':
             pks = request.POST.get('selected', '').split(',')
             msg = request.POST.get('message', '').strip()
-            count = 0
-            for prof in CompanyProfile.objects.filter(pk__in=pks):
-                send_mail(
-                    subject="Message from Admin",
-                    message=msg,
-                    from_email=None,  # DEFAULT_FROM_EMAIL
-                    recipient_list=[prof.employer.email],
-                )
-                count += 1
-            self.message_user(request, f"Sent email to {count} employer(s).")
+            emails = CompanyProfile.objects.filter(pk__in=pks).values_list('employer__email', flat=True)
+            # one outbox row each; the worker sends them over a single connection
+            queued = queue_mass_mail([
+                ("Message from Admin", msg, None, [email])  # None = DEFAULT_FROM_EMAIL
+                for email in emails
+            ])
+            self.message_user(request, f"Queued email to {len(queued)} employer(s).")
             return redirect(reverse('admin:employer_profile_companyprofile_changelist'))
 
         # GET => show the intermediate form
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from employer_profile.utils.job_tfidf import build_job_tfidf, model_path
+
+
+class Command(BaseCommand):
+    help = "Fit the shared job-description TF-IDF model and save it for the web workers."
+
+    def handle(self, *args, **options):
+        model = build_job_tfidf()
+        if model is None:
+            self.stdout.write(self.style.WARNING("No active job descriptions to index."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(model.job_ids)} job(s) into {model_path()}."
+        ))
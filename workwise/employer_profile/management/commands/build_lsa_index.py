@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from employer_profile.utils.lsa_index import build_lsa_index, model_path
+
+
+class Command(BaseCommand):
+    help = "Fit the LSA embedding of jobs and CVs for the web workers."
+
+    def handle(self, *args, **options):
+        index = build_lsa_index()
+        if index is None:
+            self.stdout.write(self.style.WARNING("Not enough job or CV text to index."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index.jobs.ids)} job(s) and {len(index.cvs.ids)} CV(s) "
+            f"in {index.svd.n_components} dimensions into {model_path()}."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from employer_profile.utils.skill_matrix import build_skill_matrix, model_path
+
+
+class Command(BaseCommand):
+    help = "Build the shared job skill matrix and save it for the web workers."
+
+    def handle(self, *args, **options):
+        matrix = build_skill_matrix()
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(matrix.job_ids)} job(s) over {len(matrix.vocab)} skill(s) into {model_path()}."
+        ))
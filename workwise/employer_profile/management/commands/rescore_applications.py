@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from employer_profile.models import JobPost
+from employer_profile.utils.ranking import rescore_job
+
+
+class Command(BaseCommand):
+    help = "Recompute the cached ranking score of every job application."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, help="Only rescore this job_id.")
+
+    def handle(self, *args, **options):
+        jobs = JobPost.objects.all()
+        if options['job']:
+            jobs = jobs.filter(job_id=options['job'])
+        count = 0
+        for job in jobs.iterator():
+            rescore_job(job)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rescored applications for {count} job(s)."))
@@ -1,8 +1,9 @@
 
 
 from django.db import models
-from django.db.models import Max
 from authentication.models import Employer
+from authentication.utils.ids import next_id
+from utils.geo import coords
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 
@@ -36,12 +37,15 @@ class JobPost(models.Model):
     full_location_address = models.CharField(max_length=255)
     description           = models.TextField()      
     map_location          = models.JSONField(null=True, blank=True)                  
+    # copied from map_location on save, for radius queries (utils/geo.py)
+    lat                   = models.FloatField(null=True, blank=True, editable=False)
+    lng                   = models.FloatField(null=True, blank=True, editable=False)
 
 
     def save(self, *args, **kwargs):
         if not self.job_id:
-            last = self.__class__.objects.aggregate(max_id=Max('job_id'))['max_id'] or 999
-            self.job_id = last + 1
+            self.job_id = next_id(self.__class__)
+        self.lat, self.lng = coords(self.map_location)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -51,6 +55,15 @@ class JobPost(models.Model):
         ordering = ['-posted_at']
         verbose_name = 'Job Post'
         verbose_name_plural = 'Job Posts'
+        indexes = [
+            # listed jobs newest first (job_list, explore_jobs, keyset on posted_at, job_id)
+            models.Index(
+                fields=['posted_at', 'job_id'],
+                condition=models.Q(is_active=True, admin_review=False),
+                name='job_listed_recent_idx',
+            ),
+            models.Index(fields=['lat', 'lng'], name='job_latlng_idx'),
+        ]
 
 
 
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from taskqueue.queue import enqueue
+from .models import JobPost
+from .utils import lsa_index
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def refresh_job_tfidf(sender, instance, **kwargs):
+    # one queued refit covers any number of job changes
+    enqueue('employer_profile.build_job_tfidf', key='build_job_tfidf')
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def refresh_skill_matrix(sender, instance, **kwargs):
+    enqueue('employer_profile.build_skill_matrix', key='build_skill_matrix')
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def refresh_lsa_index(sender, instance, **kwargs):
+    lsa_index.queue_rebuild()
+
+
+@receiver(post_save, sender=JobPost)
+def refresh_application_scores(sender, instance, created, **kwargs):
+    if not created:
+        enqueue('employer_profile.rescore_job', instance.pk, key=f'rescore_job:{instance.pk}')
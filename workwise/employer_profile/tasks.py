@@ -0,0 +1,33 @@
+from taskqueue.queue import task
+
+from .models import JobPost
+from .utils import job_tfidf, lsa_index, ranking, skill_matrix
+
+
+@task(timeout=900)
+def build_job_tfidf():
+    job_tfidf.build_job_tfidf()
+    ranking.queue_stale_rescores()
+
+
+@task(timeout=900)
+def build_skill_matrix():
+    skill_matrix.build_skill_matrix()
+
+
+@task(timeout=3600)
+def build_lsa_index():
+    lsa_index.build_lsa_index()
+    ranking.queue_stale_rescores()
+
+
+@task()
+def rescore_job(job_id):
+    job = JobPost.objects.filter(pk=job_id).first()
+    if job is not None:
+        ranking.rescore_job(job)
+
+
+@task()
+def rescore_candidate(candidate_id):
+    ranking.rescore_candidate(candidate_id)
@@ -1,3 +1,432 @@
-from django.test import TestCase
+import random
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from candidate_profile.models import CandidateCV, JobApplication
+from candidate_profile.utils.features import norm_items, refresh_features
+from index.rollups import rebuild_rollups
+from taskqueue.models import Task
+from utils.testing import drop_queued_tasks, isolate_models_dir, make_candidate, make_employer, make_job
+from . import tasks
+from .models import JobPost
+from .utils import lsa_index, ranking
+from .utils.dashboard_stats import compute_employer_stats, employer_stats, month_starts
+from .utils.job_tfidf import build_job_tfidf, load_job_tfidf
+from .utils.lsa_index import build_lsa_index, load_lsa_index
+from .utils.skill_matrix import build_skill_matrix, load_skill_matrix
+
+
+SKILLS = ['Python', 'django', 'SQL', 'react', 'Docker', 'aws', 'Excel', 'java', 'Go', 'kubernetes']
+LANGS  = ['English', 'nepali', 'Hindi', 'french']
+CERTS  = ['AWS Certified', 'PMP', 'CCNA', 'scrum master']
+EDU    = ['Bachelor', 'master', 'PhD', 'High School', 'diploma']
+
+
+def random_cv(rng):
+    pd = {
+        'summary':        rng.choice(['', 'Backend engineer who loves python', 'Data analyst']),
+        'skills':         rng.sample(SKILLS, rng.randint(0, 6)),
+        'languages':      rng.sample(LANGS, rng.randint(0, 3)),
+        'certifications': rng.sample(CERTS, rng.randint(0, 2)),
+        'education':      rng.sample(EDU, rng.randint(0, 2)),
+        'experience':     rng.sample(['Built APIs', 'Ran ETL jobs', 'Led a team'], rng.randint(0, 2)),
+        'experience_years': rng.choice([0, 1, 2.5, 4, 7, '3', 'n/a', None]),
+        'projects': [
+            {'name': rng.choice(['Job portal', 'Chat app', '']), 'description': rng.choice(['django and sql', None])}
+            for _ in range(rng.randint(0, 3))
+        ],
+    }
+    if rng.random() < 0.7:
+        pd['map_location'] = {'lat': 27 + rng.random() * 2, 'lng': 84 + rng.random() * 3}
+    return pd
+
+
+def parsed_map(applications):
+    return dict(
+        CandidateCV.objects
+        .filter(candidate_id__in=[a.candidate_id for a in applications])
+        .values_list('candidate_id', 'parsed_data')
+    )
+
+
+def legacy_rank(job, applications, cv_map):
+    """The per-application scoring loop the batch engine replaced."""
+    job_reqs    = job.requirements or []
+    pref_skills = job.preferred_skills or []
+    core_pool   = list(set(job_reqs) | set(pref_skills))
+    jt          = ranking.job_text(job)
+    text_sims   = ranking._compute_text_sims(
+        jt, [ranking.cv_text(cv_map.get(app.candidate_id, {})) for app in applications]
+    )
+
+    scored = []
+    for idx, app in enumerate(applications):
+        pd    = cv_map.get(app.candidate_id, {})
+        cs    = pd.get('skills', [])
+        ced   = pd.get('education', [])
+        certs = pd.get('certifications', [])
+        try:
+            dist  = ranking.haversine(job.map_location or {}, pd.get('map_location') or {})
+            s_geo = max(0.0, 1 - dist / ranking.D_MAX)
+        except Exception:
+            s_geo = 0.0
+        comps = [
+            ranking._skill_score(cs + ced + certs, job_reqs),
+            ranking._skill_score(cs, pref_skills),
+            ranking._skill_score(cs, core_pool),
+            ranking._exp_score(pd.get('experience_years', 0), job.experience_min, job.experience_max),
+            ranking._edu_score(ced, job.experience_level),
+            ranking._cert_score(certs, job_reqs),
+            ranking._lang_score(pd.get('languages', []), job.languages or []),
+            ranking._proj_score(pd.get('projects', []), jt),
+            text_sims[idx],
+            s_geo,
+        ]
+        final = sum(w * c for w, c in zip(ranking.WEIGHTS, comps))
+        scored.append((final, comps, app))
+    return scored
+
+
+class BatchRankingParityTests(TestCase):
+
+    def setUp(self):
+        isolate_models_dir(self)
+        self.employer = make_employer()
+        self.job = make_job(self.employer)
+        rng = random.Random(42)
+        base = timezone.now()
+        self.apps = []
+        for i in range(60):
+            cand = make_candidate(str(i))
+            if i % 10:
+                CandidateCV.objects.create(candidate=cand, cv_file='cvs/cv.pdf', parsed_data=random_cv(rng))
+            self.apps.append(JobApplication.objects.create(
+                candidate=cand, job=self.job, cover_letter='applications/cover_letters/c.pdf',
+                applied_at=base - timedelta(hours=i % 7),
+            ))
+
+    def test_components_match_scalar_scorers(self):
+        cv_map   = parsed_map(self.apps)
+        features = [ranking.cv_features(cv_map.get(a.candidate_id)) for a in self.apps]
+        comps    = ranking.score_components(self.job, features)
+        for row, (_, expected, _) in zip(comps, legacy_rank(self.job, self.apps, cv_map)):
+            for got, want in zip(row, expected):
+                self.assertAlmostEqual(got, want, places=9)
+
+    def test_same_ordering_as_scalar_scorer(self):
+        cv_map = parsed_map(self.apps)
+        legacy = legacy_rank(self.job, self.apps, cv_map)
+        legacy.sort(key=lambda x: (x[0], x[2].applied_at), reverse=True)
+
+        ranked = ranking.rank_applications(self.job, self.apps)
+        self.assertEqual([a.pk for a in ranked], [a.pk for _, _, a in legacy])
+
+    def test_stored_features_rank_like_parsed_json(self):
+        before = [a.pk for a in ranking.rank_applications(self.job, self.apps)]
+        for cv in CandidateCV.objects.all():
+            refresh_features(cv)
+        after = [a.pk for a in ranking.rank_applications(self.job, self.apps)]
+        self.assertEqual(before, after)
+
+    def test_cached_scores_order_like_rank_applications(self):
+        build_job_tfidf()
+        ranking.rescore_job(self.job)
+        ranked = [a.pk for a in ranking.rank_applications(self.job, self.apps)]
+        cached = list(
+            self.job.applications
+            .order_by(F('rank_score').desc(nulls_last=True), '-applied_at')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(ranked, cached)
+
+    def test_rebuild_queues_rescore_of_scores_from_another_model(self):
+        ranking.rescore_job(self.job)
+        self.assertEqual(set(self.job.applications.values_list('rank_model', flat=True)), {ranking.BATCH_STAMP})
+        drop_queued_tasks()
+
+        tasks.build_job_tfidf()
+        self.assertEqual(
+            list(Task.objects.values_list('name', 'key')),
+            [('employer_profile.rescore_job', f'rescore_job:{self.job.pk}')],
+        )
+        ranking.rescore_job(self.job)
+        stamp = load_job_tfidf().stamp
+        self.assertEqual(set(self.job.applications.values_list('rank_model', flat=True)), {stamp})
+
+        # nothing scored in another model: a rebuild with no change of model queues nothing
+        drop_queued_tasks()
+        ranking.queue_stale_rescores()
+        self.assertFalse(Task.objects.exists())
+
+    def test_job_without_location_or_terms(self):
+        job = make_job(self.employer, requirements=[], preferred_skills=[], languages=[], map_location=None)
+        ranked = ranking.rank_applications(job, self.apps)
+        self.assertEqual(len(ranked), len(self.apps))
+
+
+class JobTfidfModelTests(TestCase):
+
+    def setUp(self):
+        isolate_models_dir(self)
+        employer = make_employer()
+        self.jobs = [
+            make_job(employer, description='python django developer building web apis'),
+            make_job(employer, description='registered nurse for the night shift ward'),
+            make_job(employer, description='accountant handling audits and payroll'),
+        ]
+
+    def test_not_built(self):
+        self.assertIsNone(load_job_tfidf())
+
+    def test_loaded_memory_mapped_and_scores_descriptions(self):
+        build_job_tfidf()
+        model = load_job_tfidf()
+        self.assertIsInstance(model.matrix.data, np.memmap)
+
+        sims = model.description_sims(self.jobs, 'senior python developer')
+        self.assertEqual(int(np.argmax(sims)), 0)
+        self.assertEqual(sims[1], 0.0)
+
+    def test_jobs_posted_after_build_are_scored(self):
+        build_job_tfidf()
+        late = make_job(self.jobs[0].employer, description='django python backend role')
+        sims = load_job_tfidf().description_sims([late], 'python django')
+        self.assertGreater(sims[0], 0.0)
+
+
+class SkillMatrixTests(TestCase):
+
+    def setUp(self):
+        isolate_models_dir(self)
+        rng = random.Random(11)
+        self.employer = make_employer()
+        self.jobs = [
+            make_job(self.employer,
+                     requirements=rng.sample(SKILLS, rng.randint(0, 4)),
+                     preferred_skills=rng.sample(SKILLS, rng.randint(0, 3)))
+            for _ in range(30)
+        ]
+
+    def set_overlap(self, skills, job):
+        reqs  = set(norm_items(job.requirements))
+        every = reqs | set(norm_items(job.preferred_skills))
+        return (
+            len(skills & every),
+            len(skills & every) / len(every) if every else 0.0,
+            len(skills & reqs) / len(reqs) if reqs else 0.0,
+        )
+
+    def test_overlap_matches_set_arithmetic(self):
+        build_skill_matrix()
+        matrix = load_skill_matrix()
+        self.assertIsInstance(matrix.req.indices, np.memmap)
+
+        late = make_job(self.employer, requirements=['Python', 'Rust'], preferred_skills=['SQL'])
+        jobs = self.jobs + [late]
+        for skills in ({'python', 'sql'}, {'excel', 'go', 'cobol'}, set()):
+            got = np.column_stack(matrix.overlap(jobs, skills))
+            for job, row in zip(jobs, got):
+                with self.subTest(skills=skills, job=job.pk):
+                    self.assertEqual(tuple(row), self.set_overlap(skills, job))
+
+    def test_edited_jobs_skip_their_stale_rows(self):
+        matrix = build_skill_matrix()
+        job    = self.jobs[0]
+        job.requirements, job.preferred_skills = ['Python', 'Cobol'], ['Go']
+        job.save()
+        job.refresh_from_db()
+
+        row = np.column_stack(matrix.overlap([job], {'python', 'go'}))[0]
+        self.assertEqual(tuple(row), self.set_overlap({'python', 'go'}, job))
+
+    def test_empty_build(self):
+        JobPost.objects.all().delete()
+        matrix = build_skill_matrix()
+        self.assertEqual(matrix.skills.shape, (0, 0))
+        # every job now counts as posted after the build
+        row = np.column_stack(matrix.overlap(self.jobs[:1], {'python'}))[0]
+        self.assertEqual(tuple(row), self.set_overlap({'python'}, self.jobs[0]))
+
+
+TOPICS = {
+    'dev':     'python django api backend database sql docker deploy server code',
+    'nurse':   'patient ward clinical care shift medication hospital nursing triage',
+    'finance': 'audit payroll ledger tax accounts invoice reconciliation budget balance',
+    'design':  'figma layout typography brand visual illustration mockup colour print',
+}
+
+
+def topic_text(rng, topic):
+    return ' '.join(rng.choices(TOPICS[topic].split(), k=12))
+
+
+class LsaIndexTests(TestCase):
+
+    def setUp(self):
+        isolate_models_dir(self)
+        rng = random.Random(5)
+        employer = make_employer()
+        self.topics = {}
+        for i in range(120):
+            topic = list(TOPICS)[i % 4]
+            job   = make_job(employer, description=topic_text(rng, topic))
+            self.topics[job.pk] = topic
+        self.cvs = {}
+        for i in range(40):
+            cand = make_candidate(str(i))
+            cv   = CandidateCV.objects.create(candidate=cand, cv_file='cvs/cv.pdf', parsed_data={
+                'summary': topic_text(rng, list(TOPICS)[i % 4]),
+            })
+            refresh_features(cv)
+            self.cvs[cand.pk] = list(TOPICS)[i % 4]
+        self.index = build_lsa_index()
+        drop_queued_tasks()
+
+    def test_not_built(self):
+        JobPost.objects.all().delete()
+        CandidateCV.objects.all().delete()
+        self.assertIsNone(build_lsa_index())
+        self.assertIsNone(load_lsa_index())
+
+    def test_loaded_as_float32_memmap(self):
+        index = load_lsa_index()
+        self.assertIsInstance(index.jobs.vecs, np.memmap)
+        self.assertEqual(index.jobs.vecs.dtype, np.float32)
+        self.assertEqual(index.jobs.vecs.shape, (120, index.svd.n_components))
+        self.assertEqual(len(index.cvs.ids), 40)
+
+    def test_indexed_cvs_are_looked_up(self):
+        index = load_lsa_index()
+        ids   = list(self.cvs)
+        texts = list(CandidateCV.objects.filter(candidate_id__in=ids).order_by('candidate_id')
+                      .values_list('features__rec_text', flat=True))
+        with mock.patch.object(index, 'embed', wraps=index.embed) as embed:
+            sims = index.candidate_sims(ids, texts, TOPICS['nurse'])
+        embed.assert_called_once()   # the query only
+        self.assertEqual([self.cvs[c] == 'nurse' for c in ids], [s > 0.5 for s in sims])
+
+    def test_scores_feed_the_text_components(self):
+        index = load_lsa_index()
+        jobs  = list(JobPost.objects.order_by('job_id')[:8])
+        late  = make_job(jobs[0].employer, description=TOPICS['dev'])
+        sims  = index.description_sims(jobs + [late], TOPICS['dev'])
+        self.assertTrue(np.all((sims >= 0) & (sims <= 1)))
+        self.assertGreater(sims[-1], 0.9)   # posted after the build, embedded on the fly
+        self.assertEqual(
+            [self.topics[j.pk] == 'dev' for j in jobs],
+            [s > 0.5 for s in sims[:-1]],
+        )
+
+        # ranking picks the index up as its text component
+        app = JobApplication.objects.create(candidate_id=next(iter(self.cvs)), job=late,
+                                            cover_letter='applications/cover_letters/c.pdf')
+        comps, _, _ = ranking._score(late, [app])
+        texts = [ranking.load_ranking_features([app.candidate_id])[app.candidate_id]['text']]
+        self.assertAlmostEqual(comps[0, 8], index.text_sims(ranking.job_text(late), texts)[0], places=6)
+
+    def retopic(self, topic, n=1):
+        """Rewrite the CVs of `n` candidates of other topics to `topic`; returns their ids."""
+        rng = random.Random(3)
+        ids = [cid for cid, t in self.cvs.items() if t != topic][:n]
+        for cid in ids:
+            cv = CandidateCV.objects.get(candidate_id=cid)
+            cv.parsed_data = {'summary': topic_text(rng, topic)}
+            cv.save()
+            refresh_features(cv)
+        return ids
+
+    def test_edited_cvs_are_projected_until_the_refit(self):
+        cid   = self.retopic('dev')[0]
+        index = load_lsa_index()
+        text  = CandidateCV.objects.get(candidate_id=cid).features.rec_text
+        sims  = index.candidate_sims([cid], [text], TOPICS['dev'])
+
+        stored = index.cvs.vecs[index.cvs.rows[cid]] @ index.embed([TOPICS['dev']])[0]
+        self.assertLess(stored, 0.5)
+        self.assertAlmostEqual(sims[0], index.text_sims(TOPICS['dev'], [text])[0], places=6)
+        self.assertFalse(Task.objects.filter(key='build_lsa_index').exists())
+
+    @mock.patch.object(lsa_index, 'REFIT_MIN', 0)
+    def test_refit_queued_once_a_share_of_cvs_change(self):
+        self.retopic('dev', n=3)
+        self.assertFalse(Task.objects.filter(key='build_lsa_index').exists())
+        self.retopic('design', n=1)   # the 4th of 40 CVs
+        self.assertTrue(Task.objects.filter(key='build_lsa_index', status='queued').exists())
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        isolate_models_dir(self)
+        self.employer = make_employer()
+        other         = make_employer('Other')
+        jobs = [
+            make_job(self.employer),
+            make_job(self.employer, admin_review=False),
+            make_job(self.employer, admin_review=False, is_active=False),
+            make_job(other),
+        ]
+        now = timezone.now()
+        statuses = ['applied', 'reviewing', 'interview', 'offered', 'rejected']
+        for i in range(30):
+            cand = make_candidate(str(i))
+            JobApplication.objects.create(
+                candidate=cand, job=jobs[i % 4], status=statuses[i % 5],
+                cover_letter='applications/cover_letters/c.pdf',
+                applied_at=now - timedelta(days=17 * i),
+            )
+        rebuild_rollups()
+        drop_queued_tasks()
+
+    def per_query_counts(self):
+        """What the dashboard computed with one COUNT per number."""
+        posts = self.employer.job_posts
+        apps  = JobApplication.objects.filter(job__employer=self.employer)
+        months = [timezone.now() - relativedelta(months=i) for i in reversed(range(6))]
+        return {
+            'total_posts':   posts.count(),
+            'active_posts':  posts.filter(is_active=True, admin_review=False).count(),
+            'pending_posts': posts.filter(admin_review=True).count(),
+            'closed_posts':  posts.filter(is_active=False).count(),
+            'total_apps':    apps.count(),
+            'status_data':   [apps.filter(status=s).count()
+                              for s in ['applied', 'reviewing', 'interview', 'offered', 'rejected']],
+            'activity_data': [apps.filter(applied_at__year=m.year, applied_at__month=m.month).count()
+                              for m in months],
+        }
+
+    def test_matches_per_query_counts(self):
+        with self.assertNumQueries(3):
+            stats = compute_employer_stats(self.employer.employer_id)
+        for key, value in self.per_query_counts().items():
+            self.assertEqual(stats[key], value, key)
+        self.assertEqual(sum(stats['top_jobs_data']), stats['total_apps'])
+
+    def test_month_starts(self):
+        now = datetime(2025, 3, 15, 10, 30)
+        self.assertEqual(month_starts(now, 3), [datetime(2025, 1, 1), datetime(2025, 2, 1), datetime(2025, 3, 1)])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_cache_invalidated_by_application_and_post_changes(self):
+        eid = self.employer.employer_id
+        before = employer_stats(eid)
+        with self.assertNumQueries(0):
+            employer_stats(eid)
+
+        app = JobApplication.objects.filter(job__employer_id=eid, status='applied').first()
+        app.status = 'offered'
+        with self.captureOnCommitCallbacks(execute=True):
+            app.save()
+        self.assertEqual(employer_stats(eid)['offers_ext'], before['offers_ext'] + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.employer)
+        self.assertEqual(employer_stats(eid)['total_posts'], before['total_posts'] + 1)
@@ -0,0 +1,87 @@
+# employer_profile/utils/dashboard_stats.py
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from dateutil.relativedelta import relativedelta
+
+from employer_profile.models import JobPost
+from index.models import EmployerDailyStats
+from utils.cache import get_or_compute
+
+STATUSES      = ['applied', 'reviewing', 'interview', 'offered', 'rejected']
+STATUS_LABELS = ['Applied', 'Reviewing', 'Interview', 'Offered', 'Rejected']
+
+SUMMED = ['posts', 'posts_active', 'posts_pending', 'posts_closed', 'applications', *STATUSES]
+
+CACHE_TTL = 60   # seconds; rollup refreshes invalidate sooner
+
+
+def cache_key(employer_id):
+    return f"employer_dashboard:{employer_id}"
+
+
+def month_starts(now, months=6):
+    """First instant of each of the last `months` calendar months, oldest first."""
+    this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return [this_month - relativedelta(months=i) for i in reversed(range(months))]
+
+
+def compute_employer_stats(employer_id, now=None):
+    """
+    Every dashboard number for one employer, summed from the employer's
+    daily rollup rows (index.EmployerDailyStats) rather than raw posts
+    and applications: one aggregate for the cards and status split, one
+    month GROUP BY for the activity chart, plus the top-jobs query.
+    """
+    now  = now or timezone.now()
+    rows = EmployerDailyStats.objects.filter(employer_id=employer_id)
+
+    c = {
+        k: v or 0
+        for k, v in rows.aggregate(**{f: Sum(f) for f in SUMMED}).items()
+    }
+
+    months    = month_starts(now)
+    per_month = dict(
+        rows
+        .filter(day__gte=months[0].date())
+        .annotate(month=TruncMonth('day'))
+        .values('month')
+        .annotate(n=Sum('applications'))
+        .values_list('month', 'n')
+    )
+
+    top_jobs = list(
+        JobPost.objects
+        .filter(employer_id=employer_id)
+        .annotate(app_count=Count('applications'))
+        .order_by('-app_count')
+        .values_list('title', 'app_count')[:5]
+    )
+
+    return {
+        'total_posts':     c['posts'],
+        'active_posts':    c['posts_active'],
+        'pending_posts':   c['posts_pending'],
+        'closed_posts':    c['posts_closed'],
+        'total_apps':      c['applications'],
+        'interviews_sch':  c['interview'],
+        'offers_ext':      c['offered'],
+        'status_labels':   STATUS_LABELS,
+        'status_data':     [c[s] for s in STATUSES],
+        'activity_labels': [m.strftime('%b %Y') for m in months],
+        'activity_data':   [per_month.get(m.date(), 0) for m in months],
+        'top_jobs_labels': [title for title, _ in top_jobs],
+        'top_jobs_data':   [n for _, n in top_jobs],
+    }
+
+
+def employer_stats(employer_id):
+    """Cached compute_employer_stats(); see invalidate_employer_stats()."""
+    return get_or_compute(cache_key(employer_id), lambda: compute_employer_stats(employer_id), CACHE_TTL)
+
+
+def invalidate_employer_stats(employer_id):
+    cache.delete(cache_key(employer_id))
@@ -0,0 +1,110 @@
+# employer_profile/utils/job_tfidf.py
+
+import os
+import threading
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from employer_profile.models import JobPost
+
+MODEL_FILE = 'job_tfidf.joblib'
+
+_lock  = threading.Lock()
+_cache = {'key': None, 'model': None}
+
+
+def model_path():
+    return os.path.join(settings.ML_MODELS_DIR, MODEL_FILE)
+
+
+class JobTfidfModel:
+    """TF-IDF vectorizer fitted on active job descriptions plus their matrix."""
+
+    def __init__(self, vectorizer, job_ids, matrix, built_at):
+        self.vectorizer = vectorizer
+        self.job_ids    = job_ids
+        self.matrix     = matrix
+        self.built_at   = built_at
+        self.stamp      = f"tfidf:{built_at:%Y%m%d%H%M%S%f}"
+        self.rows       = {int(jid): i for i, jid in enumerate(job_ids)}
+
+    def description_sims(self, jobs, text):
+        """
+        Cosine similarity of `text` to each job's description. Jobs posted
+        since the last build are transformed on the fly.
+        """
+        vec  = self.vectorizer.transform([text])
+        sims = (self.matrix @ vec.T).toarray().ravel()
+
+        out, fresh = np.zeros(len(jobs)), []
+        for i, job in enumerate(jobs):
+            row = self.rows.get(job.job_id)
+            if row is None:
+                fresh.append(i)
+            else:
+                out[i] = sims[row]
+        if fresh:
+            docs = [jobs[i].description or "" for i in fresh]
+            out[fresh] = (self.vectorizer.transform(docs) @ vec.T).toarray().ravel()
+        return out
+
+    def text_sims(self, query, texts):
+        """Cosine similarity of `query` to each of `texts` in the shared space."""
+        if not texts:
+            return np.zeros(0)
+        q = self.vectorizer.transform([query])
+        return (self.vectorizer.transform(texts) @ q.T).toarray().ravel()
+
+
+def build_job_tfidf():
+    """Fit on every active job description and write the artifact atomically."""
+    rows = list(
+        JobPost.objects
+        .filter(is_active=True)
+        .order_by('job_id')
+        .values_list('job_id', 'description')
+    )
+    path = model_path()
+    try:
+        vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
+        matrix     = vectorizer.fit_transform([d or "" for _, d in rows]).tocsr()
+    except ValueError:
+        # no jobs, or nothing but stop words
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+
+    job_ids  = np.array([jid for jid, _ in rows], dtype=np.int64)
+    built_at = timezone.now()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({
+        'vectorizer': vectorizer, 'job_ids': job_ids, 'matrix': matrix, 'built_at': built_at,
+    }, tmp)
+    os.replace(tmp, path)
+    return JobTfidfModel(vectorizer, job_ids, matrix, built_at)
+
+
+def load_job_tfidf():
+    """
+    Memory-mapped model shared by every worker on the box; reloaded when
+    another process rebuilds the file. Returns None if it was never built.
+    """
+    path = model_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        if _cache['key'] != (path, mtime):
+            data = joblib.load(path, mmap_mode='r')
+            _cache['model'] = JobTfidfModel(
+                data['vectorizer'], data['job_ids'], data['matrix'], data['built_at'],
+            )
+            _cache['key']   = (path, mtime)
+        return _cache['model']
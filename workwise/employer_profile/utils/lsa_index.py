@@ -0,0 +1,218 @@
+# employer_profile/utils/lsa_index.py
+
+import os
+import threading
+import zlib
+from datetime import timedelta
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from candidate_profile.models import CandidateFeatures
+from employer_profile.models import JobPost
+from taskqueue.queue import enqueue
+
+MODEL_FILE = 'lsa_index.joblib'
+
+DIMS     = 128      # latent dimensions (fewer when the vocabulary is small)
+FEATURES = 50000    # TF-IDF vocabulary cap
+
+# rebuilds wait this long so a burst of job/CV edits shares one refit
+REBUILD_DELAY = timedelta(minutes=10)
+
+# edited CVs are projected onto the existing components until this many
+# (or this share of the indexed CVs) have changed since the build
+REFIT_MIN   = 20
+REFIT_SHARE = 0.1
+
+_lock  = threading.Lock()
+_cache = {'key': None, 'model': None}
+
+
+def model_path():
+    return os.path.join(settings.ML_MODELS_DIR, MODEL_FILE)
+
+
+def _unit(vecs):
+    """Rows scaled to unit length (all-zero rows stay zero), as float32."""
+    vecs  = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    return np.divide(vecs, norms, out=np.zeros_like(vecs), where=norms > 0)
+
+
+def text_stamp(text):
+    """Checksum of an indexed text; a stored vector whose stamp differs is stale."""
+    return zlib.crc32((text or "").encode())
+
+
+class Embeddings:
+    """One side of the index: a stored unit vector and text stamp per id."""
+
+    def __init__(self, ids, vecs, stamps):
+        self.ids    = ids
+        self.vecs   = vecs
+        self.stamps = stamps
+        self.rows   = {int(i): r for r, i in enumerate(ids)}
+
+    def sims(self, ids, stamps, query):
+        """
+        Exact cosine of `query` to the rows for `ids`, plus the positions
+        of ids not in the index or whose text's stamp changed since the
+        build (left at 0 for the caller to fill).
+        """
+        rows  = np.array([self._row(i, s) for i, s in zip(ids, stamps)], dtype=np.intp)
+        known = rows >= 0
+        out   = np.zeros(len(ids), np.float32)
+        if known.any():
+            out[known] = self.vecs[rows[known]] @ query
+        return out, np.flatnonzero(~known)
+
+    def _row(self, id, stamp):
+        row = self.rows.get(int(id), -1)
+        return row if row >= 0 and self.stamps[row] == stamp else -1
+
+
+class LsaIndex:
+    """
+    TF-IDF + TruncatedSVD embedding of job descriptions and CV texts, with
+    the vectors of every indexed job and CV stored for lookup by id.
+    """
+
+    def __init__(self, vectorizer, svd, jobs, cvs, built_at):
+        self.vectorizer = vectorizer
+        self.svd        = svd
+        self.jobs       = jobs
+        self.cvs        = cvs
+        self.built_at   = built_at
+        self.stamp      = f"lsa:{built_at:%Y%m%d%H%M%S%f}"
+
+    def embed(self, texts):
+        """Unit float32 latent vectors for raw texts."""
+        if not len(texts):
+            return np.zeros((0, self.svd.n_components), np.float32)
+        return _unit(self.svd.transform(self.vectorizer.transform([t or "" for t in texts])))
+
+    def description_sims(self, jobs, text):
+        """
+        Similarity of `text` to each job's description, clipped to [0, 1]
+        like TF-IDF cosine. Jobs posted or edited since the build are
+        embedded now.
+        """
+        query       = self.embed([text])[0]
+        stamps      = [text_stamp(job.description) for job in jobs]
+        sims, fresh = self.jobs.sims([job.job_id for job in jobs], stamps, query)
+        if len(fresh):
+            sims[fresh] = self.embed([jobs[i].description for i in fresh]) @ query
+        return np.clip(sims, 0.0, 1.0)
+
+    def candidate_sims(self, candidate_ids, texts, query_text):
+        """
+        Similarity of `query_text` to each candidate's CV; CVs unindexed or
+        changed since the build are projected from `texts` now.
+        """
+        query       = self.embed([query_text])[0]
+        sims, fresh = self.cvs.sims(candidate_ids, [text_stamp(t) for t in texts], query)
+        if len(fresh):
+            sims[fresh] = self.embed([texts[i] for i in fresh]) @ query
+        return np.clip(sims, 0.0, 1.0)
+
+    def text_sims(self, query, texts):
+        """Similarity of `query` to each of `texts`, both embedded now."""
+        if not len(texts):
+            return np.zeros(0)
+        return np.clip(self.embed(texts) @ self.embed([query])[0], 0.0, 1.0)
+
+
+def build_lsa_index():
+    """
+    Fit on every active job description and every CV's recommendation
+    text, then write the artifact atomically. Returns None (and removes
+    any old artifact) when there is too little text to factorise.
+    """
+    built_at = timezone.now()
+    jobs = list(
+        JobPost.objects.filter(is_active=True).order_by('job_id').values_list('job_id', 'description')
+    )
+    cvs  = list(
+        CandidateFeatures.objects.exclude(rec_text='')
+        .order_by('cv__candidate_id').values_list('cv__candidate_id', 'rec_text')
+    )
+    docs = [d or "" for _, d in jobs] + [t for _, t in cvs]
+    path = model_path()
+    try:
+        vectorizer = TfidfVectorizer(stop_words='english', max_features=FEATURES,
+                                     sublinear_tf=True, dtype=np.float32)
+        tfidf      = vectorizer.fit_transform(docs)
+        dims       = min(DIMS, tfidf.shape[1] - 1, tfidf.shape[0] - 1)
+        if dims < 2:
+            raise ValueError("too little text for a latent space")
+    except ValueError:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+
+    svd     = TruncatedSVD(n_components=dims, random_state=0).fit(tfidf)
+    vecs    = _unit(svd.transform(tfidf))
+    job_ids = np.array([jid for jid, _ in jobs], dtype=np.int64)
+    cv_ids  = np.array([cid for cid, _ in cvs], dtype=np.int64)
+    job_stamps = np.array([text_stamp(d) for _, d in jobs], dtype=np.int64)
+    cv_stamps  = np.array([text_stamp(t) for _, t in cvs], dtype=np.int64)
+    data    = {
+        'vectorizer': vectorizer,
+        'svd':        svd,
+        'built_at':   built_at,
+        'jobs':       {'ids': job_ids, 'vecs': vecs[:len(jobs)], 'stamps': job_stamps},
+        'cvs':        {'ids': cv_ids,  'vecs': vecs[len(jobs):], 'stamps': cv_stamps},
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(data, tmp)
+    os.replace(tmp, path)
+    return LsaIndex(vectorizer, svd, Embeddings(**data['jobs']), Embeddings(**data['cvs']), built_at)
+
+
+def queue_rebuild():
+    """Queue one delayed refit; further calls before it runs reuse it."""
+    enqueue('employer_profile.build_lsa_index', key='build_lsa_index',
+            run_at=timezone.now() + REBUILD_DELAY)
+
+
+def cv_changed():
+    """
+    A CV's features were saved. Scoring projects it onto the existing
+    components, so the refit is only queued once enough CVs have changed
+    since the build for the components themselves to drift.
+    """
+    index = load_lsa_index()
+    if index is None:
+        queue_rebuild()
+        return
+    changed = CandidateFeatures.objects.filter(updated_at__gte=index.built_at).count()
+    if changed >= max(REFIT_MIN, REFIT_SHARE * len(index.cvs.ids)):
+        queue_rebuild()
+
+
+def load_lsa_index():
+    """
+    Memory-mapped index shared by every worker on the box; reloaded when
+    another process rebuilds the file. Returns None if it was never built.
+    """
+    path = model_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        if _cache['key'] != (path, mtime):
+            data = joblib.load(path, mmap_mode='r')
+            _cache['model'] = LsaIndex(
+                data['vectorizer'], data['svd'], Embeddings(**data['jobs']), Embeddings(**data['cvs']),
+                data['built_at'],
+            )
+            _cache['key']   = (path, mtime)
+        return _cache['model']
@@ -3,11 +3,22 @@
 import datetime
 from math import radians, sin, cos, sqrt, atan2
 
-from rapidfuzz import fuzz
+import numpy as np
+from django.utils import timezone
+from rapidfuzz import fuzz, process
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 
-from candidate_profile.models import CandidateCV  # adjust import if needed
+from .job_tfidf import load_job_tfidf
+from .lsa_index import load_lsa_index
+from .skill_matrix import incidence, indicator
+from candidate_profile.models import JobApplication
+from taskqueue.queue import enqueue
+from candidate_profile.utils.features import (
+    EDU_LEVELS, cv_features, cv_text, load_ranking_features,
+    norm_items as _norm_items,
+)
+from utils.geo import coords, haversine_many
 
 # === WEIGHTS (no recency) ===
 W_REQ    = 0.20   # requirements match
@@ -23,13 +34,6 @@ W_GEO    = 0.05   # geographic proximity
 
 D_MAX = 200.0  # km for full geo score
 
-EDU_LEVELS = {
-    'high school': 1,
-    'bachelor':    2,
-    'master':      3,
-    'phd':         4
-}
-
 
 def haversine(loc1, loc2):
     """Return distance in km between two {'lat','lng'} dicts."""
@@ -105,113 +109,224 @@ def _proj_score(projects, job_text):
 
 
 def _compute_text_sims(job_text, cand_texts):
-    # filter out empties
-    corpus = [job_text] + [t for t in cand_texts if t]
-    if len(corpus) < 2:
-        return [0.0] * len(cand_texts)
-    vec   = TfidfVectorizer(stop_words='english').fit(corpus)
+    # only non-empty CV texts go into the corpus; empty ones score 0
+    sims = np.zeros(len(cand_texts))
+    idx  = [i for i, t in enumerate(cand_texts) if t]
+    if not idx:
+        return sims
+    corpus = [job_text] + [cand_texts[i] for i in idx]
+    try:
+        vec = TfidfVectorizer(stop_words='english').fit(corpus)
+    except ValueError:
+        # corpus made only of stop words
+        return sims
     tfidf = vec.transform(corpus)
-    job_vec = tfidf[0]
-    sims    = cosine_similarity(job_vec, tfidf[1:])[0]
-    # if some cand_texts were empty, pad with zeros
-    return list(sims) + [0.0] * (len(cand_texts) - len(sims))
+    sims[idx] = cosine_similarity(tfidf[0], tfidf[1:])[0]
+    return sims
 
 
-def rank_applications(job, applications):
-    """
-    Return applications sorted by our hybrid ranking.
-    """
+# === BATCH SCORING ENGINE ===
 
-    # 1) Load latest CV parsed_data for each candidate
-    ids = [app.candidate.candidate_id for app in applications]
-    cvs = CandidateCV.objects.filter(
-        candidate__candidate_id__in=ids
-    ).order_by('candidate__candidate_id', '-parsed_at')
+COMPONENTS = ('req', 'pref', 'core', 'exp', 'edu', 'cert', 'lang', 'proj', 'text', 'geo')
+WEIGHTS    = (W_REQ, W_PREF, W_CORE, W_EXP, W_EDU, W_CERT, W_LANG, W_PROJ, W_TEXT, W_GEO)
 
-    cv_map = {}
-    for cv in cvs:
-        cid = cv.candidate.candidate_id
-        if cid not in cv_map:
-            cv_map[cid] = cv.parsed_data or {}
 
-    # 2) Prepare job data
-    job_reqs    = job.requirements or []
-    pref_skills = job.preferred_skills or []
-    core_pool   = list(set(job_reqs) | set(pref_skills))
-    job_langs   = job.languages or []
-    job_loc     = job.map_location or {}
-    jt_parts    = [
+def job_text(job):
+    """Text blob of a job used for the TF-IDF and project components."""
+    jt_parts = [
         str(job.title or ''),
         str(job.description or ''),
-        *[str(r) for r in job_reqs],
-        *[str(s) for s in pref_skills],
-        *[str(l) for l in job_langs],
+        *[str(r) for r in (job.requirements or [])],
+        *[str(s) for s in (job.preferred_skills or [])],
+        *[str(l) for l in (job.languages or [])],
     ]
-    job_text = " ".join([p for p in jt_parts if p]).lower()
-
-    # 3) Build CV text blobs
-    cand_texts = []
-    for app in applications:
-        pd = cv_map.get(app.candidate.candidate_id, {})
-        parts = [
-            str(pd.get('summary','') or ''),
-            " ".join([str(e) for e in (pd.get('experience') or []) if e]),
-            " ".join([str(s) for s in (pd.get('skills') or [])     if s]),
-            " ".join([str(c) for c in (pd.get('certifications') or []) if c]),
-        ]
-        txt = " ".join([p for p in parts if p]).lower()
-        cand_texts.append(txt)
-
-    text_sims = _compute_text_sims(job_text, cand_texts)
-
-    # 4) Score each application
-    scored = []
-    for idx, app in enumerate(applications):
-        pd    = cv_map.get(app.candidate.candidate_id, {})
-
-        cs    = pd.get('skills', [])
-        ce    = pd.get('experience_years', 0)
-        ced   = pd.get('education', [])
-        certs = pd.get('certifications', [])
-        langs = pd.get('languages', [])
-        projs = pd.get('projects', [])
-        # pd.get('map_location') might also drive geo if available
-
-        s_req  = _skill_score(cs + ced + certs, job_reqs)
-        s_pref = _skill_score(cs, pref_skills)
-        s_core = _skill_score(cs, core_pool)
-        s_exp  = _exp_score(ce, job.experience_min, job.experience_max)
-        s_edu  = _edu_score(ced, job.experience_level)
-        s_cert = _cert_score(certs, job_reqs)
-        s_lang = _lang_score(langs, job_langs)
-        s_proj = _proj_score(projs, job_text)
-        s_text = text_sims[idx]
-
-        # Geo
-        try:
-            dist  = haversine(job_loc, pd.get('map_location') or {})
-            s_geo = max(0.0, 1 - dist / D_MAX)
-        except:
-            s_geo = 0.0
-
-        final = (
-            W_REQ   * s_req  +
-            W_PREF  * s_pref +
-            W_CORE  * s_core +
-            W_EXP   * s_exp  +
-            W_EDU   * s_edu  +
-            W_CERT  * s_cert +
-            W_LANG  * s_lang +
-            W_PROJ  * s_proj +
-            W_TEXT  * s_text +
-            W_GEO   * s_geo
-        )
-
-        scored.append((final, app))
-        for final, app in scored:
-             print(app.candidate.email, round(final,3))
-
-    # 5) Sort by descending score, tie-break newest
-    scored.sort(key=lambda x: (x[0], x[1].applied_at), reverse=True)
+    return " ".join([p for p in jt_parts if p]).lower()
+
+
+def score_components(job, features, text_sims=None):
+    """
+    Score every candidate against one job in a single pass.
+
+    `features` is a list of cv_features() dicts. Returns an (n, 10) array
+    whose columns follow COMPONENTS.
+    """
+    n = len(features)
+    comps = np.zeros((n, len(COMPONENTS)))
+    if not n:
+        return comps
+
+    job_reqs    = job.requirements or []
+    pref_skills = job.preferred_skills or []
+    core_pool   = list(set(job_reqs) | set(pref_skills))
+    jt          = job_text(job)
+
+    reqs  = _norm_items(job_reqs)
+    prefs = _norm_items(pref_skills)
+    core  = _norm_items(core_pool)
+    langs = _norm_items(job.languages)
+
+    vocab = {}
+    for t in reqs + prefs + core + langs:
+        vocab.setdefault(t, len(vocab))
+
+    skill_m = incidence([f['skills']   for f in features], vocab)
+    pool_m  = incidence([f['req_pool'] for f in features], vocab)
+    cert_m  = incidence([f['certs']    for f in features], vocab)
+    lang_m  = incidence([f['langs']    for f in features], vocab)
+
+    def coverage(matrix, terms):
+        if not terms:
+            return np.zeros(n)
+        return (matrix @ indicator(terms, vocab)) / len(terms)
+
+    # skills / requirements / languages: share of job terms covered
+    comps[:, 0] = coverage(pool_m,  reqs)
+    comps[:, 1] = coverage(skill_m, prefs)
+    comps[:, 2] = coverage(skill_m, core)
+    comps[:, 6] = coverage(lang_m,  langs)
+
+    # certifications: share of the candidate's certs the job asks for
+    n_certs = np.array([len(f['certs']) for f in features], dtype=float)
+    cert_hits = cert_m @ indicator(reqs, vocab)
+    comps[:, 5] = np.divide(cert_hits, n_certs, out=np.zeros(n), where=n_certs > 0)
+
+    # experience
+    exp = np.array([np.nan if f['exp_years'] is None else f['exp_years'] for f in features])
+    exp_min, exp_max = job.experience_min, job.experience_max
+    diff = np.minimum(np.abs(exp - exp_min), np.abs(exp - exp_max))
+    s_exp = np.where((exp >= exp_min) & (exp <= exp_max), 1.0, np.maximum(0.0, 1 - diff/2))
+    comps[:, 3] = np.nan_to_num(s_exp, nan=0.0)
+
+    # education
+    job_lvl = EDU_LEVELS.get(str(job.experience_level or '').lower(), 0)
+    if job_lvl:
+        lvl = np.array([f['edu_level'] for f in features], dtype=float)
+        comps[:, 4] = np.where(lvl >= job_lvl, 1.0, lvl / job_lvl)
+
+    # projects: best fuzzy match of any project against the job text
+    owners, texts = [], []
+    for i, f in enumerate(features):
+        owners.extend([i] * len(f['projects']))
+        texts.extend(f['projects'])
+    if texts:
+        ratios = process.cdist(texts, [jt], scorer=fuzz.token_sort_ratio, dtype=np.float64)[:, 0]
+        np.maximum.at(comps[:, 7], np.array(owners), ratios / 100)
+
+    # TF-IDF similarity
+    if text_sims is None:
+        text_sims = _compute_text_sims(jt, [f['text'] for f in features])
+    comps[:, 8] = text_sims
+
+    # geo: missing coordinates count as D_MAX away
+    jlat, jlng = coords(job.map_location)
+    if jlat is not None:
+        lats = np.array([np.nan if f['lat'] is None else f['lat'] for f in features])
+        lngs = np.array([np.nan if f['lng'] is None else f['lng'] for f in features])
+        dist = np.nan_to_num(haversine_many(jlat, jlng, lats, lngs), nan=D_MAX)
+        comps[:, 9] = np.maximum(0.0, 1 - dist / D_MAX)
+
+    return comps
+
+
+def hybrid_scores(comps):
+    """Weighted sum of the component columns, added in COMPONENTS order."""
+    final = np.zeros(len(comps))
+    for col, w in enumerate(WEIGHTS):
+        final += w * comps[:, col]
+    return final
+
+
+BATCH_STAMP = 'batch'   # TF-IDF fitted on the scored batch itself
+
+
+def text_model():
+    """LSA or TF-IDF in the shared job space, or None until one has been built."""
+    return load_lsa_index() or load_job_tfidf()
+
+
+def model_stamp(model):
+    return BATCH_STAMP if model is None else model.stamp
+
+
+def _score(job, applications):
+    stored   = load_ranking_features([app.candidate_id for app in applications])
+    empty    = cv_features({})
+    features = [stored.get(app.candidate_id, empty) for app in applications]
+
+    model     = text_model()
+    text_sims = None
+    if model is not None:
+        text_sims = model.text_sims(job_text(job), [f['text'] for f in features])
+
+    comps = score_components(job, features, text_sims)
+    return comps, hybrid_scores(comps), model_stamp(model)
+
+
+def rank_applications(job, applications):
+    """
+    Return applications sorted by our hybrid ranking.
+    """
+    _, scores, _ = _score(job, applications)
+
+    # Sort by descending score, tie-break newest
+    scored = sorted(
+        zip(scores.tolist(), applications),
+        key=lambda x: (x[0], x[1].applied_at),
+        reverse=True,
+    )
     return [app for _, app in scored]
 
+
+def store_scores(job, applications):
+    """
+    Compute the hybrid score of each application and save it on the row,
+    stamped with the text model it was computed in.
+    """
+    if not applications:
+        return
+    comps, scores, stamp = _score(job, applications)
+    now = timezone.now()
+    for app, row, score in zip(applications, comps.tolist(), scores.tolist()):
+        app.rank_score      = score
+        app.rank_components = dict(zip(COMPONENTS, row))
+        app.ranked_at       = now
+        app.rank_model      = stamp
+    JobApplication.objects.bulk_update(
+        applications, ['rank_score', 'rank_components', 'ranked_at', 'rank_model'], batch_size=500
+    )
+
+
+def rescore_job(job, chunk=1000):
+    """Recompute cached scores for every application to a job."""
+    qs = job.applications.only('id', 'candidate_id', 'job_id', 'applied_at').order_by('id')
+    apps = list(qs)
+    for i in range(0, len(apps), chunk):
+        store_scores(job, apps[i:i + chunk])
+
+
+def rescore_candidate(candidate_id):
+    """Recompute cached scores for every application a candidate made."""
+    apps = (
+        JobApplication.objects
+        .filter(candidate_id=candidate_id)
+        .select_related('job')
+    )
+    for app in apps:
+        store_scores(app.job, [app])
+
+
+def queue_stale_rescores():
+    """
+    After a text model rebuild, queue a rescore of every job with
+    applications scored in another model, so one job never ranks scores
+    from two similarity spaces.
+    """
+    stamp   = model_stamp(text_model())
+    job_ids = (
+        JobApplication.objects
+        .exclude(rank_model=stamp)
+        .values_list('job_id', flat=True)
+        .distinct()
+    )
+    for job_id in job_ids:
+        enqueue('employer_profile.rescore_job', job_id, key=f'rescore_job:{job_id}')
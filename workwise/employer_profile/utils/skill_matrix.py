@@ -0,0 +1,155 @@
+# employer_profile/utils/skill_matrix.py
+
+import json
+import os
+import threading
+import zlib
+
+import joblib
+import numpy as np
+from django.conf import settings
+from scipy.sparse import csr_matrix
+
+from candidate_profile.utils.features import norm_items
+from employer_profile.models import JobPost
+
+MODEL_FILE = 'job_skills.joblib'
+
+_lock  = threading.Lock()
+_cache = {'key': None, 'model': None}
+
+
+def model_path():
+    return os.path.join(settings.ML_MODELS_DIR, MODEL_FILE)
+
+
+def incidence(rows, index):
+    """Binary CSR matrix: one row per term list, one column per term in `index`."""
+    indptr, indices = [0], []
+    for terms in rows:
+        indices.extend(sorted({index[t] for t in terms if t in index}))
+        indptr.append(len(indices))
+    data = np.ones(len(indices))
+    return csr_matrix((data, indices, indptr), shape=(len(rows), len(index)))
+
+
+def indicator(terms, index):
+    """Dense 0/1 vector of the `terms` present in `index`."""
+    vec = np.zeros(len(index))
+    vec[[index[t] for t in set(terms) if t in index]] = 1.0
+    return vec
+
+
+def skill_stamp(requirements, preferred_skills):
+    """Checksum of a job's raw skill lists; a stored row whose stamp differs is stale."""
+    return zlib.crc32(json.dumps([requirements or [], preferred_skills or []]).encode())
+
+
+class SkillMatrix:
+    """
+    Skill incidence of every active job over one shared vocabulary:
+    requirements and requirements plus preferred skills, one CSR row per job.
+    """
+
+    def __init__(self, vocab, job_ids, stamps, req, skills):
+        self.vocab   = vocab
+        self.job_ids = job_ids
+        self.stamps  = stamps
+        self.req     = req
+        self.skills  = skills
+        self.index   = {t: i for i, t in enumerate(vocab)}
+        self.rows    = {int(jid): i for i, jid in enumerate(job_ids)}
+        self.n_req   = np.asarray(req.sum(axis=1)).ravel()
+        self.n_all   = np.asarray(skills.sum(axis=1)).ravel()
+
+    def overlap(self, jobs, skills):
+        """
+        For a candidate's normalised `skills` against each of `jobs` (with
+        job_id, requirements and preferred_skills): shared skill count,
+        share of the job's skills covered and share of its requirements
+        covered. One sparse mat-vec per matrix covers every stored job;
+        jobs posted or re-skilled since the last build are counted directly.
+        """
+        vec    = indicator(skills, self.index)
+        rows   = np.array([self._row(job) for job in jobs], dtype=np.intp)
+        known  = rows >= 0
+        shared = np.zeros(len(jobs))
+        n_all  = np.zeros(len(jobs))
+        req    = np.zeros(len(jobs))
+        n_req  = np.zeros(len(jobs))
+
+        if known.any():
+            shared[known] = (self.skills @ vec)[rows[known]]
+            req[known]    = (self.req @ vec)[rows[known]]
+            n_all[known]  = self.n_all[rows[known]]
+            n_req[known]  = self.n_req[rows[known]]
+
+        skills = set(skills)
+        for i in np.flatnonzero(~known):
+            job_req  = set(norm_items(jobs[i].requirements))
+            job_all  = job_req | set(norm_items(jobs[i].preferred_skills))
+            shared[i], n_all[i] = len(skills & job_all), len(job_all)
+            req[i], n_req[i]    = len(skills & job_req), len(job_req)
+
+        coverage     = np.divide(shared, n_all, out=np.zeros(len(jobs)), where=n_all > 0)
+        req_coverage = np.divide(req, n_req, out=np.zeros(len(jobs)), where=n_req > 0)
+        return shared, coverage, req_coverage
+
+    def _row(self, job):
+        """The job's matrix row, or -1 if it is missing or its skills changed since the build."""
+        row = self.rows.get(job.job_id, -1)
+        if row >= 0 and self.stamps[row] != skill_stamp(job.requirements, job.preferred_skills):
+            return -1
+        return row
+
+
+def build_skill_matrix():
+    """Index every active job's skills and write the artifact atomically."""
+    rows = list(
+        JobPost.objects
+        .filter(is_active=True)
+        .order_by('job_id')
+        .values_list('job_id', 'requirements', 'preferred_skills')
+    )
+    stamps = np.array([skill_stamp(r, p) for _, r, p in rows], dtype=np.int64)
+    reqs   = [norm_items(r) for _, r, _ in rows]
+    prefs  = [norm_items(p) for _, _, p in rows]
+
+    index = {}
+    for terms in reqs + prefs:
+        for t in terms:
+            index.setdefault(t, len(index))
+
+    vocab   = np.array(list(index), dtype=object)
+    job_ids = np.array([jid for jid, _, _ in rows], dtype=np.int64)
+    req     = incidence(reqs, index)
+    skills  = incidence([r + p for r, p in zip(reqs, prefs)], index)
+
+    path = model_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({'vocab': vocab, 'job_ids': job_ids, 'stamps': stamps,
+                 'req': req, 'skills': skills}, tmp)
+    os.replace(tmp, path)
+    return SkillMatrix(vocab, job_ids, stamps, req, skills)
+
+
+def load_skill_matrix():
+    """
+    Memory-mapped matrix shared by every worker on the box; reloaded when
+    another process rebuilds the file. Returns None if it was never built.
+    """
+    path = model_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    with _lock:
+        if _cache['key'] != (path, mtime):
+            data = joblib.load(path, mmap_mode='r')
+            _cache['model'] = SkillMatrix(
+                data['vocab'], data['job_ids'], data['stamps'], data['req'], data['skills'],
+            )
+            _cache['key']   = (path, mtime)
+        return _cache['model']
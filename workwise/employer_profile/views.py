@@ -10,6 +10,7 @@ from decimal import Decimal
 from .models import JobPost, CompanyProfile
 from authentication.models import Employer, Candidate
 from django.core.paginator import Paginator
+from utils.pagination import KeysetPaginator
 from django.db.models import Case, When, Value, IntegerField
 from django.conf import settings
 from django.contrib.auth.hashers import check_password, make_password
@@ -18,10 +19,11 @@ import json
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.db.models import Count, Min
-from .utils.ranking    import rank_applications
+from .utils.ranking    import model_stamp, store_scores, text_model
+from .utils.dashboard_stats import employer_stats
 from candidate_profile.models import JobApplication
 from django.contrib   import messages
-from django.core.mail import send_mail
+from taskqueue.mail import queue_mail
 from django.core.serializers.json import DjangoJSONEncoder
 from dateutil.relativedelta import relativedelta
 from .models import EmployerPremium
@@ -34,53 +36,19 @@ def dashboard(request):
         return redirect('authentication:login')
     employer = get_object_or_404(Employer, employer_id=eid)
 
-    # 2) Summary cards
-    total_posts    = employer.job_posts.count()
-    active_posts   = employer.job_posts.filter(is_active=True, admin_review=False).count()
-    pending_posts  = employer.job_posts.filter(admin_review=True).count()
-    closed_posts   = employer.job_posts.filter(is_active=False).count()
+    # 2) Cards, status distribution, 6-month activity and top jobs (cached)
+    stats = employer_stats(employer.employer_id)
+    now   = timezone.now()
 
-    all_apps = JobApplication.objects.filter(job__employer=employer)
-    total_apps      = all_apps.count()
-    interviews_sch  = all_apps.filter(status='interview').count()
-    offers_ext      = all_apps.filter(status='offered').count()
-
-    # 3) Status distribution (pie/donut)
-    statuses     = ['applied','reviewing','interview','offered','rejected']
-    status_labels = ['Applied','Reviewing','Interview','Offered','Rejected']
-    status_data   = [ all_apps.filter(status=s).count() for s in statuses ]
-
-    # 4) Applications over last 6 months (line chart)
-    now = timezone.now()
-    activity_labels = []
-    activity_data   = []
-    for i in reversed(range(6)):
-        m = now - relativedelta(months=i)
-        label = m.strftime('%b %Y')
-        cnt = all_apps.filter(
-            applied_at__year=m.year,
-            applied_at__month=m.month
-        ).count()
-        activity_labels.append(label)
-        activity_data.append(cnt)
-
-    # 5) Top 5 jobs by application count (horizontal bar)
-    top_jobs_qs = (
-        employer.job_posts
-                .annotate(app_count=Count('applications'))
-                .order_by('-app_count')[:5]
-    )
-    top_jobs_labels = [ f"{jp.title}" for jp in top_jobs_qs ]
-    top_jobs_data   = [ jp.app_count     for jp in top_jobs_qs ]
-
-    # 6) Upcoming interviews (next 5)
-    upcoming = all_apps.filter(
+    # 3) Upcoming interviews (next 5)
+    upcoming = JobApplication.objects.filter(
+        job__employer=employer,
         status='interview',
         interview_at__gte=now
     ).select_related('candidate','job') \
      .order_by('interview_at')[:5]
 
-    # 7) Company Profile completeness (4 checks)
+    # 4) Company Profile completeness (4 checks)
     try:
         cp = employer.company_profile
     except CompanyProfile.DoesNotExist:
@@ -105,19 +73,19 @@ def dashboard(request):
     )
 
     return render(request, 'employer_profile/dashboard.html', {
-        'total_posts':     total_posts,
-        'active_posts':    active_posts,
-        'pending_posts':   pending_posts,
-        'closed_posts':    closed_posts,
-        'total_apps':      total_apps,
-        'interviews_sch':  interviews_sch,
-        'offers_ext':      offers_ext,
-        'status_labels':   json.dumps(status_labels),
-        'status_data':     json.dumps(status_data),
-        'activity_labels': json.dumps(activity_labels),
-        'activity_data':   json.dumps(activity_data),
-        'top_jobs_labels': json.dumps(top_jobs_labels),
-        'top_jobs_data':   json.dumps(top_jobs_data),
+        'total_posts':     stats['total_posts'],
+        'active_posts':    stats['active_posts'],
+        'pending_posts':   stats['pending_posts'],
+        'closed_posts':    stats['closed_posts'],
+        'total_apps':      stats['total_apps'],
+        'interviews_sch':  stats['interviews_sch'],
+        'offers_ext':      stats['offers_ext'],
+        'status_labels':   json.dumps(stats['status_labels']),
+        'status_data':     json.dumps(stats['status_data']),
+        'activity_labels': json.dumps(stats['activity_labels']),
+        'activity_data':   json.dumps(stats['activity_data']),
+        'top_jobs_labels': json.dumps(stats['top_jobs_labels']),
+        'top_jobs_data':   json.dumps(stats['top_jobs_data']),
         'upcoming':        upcoming,
         'profile_segments':  profile_segments,
         'profile_completeness': completeness,
@@ -995,10 +963,12 @@ def job_applications(request, job_id):
     # base queryset
     base_qs = job.applications.select_related('candidate')
 
-    sort = request.GET.get('sort','')
+    sort     = request.GET.get('sort','')
+    ordering = ['-applied_at', '-id']
     if sort == 'old':
-        apps_list = list(base_qs.order_by('applied_at'))
-    if sort == 'ranked':
+        apps_list = base_qs
+        ordering  = ['applied_at', 'id']
+    elif sort == 'ranked':
         
         premium_obj, _ = EmployerPremium.objects.get_or_create(employer=employer)
         now = timezone.now()
@@ -1009,16 +979,24 @@ def job_applications(request, job_id):
             and premium_obj.subscription_end >= now
         ):
             return redirect(reverse('employer:premium'))
-        
-        apps_list = rank_applications(job, list(base_qs))
+
+        # score applications that predate the score cache or were scored
+        # in a text model since rebuilt (their queued rescore has not run yet)
+        stale = list(base_qs.exclude(rank_model=model_stamp(text_model())))
+        if stale:
+            store_scores(job, stale)
+
+        # every application has a current rank_score now, so the index can serve the order
+        apps_list = base_qs
+        ordering  = ['-rank_score', '-applied_at', '-id']
     elif sort == 'processing':
         apps_list = base_qs.exclude(status__in=['applied', 'rejected'])   
     elif sort == 'rejected':
         apps_list = base_qs.filter(status='rejected')     
     else:
-        apps_list = list(base_qs.order_by('-applied_at'))
+        apps_list = base_qs
 
-    page_obj = Paginator(apps_list, 15).get_page(request.GET.get('page'))
+    page_obj = KeysetPaginator(apps_list, ordering, 15).get_page(request.GET.get('cursor'))
 
     return render(request, 'employer_profile/job_applications.html', {
         'job': job,
@@ -1050,7 +1028,7 @@ def application_detail(request, app_id):
             app.status = 'reviewing'
             app.save()
             # Send notification email to the candidate
-            send_mail(
+            queue_mail(
                 subject=f"Your application for “{app.job.title}” is under review",
                 message=(
                     f"Hi {app.candidate.first_name},\n\n"
@@ -1062,12 +1040,11 @@ def application_detail(request, app_id):
                 ),
                 from_email="no-reply@workwise.com",
                 recipient_list=[app.candidate.email],
-                fail_silently=False,
             )
         elif action == 'reject':
             app.status = 'rejected'
             app.save()
-            send_mail(
+            queue_mail(
                 subject=f"Your application for “{app.job.title}” is Rejected",
                 message=(
                     f"Hi {app.candidate.first_name},\n\n"
@@ -1078,7 +1055,6 @@ def application_detail(request, app_id):
                 ),
                 from_email="no-reply@workwise.com",
                 recipient_list=[app.candidate.email],
-                fail_silently=False,
             )
         elif action == 'schedule':
             dt = request.POST.get('interview_at')
@@ -1092,7 +1068,7 @@ def application_detail(request, app_id):
                     app.interview_at = dt_obj
                     app.status = 'interview'
                     app.save()
-                    send_mail(
+                    queue_mail(
                     subject=f"Your application for “{app.job.title}” is under review",
                     message=(
                         f"Hi {app.candidate.first_name},\n\n"
@@ -1106,7 +1082,6 @@ def application_detail(request, app_id):
                     ),
                     from_email="no-reply@workwise.com",
                     recipient_list=[app.candidate.email],
-                    fail_silently=False,
                     )
             except Exception:
                 messages.error(request, "Invalid date/time format.")
@@ -1181,12 +1156,11 @@ def send_meeting(request, app_id):
         f"{employer.company_name}"
     )
     try:
-        send_mail(
+        queue_mail(
             subject,
             body,
             settings.DEFAULT_FROM_EMAIL,
             [application.candidate.email],
-            fail_silently=False,
         )
         messages.success(request, 'Meeting invitation sent to candidate.')
     except Exception as e:
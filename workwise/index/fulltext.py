@@ -0,0 +1,107 @@
+# index/fulltext.py
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from authentication.models import Employer
+from employer_profile.models import JobPost
+
+FTS_TABLE = 'index_jobpost_fts'
+COLUMNS   = ('title', 'description', 'department', 'company_name')
+
+
+def is_available():
+    """FTS5 is only used on SQLite; other backends fall back to LIKE."""
+    return connection.vendor == 'sqlite'
+
+
+def create_table():
+    with connection.cursor() as cur:
+        cur.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5({', '.join(COLUMNS)}, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def rebuild():
+    """Refill the FTS table from every job post."""
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {FTS_TABLE}")
+        cur.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(COLUMNS)}) "
+            f"SELECT j.job_id, j.title, j.description, j.department, e.company_name "
+            f"FROM {JobPost._meta.db_table} j "
+            f"JOIN {Employer._meta.db_table} e ON e.employer_id = j.employer_id"
+        )
+
+
+def index_job(job):
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [job.job_id])
+        cur.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            [job.job_id, job.title, job.description, job.department, job.employer.company_name],
+        )
+
+
+def unindex_job(job_id):
+    with connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [job_id])
+
+
+def reindex_employer(employer):
+    """Company names are denormalised into the index; refresh them on rename."""
+    with connection.cursor() as cur:
+        cur.execute(
+            f"UPDATE {FTS_TABLE} SET company_name = %s WHERE rowid IN "
+            f"(SELECT job_id FROM {JobPost._meta.db_table} WHERE employer_id = %s)",
+            [employer.company_name, employer.employer_id],
+        )
+
+
+def match_expression(text, column=None):
+    """Quote every word as a prefix term so user input can't break MATCH syntax."""
+    tokens = re.findall(r'\w+', (text or '').lower())
+    if not tokens:
+        return None
+    expr = " ".join(f'"{t}"*' for t in tokens)
+    return f"{column} : ({expr})" if column else expr
+
+
+def filter_jobs(qs, text, column=None):
+    """Restrict a JobPost queryset to rows matching `text` (all columns or one)."""
+    expr = match_expression(text, column)
+    if expr is None:
+        return qs.filter(title__icontains=text)
+
+    if is_available():
+        return qs.filter(job_id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expr]
+        ))
+
+    if column:
+        fields = [f'{column}__icontains']
+    else:
+        fields = ['title__icontains', 'description__icontains',
+                  'department__icontains', 'employer__company_name__icontains']
+    for token in re.findall(r'\w+', text):
+        cond = Q()
+        for f in fields:
+            cond |= Q(**{f: token})
+        qs = qs.filter(cond)
+    return qs
+
+
+def order_by_relevance(qs, text, column=None):
+    """Order by BM25 (best first) where FTS5 is available, else newest first."""
+    expr = match_expression(text, column)
+    if expr is None or not is_available():
+        return qs.order_by('-posted_at')
+    return qs.annotate(relevance=RawSQL(
+        f"SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = {JobPost._meta.db_table}.job_id",
+        [expr],
+    )).order_by('relevance', '-posted_at')
@@ -0,0 +1,94 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.sqlite import BACKOFF_BASE, BACKOFF_CAP, WRITE_ATTEMPTS
+
+SCHEMA = """
+CREATE TABLE saved (
+    id        INTEGER PRIMARY KEY,
+    candidate INTEGER NOT NULL,
+    job       INTEGER NOT NULL,
+    saved_at  TEXT NOT NULL,
+    UNIQUE (candidate, job)
+)
+"""
+
+
+def _writer(path, pragmas, immediate, retries, seconds, seed):
+    """Toggle random saved jobs (SELECT, then INSERT or DELETE) like save_job does."""
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name}={value}')
+    begin = 'BEGIN IMMEDIATE' if immediate else 'BEGIN'
+
+    rng      = random.Random(seed)
+    deadline = time.monotonic() + seconds
+    done = locked = 0
+    while time.monotonic() < deadline:
+        pair = (rng.randrange(500), rng.randrange(100))
+        for attempt in range(retries):
+            try:
+                conn.execute(begin)
+                row = conn.execute('SELECT id FROM saved WHERE candidate=? AND job=?', pair).fetchone()
+                if row:
+                    conn.execute('DELETE FROM saved WHERE id=?', row)
+                else:
+                    conn.execute('INSERT INTO saved (candidate, job, saved_at) VALUES (?, ?, datetime())', pair)
+                conn.execute('COMMIT')
+                done += 1
+                break
+            except sqlite3.OperationalError as exc:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+                if attempt < retries - 1:
+                    time.sleep(rng.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+    conn.close()
+    return done, locked
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent writers on a scratch SQLite file: Django's defaults "
+        "(rollback journal, deferred BEGIN, no retry) against SQLITE_PRAGMAS, "
+        "BEGIN IMMEDIATE and the write retry."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Concurrent writer processes.")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Duration of each run.")
+
+    def handle(self, *args, **options):
+        writers, seconds = options['writers'], options['seconds']
+        runs = [
+            ('default', {}, False, 1),
+            ('tuned', settings.SQLITE_PRAGMAS, True, WRITE_ATTEMPTS),
+        ]
+        for label, pragmas, immediate, retries in runs:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                with sqlite3.connect(path) as conn:
+                    conn.execute(SCHEMA)
+                conn.close()
+
+                with ProcessPoolExecutor(writers) as pool:
+                    results = list(pool.map(
+                        _writer,
+                        *zip(*[(path, pragmas, immediate, retries, seconds, seed) for seed in range(writers)]),
+                    ))
+
+            done   = sum(r[0] for r in results)
+            locked = sum(r[1] for r in results)
+            self.stdout.write(
+                f"{label:8} {done / seconds:9.0f} writes/s   "
+                f"{locked} 'database is locked' error(s) from {writers} writers"
+            )
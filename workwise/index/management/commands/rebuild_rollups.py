@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from index.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the employer, candidate and category rollup tables from scratch."
+
+    def handle(self, *args, **options):
+        employers, candidates, categories = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {employers} employer-day, {candidates} candidate-day "
+            f"and {categories} category row(s)."
+        ))
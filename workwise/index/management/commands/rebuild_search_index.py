@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from employer_profile.models import JobPost
+from index.search import index_job
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trigram search index for every job post."
+
+    def handle(self, *args, **options):
+        count = 0
+        for job in JobPost.objects.only('job_id', 'title', 'full_location_address').iterator():
+            index_job(job)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} job(s)."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import Candidate
+from employer_profile.models import JobPost
+from utils.geo import coords
+
+BATCH_SIZE = 500
+
+
+def sync(model, source):
+    """Copy `source` JSON locations into model.lat/lng; returns rows changed."""
+    changed = []
+    for obj in model.objects.only(model._meta.pk.name, source, 'lat', 'lng').iterator(BATCH_SIZE):
+        lat, lng = coords(getattr(obj, source))
+        if (lat, lng) != (obj.lat, obj.lng):
+            obj.lat, obj.lng = lat, lng
+            changed.append(obj)
+    model.objects.bulk_update(changed, ['lat', 'lng'], batch_size=BATCH_SIZE)
+    return len(changed)
+
+
+class Command(BaseCommand):
+    help = "Backfill the lat/lng columns of jobs and candidates from their JSON locations."
+
+    def handle(self, *args, **options):
+        jobs       = sync(JobPost, 'map_location')
+        candidates = sync(Candidate, 'location')
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated coordinates of {jobs} job(s) and {candidates} candidate(s)."
+        ))
@@ -1,3 +1,87 @@
 from django.db import models
+from authentication.models import Candidate, Employer
+from employer_profile.models import JobPost
 
-# Create your models here.
+
+class JobSearchGram(models.Model):
+    """
+    Inverted trigram index over normalised job titles and addresses,
+    used by index.search to shortlist jobs before fuzzy scoring.
+    """
+    FIELD_CHOICES = [
+        ('t', 'Title'),
+        ('l', 'Location'),
+    ]
+
+    job   = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='search_grams')
+    field = models.CharField(max_length=1, choices=FIELD_CHOICES)
+    gram  = models.CharField(max_length=3)
+
+    class Meta:
+        unique_together = ('job', 'field', 'gram')
+        indexes = [
+            models.Index(fields=['field', 'gram', 'job'], name='search_gram_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} {self.field}:{self.gram}"
+
+
+
+class ApplicationCounts(models.Model):
+    """Application totals split by status, shared by the rollup tables."""
+    applications = models.PositiveIntegerField(default=0)
+    applied      = models.PositiveIntegerField(default=0)
+    reviewing    = models.PositiveIntegerField(default=0)
+    interview    = models.PositiveIntegerField(default=0)
+    offered      = models.PositiveIntegerField(default=0)
+    rejected     = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class EmployerDailyStats(ApplicationCounts):
+    """
+    One employer's posts (by posted day, in their current state) and the
+    applications to them (by applied day, by current status).
+    """
+    employer      = models.ForeignKey(Employer, on_delete=models.CASCADE, related_name='daily_stats')
+    day           = models.DateField()
+    posts         = models.PositiveIntegerField(default=0)
+    posts_active  = models.PositiveIntegerField(default=0)
+    posts_pending = models.PositiveIntegerField(default=0)
+    posts_closed  = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('employer', 'day')
+
+    def __str__(self):
+        return f"Employer {self.employer_id} on {self.day}"
+
+
+class CandidateDailyStats(ApplicationCounts):
+    """One candidate's applications (by applied day) and saved jobs (by saved day)."""
+    candidate  = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='daily_stats')
+    day        = models.DateField()
+    saved_jobs = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('candidate', 'day')
+
+    def __str__(self):
+        return f"Candidate {self.candidate_id} on {self.day}"
+
+
+class CategoryStats(ApplicationCounts):
+    """Posts and applications per industry/department pair."""
+    industry     = models.CharField(max_length=100)
+    department   = models.CharField(max_length=100)
+    posts        = models.PositiveIntegerField(default=0)
+    posts_listed = models.PositiveIntegerField(default=0)   # active and past admin review
+
+    class Meta:
+        unique_together = ('industry', 'department')
+
+    def __str__(self):
+        return f"{self.industry}/{self.department}"
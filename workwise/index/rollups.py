@@ -0,0 +1,203 @@
+# index/rollups.py
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+from authentication.models import Candidate, Employer
+from candidate_profile.models import JobApplication, SavedJob
+from candidate_profile.utils.dashboard_stats import invalidate_candidate_stats
+from employer_profile.models import JobPost
+from employer_profile.utils.dashboard_stats import STATUSES, invalidate_employer_stats
+from taskqueue.queue import enqueue
+from utils.cache import get_or_compute
+from .models import CandidateDailyStats, CategoryStats, EmployerDailyStats
+
+POST_COUNTS = {
+    'posts':         Count('pk'),
+    'posts_active':  Count('pk', filter=Q(is_active=True, admin_review=False)),
+    'posts_pending': Count('pk', filter=Q(admin_review=True)),
+    'posts_closed':  Count('pk', filter=Q(is_active=False)),
+}
+CATEGORY_POST_COUNTS = {
+    'posts':        Count('pk'),
+    'posts_listed': Count('pk', filter=Q(is_active=True, admin_review=False)),
+}
+APP_COUNTS = {
+    'applications': Count('pk'),
+    **{s: Count('pk', filter=Q(status=s)) for s in STATUSES},
+}
+
+HOME_CATEGORIES_KEY = 'home:categories'
+HOME_CATEGORIES_TTL = 10 * 60   # seconds; category refreshes invalidate sooner
+HOME_TOP            = 8
+
+
+def _as_date(day):
+    return day if isinstance(day, date) else date.fromisoformat(day)
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _store(model, lookup, values):
+    """Upsert one rollup row, dropping it once every counter is back to zero."""
+    if any(values.values()):
+        model.objects.update_or_create(**lookup, defaults=values)
+    else:
+        model.objects.filter(**lookup).delete()
+
+
+# — Recompute single buckets from the raw rows —
+
+def refresh_employer_day(employer_id, day):
+    if not Employer.objects.filter(pk=employer_id).exists():
+        return
+    day        = _as_date(day)
+    start, end = _day_bounds(day)
+    posts = (
+        JobPost.objects
+        .filter(employer_id=employer_id, posted_at__gte=start, posted_at__lt=end)
+        .aggregate(**POST_COUNTS)
+    )
+    apps = (
+        JobApplication.objects
+        .filter(job__employer_id=employer_id, applied_at__gte=start, applied_at__lt=end)
+        .aggregate(**APP_COUNTS)
+    )
+    _store(EmployerDailyStats, {'employer_id': employer_id, 'day': day}, {**posts, **apps})
+    invalidate_employer_stats(employer_id)
+
+
+def refresh_candidate_day(candidate_id, day):
+    if not Candidate.objects.filter(pk=candidate_id).exists():
+        return
+    day        = _as_date(day)
+    start, end = _day_bounds(day)
+    apps = (
+        JobApplication.objects
+        .filter(candidate_id=candidate_id, applied_at__gte=start, applied_at__lt=end)
+        .aggregate(**APP_COUNTS)
+    )
+    saved = SavedJob.objects.filter(
+        candidate_id=candidate_id, saved_at__gte=start, saved_at__lt=end,
+    ).count()
+    _store(CandidateDailyStats, {'candidate_id': candidate_id, 'day': day}, {**apps, 'saved_jobs': saved})
+    invalidate_candidate_stats(candidate_id)
+
+
+def refresh_category(industry, department):
+    posts = (
+        JobPost.objects
+        .filter(industry=industry, department=department)
+        .aggregate(**CATEGORY_POST_COUNTS)
+    )
+    apps = (
+        JobApplication.objects
+        .filter(job__industry=industry, job__department=department)
+        .aggregate(**APP_COUNTS)
+    )
+    _store(CategoryStats, {'industry': industry, 'department': department}, {**posts, **apps})
+    cache.delete(HOME_CATEGORIES_KEY)
+
+
+# — Queue bucket refreshes (deduplicated while waiting for the worker) —
+
+def queue_employer_day(employer_id, day):
+    enqueue('index.refresh_employer_day', employer_id, day.isoformat(),
+            key=f'rollup:employer:{employer_id}:{day}')
+
+
+def queue_candidate_day(candidate_id, day):
+    enqueue('index.refresh_candidate_day', candidate_id, day.isoformat(),
+            key=f'rollup:candidate:{candidate_id}:{day}')
+
+
+def queue_category(industry, department):
+    enqueue('index.refresh_category', industry, department,
+            key=f'rollup:category:{industry}:{department}')
+
+
+# — Full rebuild —
+
+def _grouped(qs, keys, counts):
+    return qs.values(*keys).annotate(**counts).order_by()
+
+
+def rebuild_rollups():
+    """Recompute every rollup table from scratch with a few GROUP BY queries."""
+    employer_rows  = defaultdict(dict)
+    candidate_rows = defaultdict(dict)
+    category_rows  = defaultdict(dict)
+
+    posts = JobPost.objects.annotate(day=TruncDate('posted_at'))
+    for row in _grouped(posts, ['employer_id', 'day'], POST_COUNTS):
+        employer_rows[row.pop('employer_id'), row.pop('day')].update(row)
+    for row in _grouped(JobPost.objects.all(), ['industry', 'department'], CATEGORY_POST_COUNTS):
+        category_rows[row.pop('industry'), row.pop('department')].update(row)
+
+    apps = JobApplication.objects.annotate(day=TruncDate('applied_at'))
+    for row in _grouped(apps, ['job__employer_id', 'day'], APP_COUNTS):
+        employer_rows[row.pop('job__employer_id'), row.pop('day')].update(row)
+    for row in _grouped(apps, ['candidate_id', 'day'], APP_COUNTS):
+        candidate_rows[row.pop('candidate_id'), row.pop('day')].update(row)
+    for row in _grouped(apps, ['job__industry', 'job__department'], APP_COUNTS):
+        category_rows[row.pop('job__industry'), row.pop('job__department')].update(row)
+
+    saved = SavedJob.objects.annotate(day=TruncDate('saved_at'))
+    for row in _grouped(saved, ['candidate_id', 'day'], {'saved_jobs': Count('pk')}):
+        candidate_rows[row.pop('candidate_id'), row.pop('day')].update(row)
+
+    with transaction.atomic():
+        EmployerDailyStats.objects.all().delete()
+        CandidateDailyStats.objects.all().delete()
+        CategoryStats.objects.all().delete()
+        EmployerDailyStats.objects.bulk_create(
+            EmployerDailyStats(employer_id=eid, day=day, **vals)
+            for (eid, day), vals in employer_rows.items()
+        )
+        CandidateDailyStats.objects.bulk_create(
+            CandidateDailyStats(candidate_id=cid, day=day, **vals)
+            for (cid, day), vals in candidate_rows.items()
+        )
+        CategoryStats.objects.bulk_create(
+            CategoryStats(industry=ind, department=dept, **vals)
+            for (ind, dept), vals in category_rows.items()
+        )
+    cache.delete(HOME_CATEGORIES_KEY)
+    return len(employer_rows), len(candidate_rows), len(category_rows)
+
+
+# — Readers —
+
+def _top(field, limit):
+    rows = (
+        CategoryStats.objects
+        .filter(posts_listed__gt=0)
+        .values(field)
+        .annotate(count=Sum('posts_listed'))
+        .order_by('-count')[:limit]
+    )
+    return [
+        {
+            'slug':   item[field],
+            'title':  item[field].replace('_',' ').title(),
+            'count':  item['count']
+        }
+        for item in rows
+    ]
+
+
+def home_categories():
+    """(industries, departments) with the most listed jobs, for the home page."""
+    return get_or_compute(
+        HOME_CATEGORIES_KEY,
+        lambda: (_top('industry', HOME_TOP), _top('department', HOME_TOP)),
+        HOME_CATEGORIES_TTL,
+    )
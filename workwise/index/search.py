@@ -0,0 +1,107 @@
+# index/search.py
+
+import math
+import re
+
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from rapidfuzz import fuzz
+
+from .models import JobSearchGram
+
+TITLE_MIN    = 60   # token_sort_ratio needed for a title match
+LOCATION_MIN = 80   # token_sort_ratio needed for a location match
+GRAM_SLACK   = 0.2  # shortlist jobs sharing (threshold - slack) of the query's trigrams
+
+
+def normalize(text):
+    return " ".join(sorted(re.findall(r'[a-z0-9]+', (text or '').lower())))
+
+
+def trigrams(text):
+    grams = set()
+    for token in normalize(text).split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def index_job(job):
+    """(Re)build the title and location grams of one job."""
+    JobSearchGram.objects.filter(job=job).delete()
+    rows = [
+        JobSearchGram(job=job, field=field, gram=g)
+        for field, text in (('t', job.title), ('l', job.full_location_address))
+        for g in trigrams(text)
+    ]
+    JobSearchGram.objects.bulk_create(rows)
+
+
+def _gram_matches(field, text, threshold):
+    """Subquery of job_ids sharing enough trigrams with `text`."""
+    grams = trigrams(text)
+    need  = max(1, math.ceil(len(grams) * (threshold / 100 - GRAM_SLACK)))
+    return (
+        JobSearchGram.objects
+        .filter(field=field, gram__in=grams)
+        .values('job_id')
+        .annotate(hits=Count('id'))
+        .filter(hits__gte=need)
+        .values('job_id')
+    )
+
+
+def search_jobs(qs, title, industry, dept, wtype, location, now):
+    """
+    Jobs matching at least two of industry/department/work type/title/
+    location, in the job_list bucket order:
+
+      1. all three filters, title and location
+      2. all three filters and title
+      3. all three filters
+      4. any other two matches
+
+    and by recency inside each bucket.
+    """
+    def hit(**kw):
+        return Case(When(then=Value(1), **kw), default=Value(0), output_field=IntegerField())
+
+    qs = qs.annotate(
+        exact_count=hit(industry=industry) + hit(department=dept) + hit(work_type=wtype)
+    )
+    title_ids = _gram_matches('t', title, TITLE_MIN)
+    loc_ids   = _gram_matches('l', location, LOCATION_MIN)
+
+    shortlist = qs.filter(
+        Q(exact_count__gte=2)
+        | (Q(exact_count=1) & (Q(job_id__in=title_ids) | Q(job_id__in=loc_ids)))
+        | (Q(exact_count=0) & Q(job_id__in=title_ids) & Q(job_id__in=loc_ids))
+    )
+
+    buckets = ([], [], [], [])
+    loc_q, title_q = location.lower(), title.lower()
+    for job in shortlist:
+        # Recency score (0–1; 1 = just posted, 0 = ≥30 days old)
+        days_old = (now - job.posted_at).days
+        recency  = max(0, (30 - days_old) / 30)
+
+        if job.exact_count == 2:
+            buckets[3].append((recency, job))
+            continue
+
+        loc_ok   = fuzz.token_sort_ratio(loc_q, job.full_location_address.lower()) >= LOCATION_MIN
+        title_ok = fuzz.token_sort_ratio(title_q, job.title.lower()) >= TITLE_MIN
+
+        if job.exact_count == 3 and loc_ok and title_ok:
+            buckets[0].append((recency, job))
+        elif job.exact_count == 3 and title_ok:
+            buckets[1].append((recency, job))
+        elif job.exact_count == 3:
+            buckets[2].append((recency, job))
+        elif job.exact_count + loc_ok + title_ok >= 2:
+            buckets[3].append((recency, job))
+
+    return [
+        job
+        for bucket in buckets
+        for _, job in sorted(bucket, key=lambda x: x[0], reverse=True)
+    ]
@@ -0,0 +1,90 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from authentication.models import Employer
+from candidate_profile.models import JobApplication, SavedJob
+from employer_profile.models import CompanyProfile, JobPost
+from utils.cache import bump_groups
+from . import fulltext, rollups
+from .search import index_job
+
+
+@receiver(post_save, sender=JobPost)
+def reindex_job(sender, instance, **kwargs):
+    index_job(instance)
+    if fulltext.is_available():
+        fulltext.index_job(instance)
+
+
+@receiver(post_delete, sender=JobPost)
+def unindex_job(sender, instance, **kwargs):
+    if fulltext.is_available():
+        fulltext.unindex_job(instance.job_id)
+
+
+@receiver(post_save, sender=Employer)
+def reindex_company_name(sender, instance, created, **kwargs):
+    if not created and fulltext.is_available():
+        fulltext.reindex_employer(instance)
+
+
+# — Cached job pages (index.views.listed_job) —
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def bump_job_cache(sender, instance, **kwargs):
+    bump_groups(f'job:{instance.pk}')
+
+
+@receiver(post_save, sender=Employer)
+@receiver(post_save, sender=CompanyProfile)
+def bump_employer_job_caches(sender, instance, **kwargs):
+    employer_id = instance.pk if sender is Employer else instance.employer_id
+    job_ids     = JobPost.objects.filter(employer_id=employer_id).values_list('pk', flat=True)
+    bump_groups(*(f'job:{pk}' for pk in job_ids))
+
+
+def create_fulltext_table(sender, **kwargs):
+    # FTS5 virtual tables live outside the model migrations
+    if fulltext.is_available():
+        fulltext.create_table()
+        fulltext.rebuild()
+
+
+# — Rollup tables: queue a recount of every bucket a change touches —
+
+@receiver(pre_save, sender=JobPost)
+def remember_job_category(sender, instance, **kwargs):
+    instance._old_category = (
+        JobPost.objects
+        .filter(pk=instance.pk)
+        .values_list('industry', 'department')
+        .first()
+    )
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def refresh_job_rollups(sender, instance, **kwargs):
+    rollups.queue_employer_day(instance.employer_id, instance.posted_at.date())
+    rollups.queue_category(instance.industry, instance.department)
+    old = getattr(instance, '_old_category', None)
+    if old and old != (instance.industry, instance.department):
+        # the job and its applications moved out of the old category
+        rollups.queue_category(*old)
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_delete, sender=JobApplication)
+def refresh_application_rollups(sender, instance, **kwargs):
+    job = instance.job
+    day = instance.applied_at.date()
+    rollups.queue_employer_day(job.employer_id, day)
+    rollups.queue_candidate_day(instance.candidate_id, day)
+    rollups.queue_category(job.industry, job.department)
+
+
+@receiver(post_save, sender=SavedJob)
+@receiver(post_delete, sender=SavedJob)
+def refresh_saved_job_rollups(sender, instance, **kwargs):
+    rollups.queue_candidate_day(instance.candidate_id, instance.saved_at.date())
@@ -0,0 +1,18 @@
+from taskqueue.queue import task
+
+from . import rollups
+
+
+@task()
+def refresh_employer_day(employer_id, day):
+    rollups.refresh_employer_day(employer_id, day)
+
+
+@task()
+def refresh_candidate_day(candidate_id, day):
+    rollups.refresh_candidate_day(candidate_id, day)
+
+
+@task()
+def refresh_category(industry, department):
+    rollups.refresh_category(industry, department)
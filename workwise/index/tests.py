@@ -1,3 +1,611 @@
-from django.test import TestCase
+import os
+import random
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rapidfuzz import fuzz
+
+from authentication.models import Employer
+from candidate_profile.models import CandidateCV, JobApplication, SavedJob
+from employer_profile.models import JobPost
+from employer_profile.models import CompanyProfile, EmployerPremium
+from employer_profile.utils.ranking import store_scores
+from utils.geo import bounding_box, haversine_many, within_km
+from utils.pagination import KeysetPaginator
+from utils.sqlite import retry_on_locked
+from utils.testing import isolate_models_dir, make_candidate, make_employer, make_job
+from utils.topk import top_k
+from utils.cache import GROUP_TIMEOUT, TwoTierCache, bump_groups, get_or_compute, versioned_key
+from . import fulltext
+from .views import listed_job
+from .models import CandidateDailyStats, CategoryStats, EmployerDailyStats
+from .rollups import HOME_CATEGORIES_KEY, home_categories, rebuild_rollups
+from .search import search_jobs
+
+
+TITLES    = ['Python Developer', 'Senior Python Developer', 'Staff Nurse', 'Accountant', 'Developer Python', 'Data Analyst']
+ADDRESSES = ['Kathmandu, Nepal', 'Lalitpur, Nepal', 'Pokhara', 'kathmandu nepal', 'Biratnagar']
+
+
+def bucket_scan(qs, title, industry, dept, wtype, location, now):
+    """The full-table scan job_list used before the search index."""
+    buckets = ([], [], [], [])
+    for job in qs:
+        exact = sum([job.industry == industry, job.department == dept, job.work_type == wtype])
+        loc_score   = fuzz.token_sort_ratio(location.lower(), job.full_location_address.lower())
+        title_score = fuzz.token_sort_ratio(title.lower(), job.title.lower())
+        recency = max(0, (30 - (now - job.posted_at).days) / 30)
+        if exact == 3 and loc_score >= 80 and title_score >= 60:
+            buckets[0].append((recency, job))
+        elif exact == 3 and title_score >= 60:
+            buckets[1].append((recency, job))
+        elif exact == 3:
+            buckets[2].append((recency, job))
+        elif exact + (loc_score >= 80) + (title_score >= 60) >= 2:
+            buckets[3].append((recency, job))
+    return [j for b in buckets for _, j in sorted(b, key=lambda x: x[0], reverse=True)]
+
+
+class JobSearchTests(TestCase):
+
+    def setUp(self):
+        employer = make_employer()
+        rng = random.Random(7)
+        for i in range(80):
+            job = make_job(
+                employer,
+                title=rng.choice(TITLES),
+                full_location_address=rng.choice(ADDRESSES),
+                industry=rng.choice(['information_technology', 'healthcare']),
+                department=rng.choice(['software_development', 'nursing']),
+                work_type=rng.choice(['full_time', 'part_time']),
+                admin_review=False,
+            )
+            JobPost.objects.filter(pk=job.pk).update(posted_at=timezone.now() - timedelta(days=i % 40))
+
+    def test_matches_full_scan(self):
+        qs  = JobPost.objects.filter(is_active=True, admin_review=False)
+        now = timezone.now()
+        for args in [
+            ('python developer', 'information_technology', 'software_development', 'full_time', 'Kathmandu Nepal'),
+            ('nurse', 'healthcare', 'nursing', 'part_time', 'pokhara'),
+            ('data analyst', 'finance', 'audit', 'contract', 'Lalitpur, Nepal'),
+        ]:
+            self.assertEqual(
+                [j.pk for j in search_jobs(qs, *args, now)],
+                [j.pk for j in bucket_scan(qs, *args, now)],
+            )
+
+    def test_index_follows_title_edits(self):
+        job = JobPost.objects.filter(title='Accountant').first()
+        job.title = 'Zookeeper'
+        job.save()
+        qs = JobPost.objects.filter(pk=job.pk)
+        hits = search_jobs(qs, 'zookeeper', 'x', 'y', job.work_type, 'nowhere', timezone.now())
+        self.assertEqual(hits, [job])
+
+
+class FullTextSearchTests(TestCase):
+
+    def setUp(self):
+        self.employer = make_employer('Himalayan Bank')
+        self.dev = make_job(self.employer, title='Python Developer',
+                            description='Build django services. Python python python.')
+        self.nurse = make_job(self.employer, title='Staff Nurse',
+                              description='Ward duties; some python scripting a plus.')
+        self.qs = JobPost.objects.all()
+
+    def test_title_and_description_prefix_match(self):
+        self.assertEqual(list(fulltext.filter_jobs(self.qs, 'develop', column='title')), [self.dev])
+        self.assertEqual(set(fulltext.filter_jobs(self.qs, 'pyth')), {self.dev, self.nurse})
+        self.assertEqual(list(fulltext.filter_jobs(self.qs, 'ward " ( *')), [self.nurse])
+
+    def test_bm25_ordering(self):
+        ranked = fulltext.order_by_relevance(fulltext.filter_jobs(self.qs, 'python'), 'python')
+        self.assertEqual(list(ranked), [self.dev, self.nurse])
+
+    def test_index_follows_saves_deletes_and_company_renames(self):
+        self.employer.company_name = 'Everest Foods'
+        self.employer.save()
+        self.assertEqual(fulltext.filter_jobs(self.qs, 'everest').count(), 2)
+
+        self.nurse.title = 'Head Chef'
+        self.nurse.save()
+        self.assertEqual(list(fulltext.filter_jobs(self.qs, 'chef', column='title')), [self.nurse])
+
+        job_id = self.dev.job_id
+        self.dev.delete()
+        self.assertEqual(fulltext.filter_jobs(JobPost.objects.filter(pk=job_id), 'developer').count(), 0)
+
+
+def rollup_snapshot():
+    def rows(model, *keys):
+        exclude = {'id', *keys}
+        fields  = [f.attname for f in model._meta.concrete_fields if f.attname not in exclude]
+        return {
+            tuple(getattr(r, k) for k in keys): tuple(getattr(r, f) for f in fields)
+            for r in model.objects.all()
+        }
+    return (
+        rows(EmployerDailyStats, 'employer_id', 'day'),
+        rows(CandidateDailyStats, 'candidate_id', 'day'),
+        rows(CategoryStats, 'industry', 'department'),
+    )
+
+
+@override_settings(TASKS_EAGER=True)
+class RollupTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        isolate_models_dir(self)
+        self.rng        = random.Random(3)
+        self.employers  = [make_employer(f'Co {i}') for i in range(2)]
+        self.candidates = [make_candidate(str(i)) for i in range(4)]
+
+    def write(self, fn, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return fn(*args, **kwargs)
+
+    def test_incremental_refresh_matches_full_rebuild(self):
+        rng, now = self.rng, timezone.now()
+        jobs = [
+            self.write(make_job, rng.choice(self.employers),
+                       industry=rng.choice(['finance', 'healthcare']),
+                       department=rng.choice(['audit', 'nursing']),
+                       admin_review=rng.random() < 0.3)
+            for _ in range(8)
+        ]
+        apps = [
+            self.write(
+                JobApplication.objects.create,
+                candidate=self.candidates[i // 4], job=jobs[i % 8],
+                cover_letter='applications/cover_letters/c.pdf',
+                applied_at=now - timedelta(days=rng.randint(0, 90)),
+            )
+            for i in range(16)
+        ]
+        self.write(SavedJob.objects.create, candidate=self.candidates[0], job=jobs[1])
+
+        # status changes, closing and recategorising a job, deletes
+        for app in apps[:6]:
+            app.status = rng.choice(['reviewing', 'interview', 'offered', 'rejected'])
+            self.write(app.save)
+        jobs[2].is_active  = False
+        jobs[3].industry   = 'education'
+        self.write(jobs[2].save)
+        self.write(jobs[3].save)
+        self.write(jobs[4].delete)
+        self.write(JobApplication.objects.filter(pk__in=[a.pk for a in apps[10:13]]).delete)
+
+        incremental = rollup_snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, rollup_snapshot())
+
+    def test_home_lists_match_raw_counts(self):
+        for ind, dept, review in [('finance', 'audit', False), ('finance', 'tax', False),
+                                  ('healthcare', 'nursing', False), ('finance', 'audit', True)]:
+            make_job(self.employers[0], industry=ind, department=dept, admin_review=review)
+        rebuild_rollups()
+
+        listed = JobPost.objects.filter(is_active=True, admin_review=False)
+        resp   = self.client.get(reverse('index:home'))
+        self.assertEqual(
+            [(i['slug'], i['count']) for i in resp.context['industries_list']],
+            [(r['industry'], r['n']) for r in
+             listed.values('industry').annotate(n=Count('pk')).order_by('-n')],
+        )
+        self.assertEqual(
+            sorted((d['slug'], d['count']) for d in resp.context['departments_list']),
+            sorted((r['department'], r['n']) for r in listed.values('department').annotate(n=Count('pk'))),
+        )
+
+
+@override_settings(TASKS_EAGER=True)
+class HomeCategoryCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        isolate_models_dir(self)
+        self.employer = make_employer()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job = make_job(self.employer, industry='finance', department='audit', admin_review=False)
+
+    def test_cached_until_a_job_changes(self):
+        self.assertEqual(home_categories()[0][0]['count'], 1)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('index:home'))
+
+        # admin review / deactivation goes through save() and the category refresh
+        self.job.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.save()
+        self.assertEqual(home_categories(), ([], []))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_job(self.employer, industry='finance', department='tax', admin_review=False)
+        self.assertEqual([d['slug'] for d in home_categories()[1]], ['tax'])
+
+    def test_cold_cache_recomputed_once(self):
+        compute = mock.Mock(return_value='fresh')
+        cache.add(f'{HOME_CATEGORIES_KEY}:lock', 1)   # another request is recomputing
+        threading.Timer(0.1, cache.set, [HOME_CATEGORIES_KEY, 'theirs', 60]).start()
+
+        self.assertEqual(get_or_compute(HOME_CATEGORIES_KEY, compute, 60), 'theirs')
+        compute.assert_not_called()
+
+
+class TwoTierCacheTests(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def worker(self, **options):
+        """A cache as one gunicorn worker would see it: own LRU, shared dir."""
+        return TwoTierCache(self.dir.name, {'OPTIONS': {'LOCAL_TIMEOUT': 60, **options}})
+
+    def test_workers_share_the_file_tier(self):
+        a, b = self.worker(), self.worker()
+        a.set('k', {'n': 1})
+        self.assertEqual(b.get('k'), {'n': 1})
+
+        a.delete('k')
+        self.assertEqual(b.get('k'), {'n': 1})   # b's local copy, until LOCAL_TIMEOUT
+        self.assertIsNone(self.worker().get('k'))
+
+    def test_add_is_exclusive_across_workers(self):
+        a, b = self.worker(), self.worker()
+        self.assertTrue(a.add('lock', 1, 30))
+        self.assertFalse(b.add('lock', 1, 30))
+        a.delete('lock')
+        self.assertTrue(b.add('lock', 1, 30))
+
+        b.set('lock', 1, -1)                       # expired locks can be retaken
+        self.assertTrue(a.add('lock', 2, 30))
+
+    def test_local_tier_is_bounded_lru(self):
+        c = self.worker(LOCAL_MAX_ENTRIES=2)
+        for k in 'abc':
+            c.set(k, k)
+        c.get('b')
+        c.set('d', 'd')
+        self.assertEqual(list(c._local._data), [c.make_key('b'), c.make_key('d')])
+        self.assertEqual(c.get('a'), 'a')          # still in the shared tier
+
+
+class VersionedJobCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.employer = make_employer()
+        self.profile = CompanyProfile.objects.create(employer=self.employer)
+        self.job     = make_job(self.employer, admin_review=False)
+
+    def test_group_bump_changes_key(self):
+        before = versioned_key('job_detail:1', 'job:1')
+        self.assertEqual(versioned_key('job_detail:1', 'job:1'), before)
+        bump_groups('job:1')
+        self.assertNotEqual(versioned_key('job_detail:1', 'job:1'), before)
+
+    def test_group_counters_expire(self):
+        with mock.patch('utils.cache.cache') as shared:
+            bump_groups('job:1')
+        shared.set.assert_called_once_with('group:job:1', mock.ANY, GROUP_TIMEOUT)
+
+    def test_suite_runs_against_a_throwaway_cache(self):
+        self.assertNotEqual(cache._shared._dir, os.path.join(settings.BASE_DIR, 'cache'))
+        self.assertTrue(cache._shared._dir.startswith(tempfile.gettempdir()))
+
+    def test_job_and_company_edits_invalidate_job_page(self):
+        self.assertEqual(listed_job(self.job.pk).title, 'Backend Developer')
+        with self.assertNumQueries(0):
+            listed_job(self.job.pk)
+
+        self.job.title = 'Platform Engineer'
+        self.job.save()
+        self.assertEqual(listed_job(self.job.pk).title, 'Platform Engineer')
+
+        self.profile.save()
+        with self.assertNumQueries(1):
+            listed_job(self.job.pk)
+
+        self.job.is_active = False
+        self.job.save()
+        self.assertIsNone(listed_job(self.job.pk))
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        employer = make_employer()
+        for i in range(23):
+            job = make_job(employer, industry='finance', admin_review=False)
+            # several jobs per timestamp so the job_id tie-breaker matters
+            JobPost.objects.filter(pk=job.pk).update(posted_at=timezone.now() - timedelta(days=i // 3))
+        self.qs = JobPost.objects.all()
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append([j.pk for j in page])
+            if not page.has_next:
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_pages_cover_the_ordering_exactly_once(self):
+        paginator = KeysetPaginator(self.qs, ['-posted_at'], 5)
+        pages, last = self.walk(paginator)
+        expected    = list(self.qs.order_by('-posted_at', '-job_id').values_list('pk', flat=True))
+        self.assertEqual([pk for p in pages for pk in p], expected)
+        self.assertEqual([len(p) for p in pages], [5, 5, 5, 5, 3])
+
+        # and back again
+        back = paginator.get_page(last.prev_cursor)
+        self.assertEqual([j.pk for j in back], pages[-2])
+        self.assertTrue(back.has_next and back.has_previous)
+
+    def test_deep_page_is_a_single_seek_query(self):
+        paginator = KeysetPaginator(self.qs, ['posted_at'], 5)
+        _, last = self.walk(paginator)
+        with self.assertNumQueries(1) as ctx:
+            paginator.get_page(last.prev_cursor)
+        sql = ctx.captured_queries[0]['sql']
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT', sql)
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(self.qs, ['-posted_at'], 5)
+        first     = paginator.get_page()
+        self.assertEqual(
+            [j.pk for j in paginator.get_page(first.next_cursor[:-2] + 'xx')],
+            [j.pk for j in first],
+        )
+        self.assertFalse(first.has_previous)
+        self.assertEqual((first.approx_count, first.count_capped), (23, False))
+
+    def test_explore_jobs_load_more_links(self):
+        employer = Employer.objects.get()
+        for _ in range(5):
+            make_job(employer, industry='finance', admin_review=False)
+        url  = reverse('index:explore_jobs', args=['industry', 'finance'])
+
+        resp = self.client.get(url)
+        self.assertEqual(len(resp.context['jobs']), 25)
+        self.assertContains(resp, 'data-load-more')
+        self.assertContains(resp, '28 jobs')
+
+        resp = self.client.get(url, {'cursor': resp.context['jobs'].next_cursor})
+        self.assertEqual(len(resp.context['jobs']), 3)
+        self.assertNotContains(resp, 'data-load-more')
+
+
+HOT_TABLES = ('employer_profile_jobpost', 'candidate_profile_jobapplication', 'candidate_profile_savedjob')
+
+
+class QueryPlanTests(TestCase):
+    """The list pages' queries on jobs, applications and saved jobs seek an index."""
+
+    def setUp(self):
+        self.employer  = make_employer()
+        self.candidate = make_candidate()
+        self.job = make_job(self.employer, industry='finance', admin_review=False)
+        make_job(self.employer, industry='finance', admin_review=False)
+        JobApplication.objects.create(candidate=self.candidate, job=self.job, status='interview',
+                                      interview_at=timezone.now() + timedelta(days=1))
+        SavedJob.objects.create(candidate=self.candidate, job=self.job)
+
+    def login(self, **ids):
+        session = self.client.session
+        session.update(ids)
+        session.save()
+
+    def assertUsesIndexes(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if not any(t in query['sql'] for t in HOT_TABLES):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plan = [row[3] for row in cursor.fetchall()]
+                with self.subTest(url=url, sql=query['sql']):
+                    self.assertFalse([
+                        step for step in plan
+                        if step.startswith(tuple(f'SCAN {t}' for t in HOT_TABLES)) and 'INDEX' not in step
+                        or 'TEMP B-TREE' in step
+                    ], plan)
+
+    def test_listing_pages(self):
+        self.login(candidate_id=self.candidate.candidate_id)
+        listed = JobPost.objects.filter(is_active=True, admin_review=False)
+        cursor = KeysetPaginator(listed, ['-posted_at'], 1).get_page().next_cursor
+        self.assertUsesIndexes(reverse('index:jobs_list'))
+        self.assertUsesIndexes(reverse('index:jobs_list'), cursor=cursor)
+        self.assertUsesIndexes(reverse('index:explore_jobs', args=['industry', 'finance']))
+        self.assertUsesIndexes(reverse('candidate:saved_jobs'))
+        self.assertUsesIndexes(reverse('candidate:applied_jobs'), status='interview')
+        self.assertUsesIndexes(reverse('candidate:interview_list'), when='upcoming')
+
+    def test_employer_application_pages(self):
+        self.login(employer_id=self.employer.employer_id)
+        EmployerPremium.objects.create(employer=self.employer, is_subscribed=True, payment_ok=True,
+                                       subscription_end=timezone.now() + timedelta(days=30))
+        url = reverse('employer:job_applications', args=[self.job.job_id])
+        for sort in ('', 'old', 'processing', 'rejected', 'ranked'):
+            self.assertUsesIndexes(url, sort=sort)
+
+        # the ranked order's cursor seek too
+        other = make_candidate('W')
+        JobApplication.objects.create(candidate=other, job=self.job, rank_score=0.5)
+        ranked = KeysetPaginator(self.job.applications.all(), ['-rank_score', '-applied_at'], 1)
+        self.assertUsesIndexes(url, sort='ranked', cursor=ranked.get_page().next_cursor)
+
+
+class SqliteTuningTests(TransactionTestCase):
+
+    def setUp(self):
+        self.employer  = make_employer()
+        self.candidate = make_candidate()
+        self.job = make_job(self.employer, admin_review=False)
+
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)       # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    @mock.patch('utils.sqlite.time.sleep')
+    def test_locked_write_is_rolled_back_and_retried(self, sleep):
+        attempts = []
+
+        @retry_on_locked
+        def view(request):
+            SavedJob.objects.create(candidate=self.candidate, job=self.job)
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise OperationalError('database is locked')
+            return HttpResponse('ok')
+
+        self.assertEqual(view(RequestFactory().post('/')).content, b'ok')
+        self.assertEqual((len(attempts), SavedJob.objects.count(), sleep.call_count), (3, 1, 2))
+
+    @mock.patch('utils.sqlite.time.sleep')
+    def test_other_errors_and_reads_are_not_retried(self, sleep):
+        view = mock.Mock(side_effect=OperationalError('no such table: x'))
+        with self.assertRaises(OperationalError):
+            retry_on_locked(view)(RequestFactory().post('/'))
+        view.side_effect = OperationalError('database is locked')
+        with self.assertRaises(OperationalError):
+            retry_on_locked(view)(RequestFactory().get('/'))
+        self.assertEqual((view.call_count, sleep.call_count), (2, 0))
+
+    @mock.patch('utils.sqlite.time.sleep')
+    def test_retried_apply_stores_one_letter_and_scores_once(self, sleep):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        CandidateCV.objects.create(candidate=self.candidate, cv_file='cvs/cv.pdf')
+        session = self.client.session
+        session['candidate_id'] = self.candidate.pk
+        session.save()
+        cache.clear()
+
+        # the first attempt fails after the row is written, as a locked commit would
+        with override_settings(MEDIA_ROOT=media), \
+                mock.patch('index.views.queue_mail', side_effect=[OperationalError('database is locked'), None]), \
+                mock.patch('index.views.store_scores', wraps=store_scores) as score:
+            resp = self.client.post(reverse('index:job_details', args=[self.job.pk]), {
+                'cover_letter': SimpleUploadedFile('letter.pdf', b'%PDF cover letter'),
+            })
+
+        self.assertRedirects(resp, reverse('candidate:applied_jobs'), fetch_redirect_response=False)
+        app = JobApplication.objects.get()
+        self.assertEqual(os.listdir(os.path.join(media, 'applications', 'cover_letters')),
+                         [os.path.basename(app.cover_letter.name)])
+        self.assertEqual(score.call_count, 1)
+        self.assertIsNotNone(app.rank_score)
+
+
+class GeoFilterTests(TestCase):
+
+    def setUp(self):
+        self.employer  = make_employer()
+        self.candidate = make_candidate(location={'lat': 27.7172, 'lng': 85.3240})   # Kathmandu
+        self.near = make_job(self.employer, admin_review=False,
+                             map_location={'lat': 27.6588, 'lng': 85.3247})   # Lalitpur, ~6.5 km
+        self.far  = make_job(self.employer, admin_review=False,
+                             map_location={'lat': 28.2096, 'lng': 83.9856})   # Pokhara, ~140 km
+        self.none = make_job(self.employer, admin_review=False, map_location={})
+
+    def test_coordinates_follow_the_json_location(self):
+        self.assertEqual((self.candidate.lat, self.candidate.lng), (27.7172, 85.3240))
+        self.assertEqual((self.none.lat, self.none.lng), (None, None))
+        self.near.map_location = {'lat': 91, 'lng': 0}
+        self.near.save()
+        self.assertEqual(JobPost.objects.values_list('lat', flat=True).get(pk=self.near.pk), None)
+
+    def test_within_km_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(60):
+            make_job(self.employer, map_location={
+                'lat': rng.uniform(-89.9, 89.9), 'lng': rng.choice([rng.uniform(-180, 180), rng.uniform(175, 180)]),
+            })
+        points = [(27.7, 85.3), (0.0, 179.9), (0.0, -179.9), (89.5, 10.0), (-60.0, 0.0)]
+        for lat, lng in points:
+            for km in (50, 500, 5000):
+                got   = dict(within_km(JobPost.objects.all(), lat, lng, km).values_list('pk', 'distance_km'))
+                brute = {
+                    job.pk: haversine_many(lat, lng, job.lat, job.lng)
+                    for job in JobPost.objects.exclude(lat=None)
+                }
+                brute = {pk: d for pk, d in brute.items() if d <= km}
+                with self.subTest(lat=lat, lng=lng, km=km):
+                    self.assertEqual(set(got), set(brute))
+                    for pk, d in brute.items():
+                        self.assertAlmostEqual(got[pk], d, places=6)
+
+    def test_jobs_list_within_radius(self):
+        session = self.client.session
+        session['candidate_id'] = self.candidate.candidate_id
+        session.save()
+
+        resp = self.client.get(reverse('index:jobs_list'))
+        self.assertEqual(len(resp.context['jobs']), 3)
+        self.assertContains(resp, 'withinSelect')
+
+        resp = self.client.get(reverse('index:jobs_list'), {'within': 10})
+        self.assertEqual([j.pk for j in resp.context['jobs']], [self.near.pk])
+        self.assertAlmostEqual(resp.context['jobs'][0].distance_km, 6.5, delta=0.2)
+
+        resp = self.client.get(reverse('index:jobs_list'), {'within': 7})   # not an offered radius
+        self.assertEqual(len(resp.context['jobs']), 3)
+
+    def test_bounding_box_uses_the_latlng_index(self):
+        qs = JobPost.objects.filter(bounding_box(27.7, 85.3, 25)).values_list('pk', 'lat', 'lng')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + str(qs.query))
+            plan = ' '.join(row[3] for row in cursor.fetchall())
+        self.assertIn('job_latlng_idx', plan)
+
+    def test_sync_coordinates_backfills(self):
+        JobPost.objects.update(lat=None, lng=None)
+        call_command('sync_coordinates', stdout=StringIO())
+        self.assertEqual(JobPost.objects.filter(lat__isnull=False).count(), 2)
+
+
+class TopKTests(TestCase):
+
+    def test_matches_a_full_sort(self):
+        rng = np.random.default_rng(3)
+        for n, k in [(0, 5), (5, 10), (50, 7), (1000, 200), (200, 200)]:
+            scores = rng.integers(0, 20, n).astype(float)   # plenty of ties
+            scores[rng.random(n) < 0.2] = -np.inf           # unscored entries
+            ids    = rng.permutation(n)
+            expected = sorted(
+                (i for i in range(n) if np.isfinite(scores[i])),
+                key=lambda i: (-scores[i], ids[i]),
+            )[:k]
+            with self.subTest(n=n, k=k):
+                self.assertEqual(top_k(scores, k, ids=ids).tolist(), expected)
+
+    def test_defaults_to_index_tie_break(self):
+        self.assertEqual(top_k([1.0, 3.0, 3.0, np.nan, 2.0], 3).tolist(), [1, 2, 4])
+        self.assertEqual(top_k([1.0], 0).tolist(), [])
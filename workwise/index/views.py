@@ -1,20 +1,28 @@
 
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from employer_profile.models import JobPost
-from django.core.paginator import Paginator
-from rapidfuzz import fuzz
 from django.utils.safestring import mark_safe
 import json
 from django.utils import timezone
 from candidate_profile.models import SavedJob
+from django.core.files.base import ContentFile
+from django.db import transaction
 from django.db.models   import Q
-from django.db.models import Count
 from datetime import date
 from django.urls import reverse
-from django.core.mail import send_mail
+from taskqueue.mail import queue_mail
 from authentication.models import Candidate
 from candidate_profile.models import JobApplication
 from candidate_profile.models import CandidateCV
+from employer_profile.utils.ranking import store_scores
+from .search import search_jobs
+from . import fulltext
+from .rollups import home_categories
+from utils.cache import get_or_compute, versioned_key
+from utils.pagination import KeysetPage, KeysetPaginator
+from utils.geo import RADIUS_CHOICES, parse_radius, within_km
+from utils.sqlite import retry_on_locked
 
 INDUSTRIES = [
   'information_technology','management','business','finance','healthcare','education',
@@ -67,39 +75,8 @@ WORK_TYPES = ['part_time','full_time','contract','internship']
 
 
 def home(request):
-    base_qs = JobPost.objects.filter(is_active=True, admin_review=False)
-
-    # Top 8 industries by job count
-    industry_counts = (
-        base_qs
-        .values('industry')
-        .annotate(count=Count('industry'))
-        .order_by('-count')[:8]
-    )
-    industries_list = [
-        {
-            'slug':   item['industry'],
-            'title':  item['industry'].replace('_',' ').title(),
-            'count':  item['count']
-        }
-        for item in industry_counts
-    ]
-
-    # Top 8 departments by job count
-    dept_counts = (
-        base_qs
-        .values('department')
-        .annotate(count=Count('department'))
-        .order_by('-count')[:8]
-    )
-    departments_list = [
-        {
-            'slug':   item['department'],
-            'title':  item['department'].replace('_',' ').title(),
-            'count':  item['count']
-        }
-        for item in dept_counts
-    ]
+    # Top 8 industries and departments by listed-job count (cached)
+    industries_list, departments_list = home_categories()
 
     return render(request, 'index/index.html', {
         'industries_list': industries_list,
@@ -130,8 +107,14 @@ def job_list(request):
     print(saved_job_ids)
     # Default (GET): show latest posts
     if request.method != 'POST':
-        newest = qs.order_by('-posted_at')
-        page   = Paginator(newest, PAGE_SIZE).get_page(request.GET.get('page'))
+        # optional "within N km" of the candidate's saved location
+        origin     = Candidate.objects.filter(pk=candidate_id).values_list('lat', 'lng').first() if candidate_id else None
+        has_origin = bool(origin) and origin[0] is not None
+        radius     = parse_radius(request.GET.get('within')) if has_origin else None
+        if radius:
+            qs = within_km(qs, *origin, radius)
+
+        page = KeysetPaginator(qs, ['-posted_at', '-job_id'], PAGE_SIZE).get_page(request.GET.get('cursor'))
         return render(request, 'index/jobs_list.html', {
             'jobs': page,
             'industries': [(i, i.replace('_',' ').title()) for i in INDUSTRIES],
@@ -139,6 +122,9 @@ def job_list(request):
             'departments_json': mark_safe(json.dumps(DEPARTMENTS)),
             'filtered': False,
             'saved_job_ids': saved_job_ids,
+            'has_origin': has_origin,
+            'radius': radius,
+            'radius_choices': RADIUS_CHOICES,
         })
 
     # Extract and trim filters
@@ -151,7 +137,7 @@ def job_list(request):
     # Must fill all
     if not all([title, industry, dept, wtype, location]):
         return render(request, 'index/jobs_list.html', {
-            'jobs': Paginator([], PAGE_SIZE).get_page(1),
+            'jobs': KeysetPage([]),
             'industries': [(i, i.replace('_',' ').title()) for i in INDUSTRIES],
             'work_types': [(w, w.replace('_',' ').title()) for w in WORK_TYPES],
             'departments_json': mark_safe(json.dumps(DEPARTMENTS)),
@@ -159,54 +145,11 @@ def job_list(request):
             'error_message': 'Please fill in all filter fields.'
         })
 
-    # Prepare buckets
-    bucket1, bucket2, bucket3, bucket4 = [], [], [], []
-
-    now = timezone.now()
-    for job in qs:
-        # Exact matches
-        m_ind  = job.industry   == industry
-        m_dept = job.department == dept
-        m_wt   = job.work_type  == wtype
-        exact_count = sum([m_ind, m_dept, m_wt])
-
-        # Fuzzy matches
-        loc_score   = fuzz.token_sort_ratio(location.lower(),
-                                            job.full_location_address.lower())
-        title_score = fuzz.token_sort_ratio(title.lower(),
-                                            job.title.lower())
-
-        fuzz_count = ((loc_score   >= 80) + 
-                      (title_score >= 60))
-
-        # Recency score (0–1; 1 = just posted, 0 = ≥30 days old)
-        days_old     = (now - job.posted_at).days
-        recency_score = max(0, (30 - days_old) / 30)
-
-        # Bucket logic:
-        if exact_count == 3 and loc_score >= 80 and title_score >= 60:
-            bucket1.append((recency_score, job))
-        elif exact_count == 3 and title_score >= 60:
-            bucket2.append((recency_score, job))
-        elif exact_count == 3:
-            bucket3.append((recency_score, job))
-        elif exact_count + fuzz_count >= 2:
-            bucket4.append((recency_score, job))
-        # else: discard jobs with <2 total matches
-
-    # Within each bucket, sort by recency (desc)
-    def sort_bucket(b): 
-        return [job for _, job in sorted(b, key=lambda x: x[0], reverse=True)]
-
-    final_jobs = (
-        sort_bucket(bucket1) +
-        sort_bucket(bucket2) +
-        sort_bucket(bucket3) +
-        sort_bucket(bucket4)
-    )
+    # Exact filters in SQL, trigram shortlist, then fuzzy buckets
+    final_jobs = search_jobs(qs, title, industry, dept, wtype, location, timezone.now())
 
-    # Paginate
-    page = Paginator(final_jobs, PAGE_SIZE).get_page(request.GET.get('page'))
+    # Best matches only; the filters come from a POST, so there is no next page to link to
+    page = KeysetPage(final_jobs[:PAGE_SIZE], counted=final_jobs)
 
     return render(request, 'index/jobs_list.html', {
         'jobs': page,
@@ -239,20 +182,25 @@ def explore_jobs(request, filter_type, keyword):
     elif filter_type == 'title':
         # keyword might be slugified: replace hyphens/underscores with spaces
         text = keyword.replace('-', ' ').replace('_',' ')
-        qs = base_qs.filter(title__icontains=text)
+        qs = fulltext.filter_jobs(base_qs, text, column='title')
     else:
         qs = base_qs.none()
 
     display_label = keyword.replace('_',' ').replace('-',' ').title()
 
-    # 2) Search within these results
+    # 2) Full-text search within these results
     search = request.GET.get('q','').strip()
+    order  = request.GET.get('order', 'newest')
     if search:
-        qs = qs.filter(title__icontains=search)
+        qs = fulltext.filter_jobs(qs, search)
 
-    # 3) Order & paginate
-    qs = qs.order_by('-posted_at')
-    page_obj = Paginator(qs, 25).get_page(request.GET.get('page'))
+    # 3) Order & paginate (keyset on the sort key, so deep pages stay cheap)
+    ordering = ['-posted_at', '-job_id']
+    if search and order == 'relevance':
+        qs = fulltext.order_by_relevance(qs, search)
+        if 'relevance' in qs.query.annotations:
+            ordering = ['relevance', *ordering]
+    page_obj = KeysetPaginator(qs, ordering, 25).get_page(request.GET.get('cursor'))
 
     # 4) Saved‐job IDs for current candidate
     cid = request.session.get('candidate_id')
@@ -270,6 +218,7 @@ def explore_jobs(request, filter_type, keyword):
         'filter_type': filter_type,
         'display_label': display_label,
         'search_keyword': search,
+        'order': order,
         'saved_job_ids': saved_ids,
         'keyword': keyword,
     })
@@ -280,6 +229,24 @@ def explore_jobs(request, filter_type, keyword):
 
 
 
+JOB_DETAIL_TTL = 5 * 60   # seconds; job/company edits bump the job's cache group
+
+
+def listed_job(job_id):
+    """The listed JobPost (with company profile) or None, cached per job version."""
+    return get_or_compute(
+        versioned_key(f'job_detail:{job_id}', f'job:{job_id}'),
+        lambda: (
+            JobPost.objects
+            .select_related('employer__company_profile')
+            .filter(job_id=job_id, is_active=True, admin_review=False)
+            .first()
+        ),
+        JOB_DETAIL_TTL,
+    )
+
+
+@retry_on_locked
 def job_details(request, job_id):
     # require candidate
     cid = request.session.get('candidate_id')
@@ -293,10 +260,9 @@ def job_details(request, job_id):
     except CandidateCV.DoesNotExist:
         has_cv = False
 
-    job = get_object_or_404(
-        JobPost.objects.select_related('employer__company_profile'),
-        job_id=job_id, is_active=True, admin_review=False
-    )
+    job = listed_job(job_id)
+    if job is None:
+        raise Http404('No JobPost matches the given query.')
 
     has_applied = JobApplication.objects.filter(candidate=candidate, job=job).exists()
     error = None
@@ -311,12 +277,15 @@ def job_details(request, job_id):
         elif f.size > 2*1024*1024:
             error = 'File too large (max 2MB).'
         else:
-            app = JobApplication.objects.create(
-                candidate=candidate,
-                job=job,
-                cover_letter=f
-            )
-            send_mail(
+            app    = JobApplication.objects.create(candidate=candidate, job=job)
+            letter = ContentFile(f.read(), name=f.name)
+
+            def attach_and_score():
+                # after commit, so a retried attempt neither stores a second file nor rescores
+                app.cover_letter.save(letter.name, letter)
+                store_scores(job, [app])
+            transaction.on_commit(attach_and_score)
+            queue_mail(
                 f"Application Received: {job.title}",
                 f"Hi {candidate.first_name},\n\n"
                 f"You’ve applied for “{job.title}”.\n"
@@ -0,0 +1,30 @@
+// "Load more" for keyset-paginated lists (templates/includes/keyset_pagination.html):
+// fetch the next page, append its items to the list and swap in its pagination links.
+document.addEventListener('click', function (e) {
+  var link = e.target.closest('[data-load-more]');
+  if (!link) return;
+  e.preventDefault();
+
+  var list  = document.querySelector(link.dataset.loadMore);
+  var links = link.closest('.pagination');
+  link.classList.add('loading');
+
+  fetch(link.href, { credentials: 'same-origin' })
+    .then(function (resp) { return resp.text(); })
+    .then(function (html) {
+      var doc   = new DOMParser().parseFromString(html, 'text/html');
+      var items = doc.querySelector(link.dataset.loadMore);
+      if (items) list.append.apply(list, Array.from(items.children));
+
+      var next = doc.querySelector('.pagination [data-load-more]');
+      if (next) {
+        links.replaceWith(next.closest('.pagination'));
+      } else {
+        links.remove();
+      }
+    })
+    .catch(function () {
+      // fall back to a normal page load
+      window.location = link.href;
+    });
+});
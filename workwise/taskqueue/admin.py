@@ -0,0 +1,20 @@
+from django.contrib import admin
+from .models import OutboxEmail, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display  = ('id', 'name', 'status', 'attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter   = ('status', 'name')
+    search_fields = ('name', 'key', 'last_error')
+    readonly_fields = ('created_at', 'finished_at')
+    date_hierarchy = 'created_at'
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display  = ('id', 'subject', 'status', 'attempts', 'send_after', 'sent_at')
+    list_filter   = ('status',)
+    search_fields = ('subject', 'to', 'last_error')
+    readonly_fields = ('created_at', 'sent_at')
+    date_hierarchy = 'created_at'
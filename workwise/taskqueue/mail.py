@@ -0,0 +1,111 @@
+# taskqueue/mail.py
+
+import logging
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .queue import backoff, enqueue
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+LEASE      = timedelta(minutes=5)   # a batch not finished by then is picked up again
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """
+    Drop-in for send_mail() from a view: store the message in the outbox
+    and let the worker deliver it. Returns the OutboxEmail row.
+    """
+    email = OutboxEmail.objects.create(
+        subject    = subject,
+        body       = message,
+        from_email = from_email or '',
+        to         = list(recipient_list),
+    )
+    enqueue('taskqueue.deliver_outbox', key='deliver_outbox')
+    return email
+
+
+def queue_mass_mail(messages):
+    """Queue many (subject, message, from_email, recipient_list) tuples at once."""
+    rows = OutboxEmail.objects.bulk_create([
+        OutboxEmail(subject=s, body=m, from_email=f or '', to=list(r))
+        for s, m, f, r in messages
+    ])
+    if rows:
+        enqueue('taskqueue.deliver_outbox', key='deliver_outbox')
+    return rows
+
+
+def _claim_batch(limit):
+    now   = timezone.now()
+    ready = Q(status='queued', send_after__lte=now) | Q(status='sending', locked_until__lt=now)
+    ids   = list(
+        OutboxEmail.objects.filter(ready).order_by('send_after', 'pk').values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    batch = uuid.uuid4().hex
+    OutboxEmail.objects.filter(pk__in=ids).filter(ready).update(
+        status='sending', batch=batch, locked_until=now + LEASE, attempts=F('attempts') + 1,
+    )
+    return list(OutboxEmail.objects.filter(batch=batch, status='sending').order_by('pk'))
+
+
+def _retry_later(email, error):
+    if email.attempts >= email.max_attempts:
+        status, send_after = 'failed', email.send_after
+    else:
+        status, send_after = 'queued', timezone.now() + backoff(email.attempts)
+    # a lost lease (another worker re-claimed the row) makes this a no-op
+    OutboxEmail.objects.filter(pk=email.pk, batch=email.batch).update(
+        status=status, send_after=send_after, last_error=error, batch='',
+    )
+
+
+def deliver_outbox(batch_size=BATCH_SIZE):
+    """
+    Send queued emails over one SMTP connection per batch. A message that
+    fails is rescheduled with backoff without holding up the rest.
+    Returns the number of emails sent.
+    """
+    sent = 0
+    while True:
+        emails = _claim_batch(batch_size)
+        if not emails:
+            return sent
+
+        try:
+            connection = get_connection()
+            connection.open()
+        except Exception as e:
+            logger.warning("Outbox: could not connect to the mail server: %s", e)
+            for email in emails:
+                _retry_later(email, f"connect: {e}")
+            return sent
+
+        try:
+            for email in emails:
+                msg = EmailMessage(
+                    email.subject, email.body, email.from_email or None, email.to,
+                    connection=connection,
+                )
+                try:
+                    # the connection is already open, so this reuses it
+                    connection.send_messages([msg])
+                except Exception as e:
+                    logger.warning("Outbox: sending email %s failed: %s", email.pk, e)
+                    _retry_later(email, str(e))
+                    continue
+                OutboxEmail.objects.filter(pk=email.pk, batch=email.batch).update(
+                    status='sent', sent_at=timezone.now(), batch='', last_error='',
+                )
+                sent += 1
+        finally:
+            connection.close()
@@ -0,0 +1,34 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from taskqueue.queue import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks (emails, CV parsing, re-ranking, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Tasks run at the same time.")
+        parser.add_argument('--mode', choices=('thread', 'process'), default='thread',
+                            help="Run tasks on a thread pool (I/O-bound) or process pool (CPU-bound).")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency   = options['concurrency'],
+            mode          = options['mode'],
+            poll_interval = options['poll_interval'],
+        )
+
+        def stop(signum, frame):
+            self.stdout.write("Finishing running tasks, then exiting...")
+            worker.stopping.set()
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Worker {worker.worker_id} started ({worker.concurrency} {worker.mode}s)."
+        ))
+        worker.run(once=options['once'])
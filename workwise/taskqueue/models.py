@@ -0,0 +1,66 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """One unit of background work, claimed and run by `manage.py run_worker`."""
+    STATUS_CHOICES = [
+        ('queued',  'Queued'),
+        ('running', 'Running'),
+        ('done',    'Done'),
+        ('failed',  'Failed'),
+    ]
+    name         = models.CharField(max_length=100)
+    args         = models.JSONField(default=list, blank=True)
+    kwargs       = models.JSONField(default=dict, blank=True)
+    key          = models.CharField(max_length=200, blank=True, db_index=True)   # dedupe key
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts     = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    timeout      = models.PositiveIntegerField(default=300)   # visibility timeout, seconds
+    run_at       = models.DateTimeField(default=timezone.now)
+    locked_by    = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error   = models.TextField(blank=True)
+    created_at   = models.DateTimeField(auto_now_add=True)
+    finished_at  = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_ready_idx'),
+            models.Index(fields=['status', 'locked_until'], name='task_expired_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class OutboxEmail(models.Model):
+    """An email waiting to be delivered by the outbox worker."""
+    STATUS_CHOICES = [
+        ('queued',  'Queued'),
+        ('sending', 'Sending'),
+        ('sent',    'Sent'),
+        ('failed',  'Failed'),
+    ]
+    subject      = models.CharField(max_length=255)
+    body         = models.TextField()
+    from_email   = models.CharField(max_length=254, blank=True)   # blank = DEFAULT_FROM_EMAIL
+    to           = models.JSONField(default=list)
+    status       = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts     = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    send_after   = models.DateTimeField(default=timezone.now)
+    batch        = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error   = models.TextField(blank=True)
+    created_at   = models.DateTimeField(auto_now_add=True)
+    sent_at      = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after'], name='outbox_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
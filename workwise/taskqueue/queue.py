@@ -0,0 +1,222 @@
+# taskqueue/queue.py
+
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 10        # seconds before the first retry
+BACKOFF_MAX  = 60 * 60   # never wait more than an hour between attempts
+
+_registry = {}
+
+
+def task(name=None, max_attempts=5, timeout=300):
+    """
+    Register a function as a background task. It must take JSON-able
+    arguments; enqueue it with `enqueue(func, *args, **kwargs)`.
+    """
+    def decorator(func):
+        func.task_name = name or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        func.task_opts = {'max_attempts': max_attempts, 'timeout': timeout}
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, *args, key='', run_at=None, **kwargs):
+    """
+    Queue `func(*args, **kwargs)` for a worker. The row is written in the
+    caller's transaction, so the task only becomes visible if it commits.
+    With a `key`, an identical task still waiting in the queue is reused.
+    """
+    name = getattr(func, 'task_name', func)
+    opts = getattr(_registry.get(name), 'task_opts', {})
+
+    if key:
+        existing = Task.objects.filter(key=key, status='queued').first()
+        if existing is not None:
+            return existing
+
+    t = Task.objects.create(
+        name         = name,
+        args         = list(args),
+        kwargs       = kwargs,
+        key          = key,
+        run_at       = run_at or timezone.now(),
+        max_attempts = opts.get('max_attempts', 5),
+        timeout      = opts.get('timeout', 300),
+    )
+    if getattr(settings, 'TASKS_EAGER', False):
+        transaction.on_commit(lambda: execute(t.pk, 'eager'))
+    return t
+
+
+def backoff(attempts):
+    """Exponential delay with jitter before retry number `attempts`."""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return timedelta(seconds=delay * random.uniform(1.0, 1.25))
+
+
+def _ready(now):
+    # queued and due, or claimed by a worker whose lease ran out
+    return Q(status='queued', run_at__lte=now) | Q(status='running', locked_until__lt=now)
+
+
+def _lease(pk, timeout, worker_id, now, **extra):
+    return Task.objects.filter(pk=pk).filter(_ready(now)).update(
+        status='running', locked_by=worker_id,
+        locked_until=now + timedelta(seconds=timeout), **extra,
+    )
+
+
+def claim(worker_id, limit=1):
+    """
+    Lease up to `limit` ready tasks for this worker. Rows are locked with
+    SELECT ... FOR UPDATE SKIP LOCKED where the database supports it;
+    elsewhere (SQLite) each row is taken with a compare-and-set UPDATE.
+    """
+    now = timezone.now()
+    ready = (
+        Task.objects
+        .filter(_ready(now))
+        .order_by('run_at', 'pk')
+        .values_list('pk', 'timeout')
+    )
+
+    claimed = []
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            for pk, timeout in ready.select_for_update(skip_locked=True)[:limit]:
+                _lease(pk, timeout, worker_id, now, attempts=F('attempts') + 1)
+                claimed.append(pk)
+        return claimed
+
+    for pk, timeout in ready[:limit * 4]:
+        if _lease(pk, timeout, worker_id, now, attempts=F('attempts') + 1):
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def execute(pk, worker_id):
+    """Run one leased task and record the outcome. Returns the final status."""
+    t    = Task.objects.get(pk=pk)
+    mine = Task.objects.filter(pk=pk, status='running', locked_by=worker_id)
+    if worker_id == 'eager':
+        mine = Task.objects.filter(pk=pk, status='queued')
+        t.attempts += 1
+
+    try:
+        func = _registry[t.name]
+        func(*t.args, **t.kwargs)
+    except Exception as e:
+        logger.warning("Task %s #%s failed (attempt %s): %s", t.name, pk, t.attempts, e)
+        if t.attempts >= t.max_attempts:
+            status, run_at = 'failed', t.run_at
+        else:
+            status, run_at = 'queued', timezone.now() + backoff(t.attempts)
+        # a lost lease (another worker re-claimed the row) makes this a no-op
+        mine.update(
+            status=status, run_at=run_at, attempts=t.attempts,
+            locked_by='', locked_until=None, last_error=traceback.format_exc(),
+            finished_at=timezone.now() if status == 'failed' else None,
+        )
+        return status
+
+    mine.update(
+        status='done', attempts=t.attempts, locked_by='', locked_until=None,
+        last_error='', finished_at=timezone.now(),
+    )
+    return 'done'
+
+
+def _execute_in_pool(pk, worker_id):
+    close_old_connections()
+    try:
+        return execute(pk, worker_id)
+    finally:
+        close_old_connections()
+
+
+def _init_process():
+    # spawned children start from scratch, so set Django up again
+    django.setup()
+
+
+class Worker:
+    """
+    Polls the Task table and runs leased tasks on a thread or process pool,
+    extending each lease while the task is still running.
+    """
+
+    def __init__(self, concurrency=4, mode='thread', poll_interval=1.0, worker_id=None):
+        self.concurrency   = concurrency
+        self.mode          = mode
+        self.poll_interval = poll_interval
+        self.worker_id     = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping      = threading.Event()
+
+    def _pool(self):
+        if self.mode == 'process':
+            return ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_process,
+            )
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='task')
+
+    def _heartbeat(self, inflight):
+        now = timezone.now()
+        for fut, (pk, timeout, renew_at) in list(inflight.items()):
+            if now >= renew_at:
+                Task.objects.filter(pk=pk, status='running', locked_by=self.worker_id).update(
+                    locked_until=now + timedelta(seconds=timeout),
+                )
+                inflight[fut] = (pk, timeout, now + timedelta(seconds=timeout / 2))
+
+    def run(self, once=False):
+        """Work until stopped (or, with `once`, until the queue is drained)."""
+        inflight = {}
+        with self._pool() as pool:
+            while not self.stopping.is_set():
+                free    = self.concurrency - len(inflight)
+                claimed = claim(self.worker_id, free) if free else []
+                if claimed:
+                    timeouts = dict(Task.objects.filter(pk__in=claimed).values_list('pk', 'timeout'))
+                    for pk in claimed:
+                        fut = pool.submit(_execute_in_pool, pk, self.worker_id)
+                        renew_at = timezone.now() + timedelta(seconds=timeouts[pk] / 2)
+                        inflight[fut] = (pk, timeouts[pk], renew_at)
+                elif once and not inflight:
+                    break
+
+                if inflight:
+                    done, _ = wait(inflight, timeout=0 if claimed else self.poll_interval,
+                                   return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        inflight.pop(fut)
+                        if fut.exception():
+                            logger.error("Worker pool error: %s", fut.exception())
+                    self._heartbeat(inflight)
+                elif not claimed:
+                    time.sleep(self.poll_interval)
+
+            wait(inflight)
@@ -0,0 +1,7 @@
+from .mail import deliver_outbox as _deliver_outbox
+from .queue import task
+
+
+@task(timeout=600)
+def deliver_outbox():
+    _deliver_outbox()
@@ -0,0 +1,172 @@
+import sqlite3
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db.backends.sqlite3.base import SQLiteCursorWrapper
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from utils.sqlite import is_locked
+from .mail import deliver_outbox, queue_mail, queue_mass_mail
+from .models import OutboxEmail, Task
+from .queue import Worker, claim, enqueue, execute, task
+
+calls = []
+
+
+@task(name='taskqueue.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='taskqueue.tests.flaky', max_attempts=2)
+def flaky():
+    raise RuntimeError('boom')
+
+
+class QueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_run_and_finish(self):
+        t = enqueue(record, 'a')
+        self.assertEqual(claim('w1', 5), [t.pk])
+        self.assertEqual(claim('w2', 5), [])          # leased to w1
+
+        self.assertEqual(execute(t.pk, 'w1'), 'done')
+        t.refresh_from_db()
+        self.assertEqual((t.status, t.attempts, calls), ('done', 1, ['a']))
+
+    def test_failures_back_off_then_give_up(self):
+        t = enqueue(flaky)
+        claim('w1')
+        self.assertEqual(execute(t.pk, 'w1'), 'queued')
+        t.refresh_from_db()
+        self.assertGreater(t.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertIn('boom', t.last_error)
+        self.assertEqual(claim('w1'), [])             # not due yet
+
+        Task.objects.filter(pk=t.pk).update(run_at=timezone.now())
+        claim('w1')
+        self.assertEqual(execute(t.pk, 'w1'), 'failed')
+
+    def test_expired_lease_is_reclaimed(self):
+        t = enqueue(record, 'b')
+        claim('dead-worker')
+        Task.objects.filter(pk=t.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(claim('w2'), [t.pk])
+        execute(t.pk, 'dead-worker')                  # stale worker can't finish it
+        self.assertEqual(Task.objects.get(pk=t.pk).locked_by, 'w2')
+
+    def test_keyed_tasks_are_deduplicated_while_queued(self):
+        first = enqueue(record, 'c', key='same')
+        self.assertEqual(enqueue(record, 'c', key='same').pk, first.pk)
+        claim('w1')
+        self.assertNotEqual(enqueue(record, 'c', key='same').pk, first.pk)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            t = enqueue(record, 'd')
+        self.assertEqual(calls, ['d'])
+        self.assertEqual(Task.objects.get(pk=t.pk).status, 'done')
+
+
+_execute_sql = SQLiteCursorWrapper.execute
+
+
+def wait_out_table_locks(cursor, *args, **kwargs):
+    # the in-memory test database reports table locks at once instead of
+    # waiting out busy_timeout; a file database's workers would just wait
+    while True:
+        try:
+            return _execute_sql(cursor, *args, **kwargs)
+        except sqlite3.OperationalError as exc:
+            if not is_locked(exc):
+                raise
+
+
+class WorkerTests(TransactionTestCase):
+
+    @mock.patch.object(SQLiteCursorWrapper, 'execute', wait_out_table_locks)
+    def test_thread_pool_drains_queue(self):
+        calls.clear()
+        for i in range(6):
+            enqueue(record, i)
+        Worker(concurrency=3, poll_interval=0.01).run(once=True)
+
+        self.assertEqual(sorted(calls), list(range(6)))
+        self.assertFalse(Task.objects.exclude(status='done').exists())
+
+
+class FlakyBackend(EmailBackend):
+    """locmem backend that counts connections and rejects one address."""
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if any('bounce@' in r for m in messages for r in m.to):
+            raise OSError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='taskqueue.tests.FlakyBackend')
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        FlakyBackend.opened = 0
+
+    def test_views_only_queue(self):
+        queue_mail('Hi', 'Body', None, ['a@example.com'])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(Task.objects.filter(name='taskqueue.deliver_outbox', status='queued').exists())
+
+    def test_batch_shares_one_connection_and_retries_failures(self):
+        queue_mass_mail([
+            ('Hi', 'Body', None, [f'{name}@example.com'])
+            for name in ('a', 'b', 'bounce', 'c')
+        ])
+        self.assertEqual(deliver_outbox(), 3)
+        self.assertEqual(FlakyBackend.opened, 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox),
+                         ['a@example.com', 'b@example.com', 'c@example.com'])
+
+        bounced = OutboxEmail.objects.get(status='queued')
+        self.assertEqual((bounced.to, bounced.attempts), (['bounce@example.com'], 1))
+        self.assertGreater(bounced.send_after, timezone.now())
+        self.assertIn('mailbox unavailable', bounced.last_error)
+
+        # not due yet, so nothing is re-sent
+        self.assertEqual(deliver_outbox(), 0)
+
+    def test_gives_up_after_max_attempts(self):
+        email = queue_mail('Hi', 'Body', None, ['bounce@example.com'])
+        OutboxEmail.objects.filter(pk=email.pk).update(max_attempts=1)
+        deliver_outbox()
+        self.assertEqual(OutboxEmail.objects.get(pk=email.pk).status, 'failed')
+
+    def test_unreachable_server_reschedules_batch(self):
+        queue_mail('Hi', 'Body', None, ['a@example.com'])
+        with mock.patch.object(FlakyBackend, 'open', side_effect=OSError('refused')):
+            self.assertEqual(deliver_outbox(), 0)
+        self.assertEqual(OutboxEmail.objects.get().status, 'queued')
+
+    def test_failure_after_a_lost_lease_leaves_the_new_claim_alone(self):
+        email = queue_mail('Hi', 'Body', None, ['bounce@example.com'])
+
+        def reclaimed(messages):
+            # our lease ran out mid-send and another worker took the row
+            OutboxEmail.objects.filter(pk=email.pk).update(batch='other', attempts=2)
+            raise OSError('mailbox unavailable')
+
+        with mock.patch.object(FlakyBackend, 'send_messages', side_effect=reclaimed):
+            deliver_outbox()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.batch, email.last_error), ('sending', 'other', ''))
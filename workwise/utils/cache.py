@@ -0,0 +1,195 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+LOCK_TIMEOUT  = 30          # seconds a recompute may hold the lock
+WAIT_STEP     = 0.05        # seconds between polls while another caller recomputes
+GROUP_TIMEOUT = 24 * 3600   # seconds a group counter lives; longer than any versioned entry
+
+_MISSING = object()
+
+
+# — Backend: per-process LRU in front of a file cache shared by all workers —
+
+class SharedFileCache(FileBasedCache):
+    """FileBasedCache whose add() is atomic across processes (needed for locks)."""
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        fname    = self._key_to_file(key, version)
+        fd, tmp  = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            for _ in range(2):
+                try:
+                    os.link(tmp, fname)   # fails if the key already exists
+                    return True
+                except FileExistsError:
+                    if self.has_key(key, version):
+                        return False
+                    # it had expired and has_key() removed it; try once more
+            return False
+        finally:
+            os.remove(tmp)
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded LRU of pickled values with per-entry expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data       = OrderedDict()
+        self._lock       = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, blob = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(blob)
+
+    def set(self, key, value, ttl):
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, blob)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend for several workers on one box without Redis: reads hit
+    a small in-process LRU first and fall back to a file cache in LOCATION
+    that every process shares. Writes and deletes go to both tiers.
+
+    Local copies live at most LOCAL_TIMEOUT seconds, which bounds how long
+    another process can serve a value after it was deleted or replaced.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options            = params.get('OPTIONS', {})
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self._local        = LocalLRU(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self._shared       = SharedFileCache(location, params)
+
+    def _local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        value     = self._local.get(local_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = self._shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        self._local.set(local_key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        local_key = self.make_and_validate_key(key, version)
+        self._shared.set(key, value, timeout, version)
+        if timeout is not None and timeout != DEFAULT_TIMEOUT and timeout <= 0:
+            self._local.delete(local_key)
+        else:
+            self._local.set(local_key, value, self._local_ttl(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # always decided by the shared tier so it works as a cross-process lock
+        if not self._shared.add(key, value, timeout, version):
+            return False
+        self._local.set(self.make_and_validate_key(key, version), value, self._local_ttl(timeout))
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self._local.delete(self.make_and_validate_key(key, version))
+        return self._shared.delete(key, version)
+
+    def clear(self):
+        self._local.clear()
+        self._shared.clear()
+
+
+# — Versioned keys: bump a group to invalidate every key built from it —
+
+def _group_key(group):
+    return f"group:{group}"
+
+
+def group_version(group):
+    version = cache.get(_group_key(group))
+    if version is None:
+        # an expired counter restarts at a fresh version, so it only costs misses
+        cache.add(_group_key(group), time.time_ns(), GROUP_TIMEOUT)
+        version = cache.get(_group_key(group))
+    return version
+
+
+def versioned_key(key, *groups):
+    """`key` tagged with the current version of each group, e.g. ('job_detail:7', 'job:7')."""
+    return ':'.join([key, *(f"{g}@{group_version(g)}" for g in groups)])
+
+
+def bump_groups(*groups):
+    """Invalidate every versioned key built from these groups; old entries just expire."""
+    for group in groups:
+        cache.set(_group_key(group), time.time_ns(), GROUP_TIMEOUT)
+
+
+# — Single-flight recompute —
+
+def get_or_compute(key, compute, timeout, wait=2.0):
+    """
+    cache.get(key), calling compute() on a miss. Only the caller that wins
+    the lock recomputes; concurrent callers poll for its result (for up to
+    `wait` seconds) instead of all hitting the database at once.
+    """
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock = f"{key}:lock"
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+            return value
+        finally:
+            cache.delete(lock)
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_STEP)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    # the recompute is slow or died; don't keep the request waiting
+    return compute()
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+
+RADIUS_CHOICES = [5, 10, 25, 50, 100, 200]   # km offered by the "within" filters
+
+
+def parse_radius(value):
+    """A km value from RADIUS_CHOICES (e.g. a ?within= param), else None."""
+    try:
+        km = int(value)
+    except (TypeError, ValueError):
+        return None
+    return km if km in RADIUS_CHOICES else None
+
+
+def coords(loc):
+    """(lat, lng) floats from a {'lat': .., 'lng': ..} dict, or (None, None)."""
+    if not isinstance(loc, dict):
+        return None, None
+    lat, lng = loc.get('lat'), loc.get('lng')
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None, None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None, None
+    return float(lat), float(lng)
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """Vectorised haversine: km from one point to arrays of points."""
+    rlat1, rlng1 = np.radians(lat), np.radians(lng)
+    rlat2, rlng2 = np.radians(lats), np.radians(lngs)
+    dlat, dlng = rlat2 - rlat1, rlng2 - rlng1
+    a = np.sin(dlat/2)**2 + np.cos(rlat1)*np.cos(rlat2)*np.sin(dlng/2)**2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def bounding_box(lat, lng, km):
+    """Q on `lat`/`lng` columns for the box around a km circle (a superset of it)."""
+    dlat     = math.degrees(km / EARTH_RADIUS_KM)
+    cos_lat  = math.cos(math.radians(lat))
+    dlng     = 180.0 if cos_lat < 1e-9 else math.degrees(km / (EARTH_RADIUS_KM * cos_lat))
+    box      = Q(lat__gte=max(lat - dlat, -90.0), lat__lte=min(lat + dlat, 90.0))
+    if lat + dlat >= 90 or lat - dlat <= -90 or dlng >= 180:
+        return box   # the circle reaches a pole: every longitude
+    west, east = lng - dlng, lng + dlng
+    if west < -180:
+        return box & (Q(lng__gte=west + 360) | Q(lng__lte=east))
+    if east > 180:
+        return box & (Q(lng__gte=west) | Q(lng__lte=east - 360))
+    return box & Q(lng__gte=west, lng__lte=east)
+
+
+def distance_km(lat, lng):
+    """Haversine distance in km from (lat, lng) to a row's `lat`/`lng` columns, as an expression."""
+    rlat, rlng = math.radians(lat), math.radians(lng)
+    dlat = Radians(F('lat')) - rlat
+    dlng = Radians(F('lng')) - rlng
+    a = Power(Sin(dlat / 2), 2) + math.cos(rlat) * Cos(Radians(F('lat'))) * Power(Sin(dlng / 2), 2)
+    # rounding can push sqrt(a) a hair past 1
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0)))
+
+
+def within_km(qs, lat, lng, km):
+    """
+    qs narrowed to rows within `km` of (lat, lng), each annotated with its
+    `distance_km`. The bounding box keeps the scan on the indexed lat/lng
+    columns; the exact distance is only evaluated for the rows inside it.
+    """
+    return (
+        qs.filter(bounding_box(lat, lng, km))
+        .annotate(distance_km=distance_km(lat, lng))
+        .filter(distance_km__lte=km)
+    )
@@ -0,0 +1,130 @@
+from datetime import date, datetime
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+COUNT_CAP = 1000   # approx_count stops counting here ("1000+")
+
+_SALT = 'utils.pagination'
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated list. Iterates like a Django Page, but
+    links to its neighbours through opaque cursors instead of page numbers.
+    """
+
+    def __init__(self, object_list, next_cursor=None, prev_cursor=None, counted=None):
+        self.object_list  = list(object_list)
+        self.next_cursor  = next_cursor
+        self.prev_cursor  = prev_cursor
+        self.has_next     = next_cursor is not None
+        self.has_previous = prev_cursor is not None
+        self._counted     = object_list if counted is None else counted
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @cached_property
+    def approx_count(self):
+        """Total rows, but stops counting at COUNT_CAP (see count_capped)."""
+        if hasattr(self._counted, 'query'):
+            return self._counted.order_by()[:COUNT_CAP].count()
+        return min(len(self._counted), COUNT_CAP)
+
+    @property
+    def count_capped(self):
+        return self.approx_count >= COUNT_CAP
+
+
+class KeysetPaginator:
+    """
+    Paginate `queryset` by `ordering` (e.g. '-posted_at', '-job_id') using
+    WHERE (key) after/before the cursor row rather than COUNT(*) + OFFSET,
+    so page N costs the same as page 1. The primary key is appended as a
+    tie-breaker when `ordering` doesn't already end in it. Ordering fields
+    may be annotations but must not be NULL.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields   = [(f.lstrip('-'), f.startswith('-')) for f in ordering]
+
+        pk = queryset.model._meta.pk.name
+        if self.fields[-1][0] not in ('pk', pk):
+            self.fields.append((pk, self.fields[-1][1]))
+
+    # — Cursors —
+
+    def _encode(self, row, direction):
+        values = []
+        for name, _ in self.fields:
+            value = getattr(row, name)
+            values.append(value.isoformat() if isinstance(value, (date, datetime)) else value)
+        return signing.dumps([direction, values], salt=_SALT, compress=True)
+
+    def _decode(self, cursor):
+        """(direction, key values) from a cursor; a bad or missing one means page 1."""
+        try:
+            direction, values = signing.loads(cursor, salt=_SALT)
+            if direction not in ('next', 'prev') or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            return direction, [self._to_python(name, v) for (name, _), v in zip(self.fields, values)]
+        except (signing.BadSignature, TypeError, ValueError):
+            return 'next', None
+
+    def _to_python(self, name, value):
+        try:
+            field = self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value   # annotation; JSON round-trips numbers as-is
+        return field.to_python(value)
+
+    # — Queries —
+
+    def _order_by(self, backwards):
+        return [f"{'-' if desc != backwards else ''}{name}" for name, desc in self.fields]
+
+    def _beyond(self, values, backwards):
+        """Rows strictly after `values` in (possibly reversed) page order."""
+        cond = Q()
+        for i, (name, desc) in enumerate(self.fields):
+            lookup = 'lt' if desc != backwards else 'gt'
+            equal  = {n: v for (n, _), v in zip(self.fields[:i], values[:i])}
+            cond  |= Q(**equal, **{f'{name}__{lookup}': values[i]})
+        # redundant bound on the leading field so the database can seek an index to it
+        name, desc = self.fields[0]
+        return Q(**{f"{name}__{'lte' if desc != backwards else 'gte'}": values[0]}) & cond
+
+    def get_page(self, cursor=None):
+        direction, values = self._decode(cursor) if cursor else ('next', None)
+        backwards = direction == 'prev'
+
+        qs = self.queryset.order_by(*self._order_by(backwards))
+        if values is not None:
+            qs = qs.filter(self._beyond(values, backwards))
+
+        rows = list(qs[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, values is not None
+
+        return KeysetPage(
+            rows,
+            next_cursor=self._encode(rows[-1], 'next') if rows and has_next else None,
+            prev_cursor=self._encode(rows[0], 'prev') if rows and has_previous else None,
+            counted=self.queryset,
+        )
@@ -1,11 +1,19 @@
 import re
 import json
+from functools import lru_cache
+
 import openai
 from openai import OpenAI
 from django.conf import settings
 
 openai.api_key = settings.OPENAI_API_KEY
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+
+
+@lru_cache(maxsize=None)
+def openai_client():
+    """Shared client, built on first use so importing this module needs no API key."""
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
 
 PARSE_SCHEMA = {
     "type": "object",
@@ -49,7 +57,7 @@ def fix_newlines(obj):
 
 def parse_resume(text: str) -> dict:
     
-    resp = client.chat.completions.create(
+    resp = openai_client().chat.completions.create(
         model="gpt-4.1",
         messages=[
             {
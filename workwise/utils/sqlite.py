@@ -0,0 +1,35 @@
+import functools
+import random
+import time
+
+from django.db import OperationalError, connection, transaction
+
+WRITE_ATTEMPTS = 5      # tries per request before the error reaches the user
+BACKOFF_BASE   = 0.05   # seconds; doubled per retry, full jitter
+BACKOFF_CAP    = 1.0
+
+
+def is_locked(exc):
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def retry_on_locked(view):
+    """
+    Run a write view's POST in one transaction and retry it, with jittered
+    exponential backoff, when SQLite reports the database as locked. The
+    rollback makes the retry safe; busy_timeout has already waited by then.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or connection.in_atomic_block:
+            return view(request, *args, **kwargs)
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as exc:
+                if not is_locked(exc) or attempt == WRITE_ATTEMPTS - 1:
+                    raise
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+    return wrapper
@@ -0,0 +1,90 @@
+# utils/testing.py
+
+import re
+import tempfile
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+from authentication.models import Candidate, Employer
+from employer_profile.models import JobPost
+from taskqueue.models import Task
+
+
+def make_employer(company_name='Acme', **fields):
+    slug = re.sub(r'\W', '', company_name).lower()
+    return Employer.objects.create(**{
+        'company_name': company_name, 'representative_name': 'Rep',
+        'email': f'{slug}@example.com', 'password': 'x', **fields,
+    })
+
+
+def make_candidate(last_name='V', **fields):
+    return Candidate.objects.create(**{
+        'first_name': 'C', 'last_name': last_name,
+        'email': f'c{last_name.lower()}@example.com', 'password': 'x', **fields,
+    })
+
+
+def make_job(employer, **overrides):
+    fields = dict(
+        employer=employer,
+        contact_email='hr@example.com',
+        application_deadline=date.today() + timedelta(days=30),
+        title='Backend Developer',
+        industry='information_technology',
+        department='software_development',
+        work_type='full_time',
+        gender_requirement='no_requirement',
+        experience_min=2,
+        experience_max=5,
+        experience_level='bachelor',
+        salary_type='fixed',
+        salary_frequency='monthly',
+        salary_min=0,
+        salary_max=1000,
+        requirements=['Python', 'SQL', 'pmp', 'Bachelor'],
+        preferred_skills=['Django', 'docker', 'AWS'],
+        languages=['English', 'Nepali'],
+        benefits=['insurance'],
+        location_type='onsite',
+        full_location_address='Kathmandu',
+        description='Build and maintain python django services backed by sql databases.',
+        map_location={'lat': 27.7172, 'lng': 85.3240},
+    )
+    fields.update(overrides)
+    return JobPost.objects.create(**fields)
+
+
+def isolate_models_dir(testcase):
+    """Point ML_MODELS_DIR at an empty directory for one test."""
+    tmp = tempfile.TemporaryDirectory()
+    testcase.addCleanup(tmp.cleanup)
+    models_dir = override_settings(ML_MODELS_DIR=tmp.name)
+    models_dir.enable()
+    testcase.addCleanup(models_dir.disable)
+
+
+def drop_queued_tasks():
+    """Forget the refreshes that building a fixture queued through signals."""
+    Task.objects.all().delete()
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite against a throwaway cache directory, never the real one."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache_dir = tempfile.TemporaryDirectory()
+        self._caches    = override_settings(CACHES={
+            alias: {**conf, 'LOCATION': self._cache_dir.name}
+            for alias, conf in settings.CACHES.items()
+        })
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        self._cache_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -1,27 +1,109 @@
-
+from concurrent.futures import ProcessPoolExecutor
 
 import pdfplumber
 import docx2txt
+from django.conf import settings
+
+# Caps so one huge upload can't stall a parse worker (or the LLM prompt)
+MAX_PAGES = 40
+MAX_CHARS = 60000
+
+# Only documents at least this long are split across processes
+PARALLEL_MIN_PAGES = 16
+
+
+def _pdfium_page_range(path, start, stop):
+    """Text of pages [start, stop) via pypdfium2's plain text path."""
+    import pypdfium2 as pdfium
+
+    texts = []
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for i in range(start, stop):
+            page     = pdf[i]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return texts
+
+
+def _pdfium_page_count(path):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def extract_pdf_pdfium(path, max_pages=MAX_PAGES, workers=0):
+    pages = min(_pdfium_page_count(path), max_pages)
+    if workers and workers > 1 and pages >= PARALLEL_MIN_PAGES:
+        # pdfium isn't thread-safe, so parallelise across processes
+        step   = -(-pages // workers)
+        ranges = [(s, min(s + step, pages)) for s in range(0, pages, step)]
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            chunks = pool.map(_pdfium_page_range, [path] * len(ranges), *zip(*ranges))
+            texts  = [t for chunk in chunks for t in chunk]
+    else:
+        texts = _pdfium_page_range(path, 0, pages)
+    return "\n".join(t.strip() for t in texts if t and t.strip())
+
+
+def extract_pdf_pdfplumber(path, max_pages=MAX_PAGES, workers=0):
+    # Extract page-by-page text from PDF
+    text_pages = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            page_text = page.extract_text()
+            if page_text:
+                text_pages.append(page_text)
+    return "\n".join(text_pages)
+
+
+PDF_BACKENDS = {
+    'pdfium':     extract_pdf_pdfium,
+    'pdfplumber': extract_pdf_pdfplumber,
+}
+
+
+def extract_pdf(path, backend=None, max_pages=None, workers=None):
+    """
+    Extract a PDF with the configured backend (pypdfium2 by default),
+    falling back to pdfplumber when it fails or finds no text.
+    """
+    backend   = backend or getattr(settings, 'PDF_TEXT_BACKEND', 'pdfium')
+    max_pages = max_pages or getattr(settings, 'PDF_MAX_PAGES', MAX_PAGES)
+    workers   = getattr(settings, 'PDF_EXTRACT_WORKERS', 0) if workers is None else workers
+
+    text = ""
+    try:
+        text = PDF_BACKENDS[backend](path, max_pages=max_pages, workers=workers)
+    except Exception:
+        if backend == 'pdfplumber':
+            raise
+    if not text.strip() and backend != 'pdfplumber':
+        text = extract_pdf_pdfplumber(path, max_pages=max_pages)
+    return text
+
 
-def extract_text_from_file(path: str) -> str:
+def extract_text_from_file(path: str, max_chars=None) -> str:
     """
     Given a filesystem path to a PDF or DOCX or image,
-    return the full extracted text.
+    return the full extracted text (capped at max_chars).
     """
+    max_chars = max_chars or getattr(settings, 'TEXT_MAX_CHARS', MAX_CHARS)
     lower = path.lower()
     if lower.endswith('.pdf'):
-        # Extract page-by-page text from PDF
-        text_pages = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_pages.append(page_text)
-        return "\n".join(text_pages)
+        return extract_pdf(path)[:max_chars]
 
     # DOCX (and DOC) → plain text
     if lower.endswith('.docx') or lower.endswith('.doc'):
-        return docx2txt.process(path)
+        return docx2txt.process(path)[:max_chars]
 
     # (Optional) you could add OCR for JPG/PNG here, but for now:
     raise ValueError("Unsupported file type for text extraction")
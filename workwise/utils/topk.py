@@ -0,0 +1,21 @@
+import numpy as np
+
+
+def top_k(scores, k, ids=None):
+    """
+    Indices of the `k` highest finite entries of `scores`, best first, in
+    O(n + k log k): a partial partition finds the k-th best score and only
+    the entries at or above it get sorted. Ties are broken by ascending
+    `ids` (default: the index itself).
+    """
+    scores = np.asarray(scores, dtype=float)
+    cand   = np.flatnonzero(np.isfinite(scores))
+    if k <= 0 or not len(cand):
+        return np.empty(0, dtype=np.intp)
+    if len(cand) > k:
+        # make sure every entry tied with the k-th best is in the running
+        kth  = np.partition(scores[cand], len(cand) - k)[len(cand) - k]
+        cand = cand[scores[cand] >= kth]
+    ids   = cand if ids is None else np.asarray(ids)[cand]
+    order = np.lexsort((ids, -scores[cand]))
+    return cand[order[:k]]
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'authentication',
     'employer_profile',      
     'candidate_profile',
+    'taskqueue',
 ]
 
 MIDDLEWARE = [
@@ -62,10 +63,26 @@ WSGI_APPLICATION = 'workwise.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# writer; busy_timeout (ms) waits for the write lock instead of failing.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous':  'normal',
+    'mmap_size':    256 * 1024 * 1024,
+    'cache_size':   -32000,            # negative = KiB
+    'busy_timeout': 5000,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in SQLITE_PRAGMAS.items()),
+            # take the write lock at BEGIN, so busy_timeout applies instead of
+            # failing when a read transaction later tries to write
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -117,6 +134,39 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Fitted ML artifacts (job TF-IDF model, ...) shared by all workers
+ML_MODELS_DIR = os.path.join(BASE_DIR, 'ml_models')
+
+# Byte budget of the content-hash cache for extracted/parsed resumes
+RESUME_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Resume text extraction: 'pdfium' (falls back to pdfplumber) or 'pdfplumber'
+PDF_TEXT_BACKEND    = 'pdfium'
+PDF_MAX_PAGES       = 40
+PDF_EXTRACT_WORKERS = 0       # >1 splits long PDFs across processes
+TEXT_MAX_CHARS      = 60000
+
+# Run queued tasks inline after commit instead of in `manage.py run_worker`
+TASKS_EAGER = False
+
+# Cache: a small per-process LRU in front of a file cache shared by every
+# worker on the box (utils/cache.py). Local copies live LOCAL_TIMEOUT seconds.
+CACHES = {
+    'default': {
+        'BACKEND':  'utils.cache.TwoTierCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'TIMEOUT':  300,
+        'OPTIONS': {
+            'MAX_ENTRIES':       5000,
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT':     5,
+        },
+    }
+}
+
+# tests get a throwaway cache directory (utils/testing.py)
+TEST_RUNNER = 'utils.testing.TestRunner'
+
 
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'